@@ -0,0 +1,52 @@
+import random
+import time
+from game.server.game_logic.game import Game
+from game.server.game_logic.action_space_cache import ActionSpaceCache
+from game.server.game_logic.action_space_generator import ActionSpaceGenerator
+from game.server.game_logic.state_changer import StateChanger
+from game.schema import PlayerColor
+
+action_generator = ActionSpaceGenerator()
+cache = ActionSpaceCache(action_generator, maxsize=2048)
+
+def dump(actions):
+    return [action.model_dump_json() for action in actions]
+
+results = []
+cached_time = fresh_time = 0.0
+for seed in range(8):
+    random.seed(seed)
+    player_count = 2 + seed % 3
+    game = Game()
+    game.start(player_count, list(PlayerColor)[:player_count])
+    state_service = game.state_service
+    state_changer = StateChanger(state_service)
+    for _ in range(300):
+        if state_service.is_terminal():
+            break
+        active_player = state_service.get_active_player()
+        # Пробуем несколько ходов и откатываем их, как в поиске по дереву
+        for _ in range(3):
+            action = action_generator.sample_action(state_service, active_player.color)
+            if action is None:
+                break
+            token = state_service.get_undo_token()
+            state_changer.apply_action(action, state_service, state_service.get_active_player())
+            color = state_service.get_active_player().color
+            start = time.perf_counter()
+            cached = cache.get_action_space(state_service, color)
+            cached_time += time.perf_counter() - start
+            start = time.perf_counter()
+            fresh = action_generator.get_action_space(state_service, color)
+            fresh_time += time.perf_counter() - start
+            results.append(dump(cached) == dump(fresh))
+            state_service.rollback(token)
+        results.append(dump(cache.get_action_space(state_service, active_player.color)) == dump(action_generator.get_action_space(state_service, active_player.color)))
+        action = action_generator.sample_action(state_service, active_player.color)
+        if action is None:
+            break
+        state_changer.apply_action(action, state_service, active_player)
+    print(seed, all(results))
+
+print(f"{len(results)} positions, all equal {all(results)}, hits {cache.hits}, misses {cache.misses}")
+print(f"cached {cached_time:.3f}s, fresh {fresh_time:.3f}s")
@@ -0,0 +1,76 @@
+import json
+import random
+import time
+from game.server.game_logic.game import Game
+from game.server.game_logic.action_codec import ActionCodec
+from game.server.game_logic.action_space_generator import ActionSpaceGenerator
+from game.server.game_logic.state_changer import StateChanger
+from game.schema import PlayerColor
+
+action_generator = ActionSpaceGenerator()
+codec = ActionCodec.get()
+print(f"code space {codec.size}, fits int64 {codec.size < 2 ** 63}")
+
+def check_position(state_service, color):
+    actions = action_generator.get_action_space(state_service, color)
+    codes = [codec.encode(action) for action in actions]
+    return (
+        codes == list(action_generator.iter_encoded_action_space(state_service, color))
+        and len(set(codes)) == len(codes)
+        and all(codec.decode(code) == action for code, action in zip(codes, actions))
+    )
+
+json_time = code_time = 0.0
+for seed in range(8):
+    random.seed(seed)
+    player_count = 2 + seed % 3
+    game = Game()
+    game.start(player_count, list(PlayerColor)[:player_count])
+    state_changer = StateChanger(game.state_service)
+    results = []
+    for _ in range(300):
+        if game.state_service.is_terminal():
+            break
+        active_player = game.state_service.get_active_player()
+        results.append(check_position(game.state_service, active_player.color))
+        actions = action_generator.get_action_space(game.state_service, active_player.color)
+        start = time.perf_counter()
+        for action in actions:
+            json.dumps(action.model_dump(), sort_keys=True)
+        json_time += time.perf_counter() - start
+        start = time.perf_counter()
+        for action in actions:
+            codec.encode(action)
+        code_time += time.perf_counter() - start
+        action = action_generator.sample_action(game.state_service, active_player.color)
+        if action is None:
+            break
+        state_changer.apply_action(action, game.state_service, active_player)
+    print(seed, len(results), all(results))
+
+print(f"json hashing {json_time:.3f}s, int encoding {code_time:.3f}s")
+
+def check_mask(state_service, color):
+    mask = action_generator.legal_mask(state_service, color)
+    heads = {codec.split(code)[0] for code in action_generator.iter_encoded_action_space(state_service, color)}
+    return mask.shape == (codec.head_size,) and set(mask.nonzero()[0].tolist()) == heads
+
+mask_results = []
+mask_time = 0.0
+for seed in range(4):
+    random.seed(seed)
+    game = Game()
+    game.start(4, list(PlayerColor))
+    state_changer = StateChanger(game.state_service)
+    for _ in range(200):
+        if game.state_service.is_terminal():
+            break
+        active_player = game.state_service.get_active_player()
+        start = time.perf_counter()
+        mask_results.append(check_mask(game.state_service, active_player.color))
+        mask_time += time.perf_counter() - start
+        action = action_generator.sample_action(game.state_service, active_player.color)
+        if action is None:
+            break
+        state_changer.apply_action(action, game.state_service, active_player)
+print(f"legal mask {len(mask_results)} positions {all(mask_results)}")
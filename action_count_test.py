@@ -0,0 +1,90 @@
+import random
+from collections import Counter
+from game.server.game_logic.game import Game
+from game.server.game_logic.action_space_generator import ActionSpaceGenerator
+from game.server.game_logic.state_changer import StateChanger
+from game.schema import PlayerColor
+
+action_generator = ActionSpaceGenerator()
+
+def expected_counts(actions):
+    by_card, by_slot, by_link = Counter(), Counter(), Counter()
+    for action in actions:
+        card_ids = action.card_id if isinstance(action.card_id, list) else [action.card_id]
+        by_card.update(card_id for card_id in card_ids if card_id is not None)
+        if getattr(action, 'slot_id', None) is not None:
+            by_slot[action.slot_id] += 1
+        if getattr(action, 'link_id', None) is not None:
+            by_link[action.link_id] += 1
+    return Counter(action.action for action in actions), by_card, by_slot, by_link
+
+def check_position(state_service, color):
+    actions = action_generator.get_action_space(state_service, color)
+    counts = action_generator.count_actions(state_service, color)
+    by_type, by_card, by_slot, by_link = expected_counts(actions)
+    return (
+        counts.total == len(actions)
+        and counts.by_type == dict(by_type)
+        and counts.by_card == dict(by_card)
+        and counts.by_slot == dict(by_slot)
+        and counts.by_link == dict(by_link)
+    )
+
+for seed in range(8):
+    random.seed(seed)
+    player_count = 2 + seed % 3
+    game = Game()
+    game.start(player_count, list(PlayerColor)[:player_count])
+    state_changer = StateChanger(game.state_service)
+    results = []
+    for _ in range(300):
+        if game.state_service.is_terminal():
+            break
+        active_player = game.state_service.get_active_player()
+        results.append(check_position(game.state_service, active_player.color))
+        action = action_generator.sample_action(game.state_service, active_player.color)
+        if action is None:
+            break
+        state_changer.apply_action(action, game.state_service, active_player)
+    print(seed, len(results), all(results))
+
+def exact_key(action, hand):
+    # Действие с точностью до замены карты на карту того же типа и значения
+    card_ids = action.card_id if isinstance(action.card_id, list) else [action.card_id]
+    cards = sorted((hand[card_id].card_type, hand[card_id].value) for card_id in card_ids if card_id is not None)
+    fields = action.model_dump(exclude={'card_id'})
+    return type(action), repr(fields), tuple(cards)
+
+def check_canonical(state_service, color):
+    actions = action_generator.get_action_space(state_service, color)
+    canonical = action_generator.get_canonical_action_space(state_service, color)
+    hand = state_service.get_player(color).hand
+    # Каждое действие представлено ровно один раз, сливаются только взаимозаменяемые карты
+    assert sum(count for _, count in canonical) == len(actions)
+    keys = {exact_key(action, hand) for action in actions}
+    assert len(keys) == len(canonical)
+    assert {exact_key(action, hand) for action, _ in canonical} == keys
+    return len(actions), len(canonical)
+
+total_full, total_collapsed = 0, 0
+for seed in range(4):
+    random.seed(seed)
+    game = Game()
+    game.start(4, list(PlayerColor))
+    state_changer = StateChanger(game.state_service)
+    full, collapsed = 0, 0
+    for _ in range(200):
+        if game.state_service.is_terminal():
+            break
+        active_player = game.state_service.get_active_player()
+        actions_count, canonical_count = check_canonical(game.state_service, active_player.color)
+        full += actions_count
+        collapsed += canonical_count
+        action = action_generator.sample_action(game.state_service, active_player.color)
+        if action is None:
+            break
+        state_changer.apply_action(action, game.state_service, active_player)
+    print(f"canonical {seed}: {full} actions -> {collapsed} ({full / collapsed:.1f}x)")
+    total_full += full
+    total_collapsed += collapsed
+print(f"canonical total: {total_full} actions -> {total_collapsed} ({total_full / total_collapsed:.2f}x)")
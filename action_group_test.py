@@ -0,0 +1,74 @@
+import random
+from collections import Counter
+from itertools import product
+from game.server.game_logic.game import Game
+from game.server.game_logic.action_space_generator import ActionSpaceGenerator
+from game.server.game_logic.state_changer import StateChanger
+from game.schema import PlayerColor
+
+action_generator = ActionSpaceGenerator()
+
+def eager(group):
+    # Полное декартово произведение осей группы, собранное сразу
+    names = list(group.axes)
+    return [group.action_class(**group.fixed, **dict(zip(names, values))) for values in product(*group.axes.values())]
+
+def field_counts(actions, name):
+    counts = Counter()
+    for action in actions:
+        value = getattr(action, name, None)
+        for key in (value if isinstance(value, list) else (value,)):
+            if key is not None:
+                counts[key] += 1
+    return counts
+
+def check(state_service, rng):
+    color = state_service.get_active_player().color
+    actions = action_generator.get_action_space(state_service, color)
+    groups = list(action_generator.iter_action_groups(state_service, color))
+    indexed = [group[i] for group in groups for i in range(len(group))]
+    counts = action_generator.count_actions(state_service, color)
+    samples = [action_generator.sample_action(state_service, color, rng) for _ in range(5)]
+    samples_legal = all(sample in actions for sample in samples) if actions else samples == [None] * 5
+    out_of_range = []
+    for group in groups:
+        try:
+            group[len(group)]
+        except IndexError:
+            out_of_range.append(True)
+    return (
+        [action for group in groups for action in eager(group)] == actions
+        and indexed == actions
+        and sum(len(group) for group in groups) == len(actions)
+        and counts.total == len(actions)
+        and counts.by_type == dict(Counter(action.action for action in actions))
+        and counts.by_card == dict(field_counts(actions, 'card_id'))
+        and counts.by_slot == dict(field_counts(actions, 'slot_id'))
+        and counts.by_link == dict(field_counts(actions, 'link_id'))
+        and samples_legal
+        and len(out_of_range) == len(groups)
+    )
+
+results = []
+rng = random.Random(0)
+for seed in range(9):
+    random.seed(seed)
+    player_count = 2 + seed % 3
+    game = Game()
+    game.start(player_count, list(PlayerColor)[:player_count])
+    state_service = game.state_service
+    state_changer = StateChanger(state_service)
+    for era in range(2):
+        while not state_service.is_terminal():
+            results.append(check(state_service, rng))
+            action = action_generator.sample_action(state_service, state_service.get_active_player().color)
+            if action is None:
+                break
+            state_changer.apply_action(action, state_service, state_service.get_active_player())
+        if era == 0:
+            # Случайная партия упирается в конец раунда, поэтому эпоху меняем напрямую
+            state_changer.turn_manager._prepare_next_era(state_service)
+    print(seed, all(results))
+
+print(f"{len(results)} positions, lazy groups equal the eager list {all(results)}")
+assert all(results), "lazy action groups differ from the eager action list"
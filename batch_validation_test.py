@@ -0,0 +1,69 @@
+import random
+from game.server.game_logic.game import Game
+from game.server.game_logic.action_space_generator import ActionSpaceGenerator
+from game.server.game_logic.state_changer import StateChanger
+from game.schema import PlayerColor, Request, RequestType, ValidationRequestResult
+
+action_generator = ActionSpaceGenerator()
+
+def candidates(state_service, color, rng):
+    '''Legal actions plus copies with a swapped slot, link or card, most of them illegal'''
+    actions = action_generator.get_action_space(state_service, color)
+    out = list(actions)
+    for action in rng.sample(actions, min(len(actions), 40)):
+        update = {}
+        if getattr(action, 'slot_id', None) is not None:
+            update['slot_id'] = rng.randrange(1, 60)
+        elif getattr(action, 'link_id', None) is not None:
+            update['link_id'] = rng.randrange(1, 40)
+        if isinstance(action.card_id, int):
+            update['card_id'] = rng.choice(list(state_service.get_player(color).hand))
+        out.append(action.model_copy(update=update))
+    return out
+
+def outcome(result):
+    return result.is_valid, result.message
+
+equal = []
+for seed in range(4):
+    random.seed(seed)
+    rng = random.Random(seed)
+    game = Game()
+    game.start(4, list(PlayerColor))
+    state_service = game.state_service
+    validation_service = game.action_processor.validation_service
+    state_changer = StateChanger(state_service)
+    for _ in range(60):
+        if state_service.is_terminal():
+            break
+        player = state_service.get_active_player()
+        actions = candidates(state_service, player.color, rng)
+        single = []
+        for action in actions:
+            try:
+                single.append(outcome(validation_service.validate_action(action, state_service, player)))
+            except (AttributeError, KeyError):
+                # Одиночная проверка падает на несуществующем слоте или связи
+                single.append((False, 'malformed'))
+        results = validation_service.validate_many(actions, state_service, player)
+        # Пачка отсекает ссылки на несуществующие слоты и связи до валидаторов; одиночная проверка их тоже не принимает
+        equal.append(all(
+            expected == outcome(result) or (result.message or '').startswith('Malformed') and not expected[0]
+            for expected, result in zip(single, results)
+        ))
+        action = action_generator.sample_action(state_service, player.color)
+        if action is None:
+            break
+        state_changer.apply_action(action, state_service, player)
+assert all(equal), "validate_many disagrees with validate_action"
+print(f"{len(equal)} positions, batch equals single")
+
+random.seed(0)
+game = Game()
+game.start(4, list(PlayerColor))
+color = game.state_service.get_active_player().color
+actions = action_generator.get_action_space(game.state_service, color)[:5]
+request = Request.model_validate({'request': 'validate', 'actions': [action.model_dump(mode='json') for action in actions]})
+result = game.process_action(request, color)
+assert isinstance(result, ValidationRequestResult) and all(r.is_valid for r in result.result)
+print("request type works")
@@ -0,0 +1,181 @@
+import json
+import random
+from copy import deepcopy
+from game.server.game_logic.game import Game
+from game.server.game_logic.action_space_generator import ActionSpaceGenerator
+from game.server.game_logic.state_changer import StateChanger
+from game.server.game_logic.services.building_provider import BuildingProvider
+from game.server.game_logic.services.resource_tables import ResourceTables
+from game.schema import Card, CardType, IndustryType, PlacedBuilding, PlayerColor, PlayerState
+
+action_generator = ActionSpaceGenerator()
+building_provider = BuildingProvider()
+
+def load(path):
+    with open(path) as openfile:
+        return json.load(openfile)
+
+def play_positions(seeds):
+    '''Позиции случайных партий на 2-4 игрока, в обеих эпохах'''
+    for seed in range(seeds):
+        random.seed(seed)
+        player_count = 2 + seed % 3
+        game = Game()
+        game.start(player_count, list(PlayerColor)[:player_count])
+        state_service = game.state_service
+        state_changer = StateChanger(state_service)
+        for era in range(2):
+            while not state_service.is_terminal():
+                yield state_service
+                action = action_generator.sample_action(state_service, state_service.get_active_player().color)
+                if action is None:
+                    break
+                state_changer.apply_action(action, state_service, state_service.get_active_player())
+            if era == 0:
+                # Случайная партия упирается в конец раунда, поэтому эпоху меняем напрямую
+                state_changer.turn_manager._prepare_next_era(state_service)
+
+# --- Шаблоны зданий против building_table.json ---
+def building_matches(building, data):
+    cost = data['cost']
+    return (
+        building.id == data['id']
+        and building.industry_type == data['industry']
+        and building.level == data['level']
+        and building.income == data['income']
+        and building.victory_points == data['vp']
+        and building.link_victory_points == data['conn_vp']
+        and building.is_developable == data.get('developable', True)
+        and building.sell_cost == data.get('sell_cost')
+        and building.resource_count == data.get('resource_count', 0)
+        and building.era_exclusion == data.get('era_exclusion')
+        and (building.cost.money, building.cost.coal, building.cost.iron, building.cost.beer)
+        == (cost.get('money', 0), cost.get('coal', 0), cost.get('iron', 0), cost.get('beer', 0))
+    )
+
+buildings_data = load(ResourceTables.BUILDING_ROSTER_PATH)
+results = [
+    len(building_provider.buildings_by_id) == len(buildings_data)
+    and all(building_matches(building_provider.buildings_by_id[data['id']], data) for data in buildings_data)
+]
+for industry in IndustryType:
+    levels = sorted(data['level'] for data in buildings_data if data['industry'] == industry)
+    results.append([building.level for building in building_provider.building_roster[industry]] == levels)
+
+# Здание на поле читает неизменные поля из общего шаблона
+for template in building_provider.buildings_by_id.values():
+    placed = PlacedBuilding.from_template(template, PlayerColor.WHITE, 7)
+    building = placed.as_building()
+    copied = deepcopy(placed)
+    results.append(
+        building_matches(placed, next(data for data in buildings_data if data['id'] == template.id))
+        and building.owner == PlayerColor.WHITE and building.slot_id == 7
+        and PlacedBuilding.from_building(building).as_building() == building
+        and copied == placed and copied is not placed and copied.template is template
+    )
+print(f"building templates: {len(results)} checks, all equal {all(results)}")
+assert all(results), "building templates differ from building_table.json"
+
+results = []
+for state_service in play_positions(6):
+    for city in state_service.get_cities().values():
+        for slot in city.slots.values():
+            building = slot.building_placed
+            if building is not None:
+                results.append(building.template is building_provider.buildings_by_id[building.id] and building.slot_id == slot.id)
+print(f"placed buildings: {len(results)} checks, all share the template {all(results)}")
+assert results and all(results), "placed building does not share its roster template"
+
+# --- Топология и индексы сервиса против cities_list.json и city_links.json ---
+cities_data = load(ResourceTables.CITIES_LIST_PATH)
+links_data = load(ResourceTables.LINKS_PATH)
+results = []
+for player_count in ResourceTables.PLAYER_COUNTS:
+    game = Game()
+    game.start(player_count, list(PlayerColor)[:player_count])
+    state_service = game.state_service
+    results.append(list(state_service.get_cities()) == [city['name'] for city in cities_data])
+    for city_data in cities_data:
+        city = state_service.get_city(city_data['name'])
+        merchant_data = city_data.get('merchant_slots', []) if city_data.get('merchant', False) else []
+        results.append(
+            list(city.slots) == [slot['id'] for slot in city_data.get('building_slots', [])]
+            and city.is_merchant == city_data.get('merchant', False)
+            and city.merchant_min_players == city_data.get('player_count')
+            and list(city.merchant_slots or ()) == [mslot['id'] for mslot in merchant_data]
+        )
+        for slot_data in city_data.get('building_slots', []):
+            slot = state_service.get_building_slot(slot_data['id'])
+            results.append(
+                slot is city.slots[slot_data['id']] and slot.city == city_data['name']
+                and list(slot.industry_type_options) == slot_data['industry_type_options']
+            )
+        for mslot_data in merchant_data:
+            mslot = state_service.get_merchant_slot(mslot_data['id'])
+            results.append(mslot is city.merchant_slots[mslot_data['id']] and mslot.city == city_data['name'])
+            if player_count < city_data['player_count']:
+                # Купцы, не участвующие при этом числе игроков, лежат по умолчанию
+                results.append(mslot.merchant_type == mslot_data['merchant_type'])
+    links = state_service.get_links()
+    results.append(list(links) == [link['id'] for link in links_data])
+    for link_data in links_data:
+        link = links[link_data['id']]
+        results.append(list(link.cities) == link_data['cities'] and list(link.type) == link_data['transport'] and link.owner is None)
+print(f"board topology: {len(results)} checks, all equal {all(results)}")
+assert all(results), "board topology differs from the board JSON"
+
+def scanned_buildings(state_service):
+    return [
+        slot.building_placed
+        for city in state_service.get_cities().values() for slot in city.slots.values()
+        if slot.building_placed is not None
+    ]
+
+def by_slot(buildings):
+    return sorted(buildings, key=lambda building: building.slot_id)
+
+results = []
+for state_service in play_positions(6):
+    buildings = scanned_buildings(state_service)
+    results.append(
+        all(state_service.get_buildings_by_owner(color) == by_slot(b for b in buildings if b.owner == color) for color in state_service.get_players())
+        and all(state_service.get_buildings_by_industry(industry) == by_slot(b for b in buildings if b.industry_type == industry) for industry in IndustryType)
+        and all(state_service.get_stocked_buildings(industry) == by_slot(b for b in buildings if b.industry_type == industry and b.resource_count > 0) for industry in IndustryType)
+        and all(
+            dict(state_service.get_city_buildings(name)) == {slot_id: slot.building_placed for slot_id, slot in city.slots.items() if slot.building_placed is not None}
+            for name, city in state_service.get_cities().items()
+        )
+    )
+print(f"building indexes: {len(results)} positions, all equal {all(results)}")
+assert all(results), "building indexes differ from a scan of the board"
+
+# --- Карты против card_list.json: один экземпляр на id ---
+cards_data = load(ResourceTables.CARD_LIST_PATH)
+tables = ResourceTables.get()
+results = [
+    all(
+        (card.id, card.card_type, card.value) == (data['id'], data['card_type'], data['value']) and Card.get(data['id']) is card
+        for data in cards_data for card in (tables.cards_by_id[data['id']],)
+    ),
+    [(card.id, card.value) for card in tables.wild_cards] == [(ResourceTables.INDUSTRY_WILD_ID, 'wild'), (ResourceTables.CITY_WILD_ID, 'wild')],
+    all(deepcopy(card) is card for card in tables.cards_by_id.values()),
+]
+for player_count in ResourceTables.PLAYER_COUNTS:
+    results.append([card.id for card in tables.get_deck(player_count)] == [data['id'] for data in cards_data if data['player_count'] <= player_count])
+
+# Карта с тем же id, но другим содержимым не подменяется каноничной
+stranger = Card(id=cards_data[0]['id'], card_type=CardType.CITY, value='mock')
+results.append(Card.intern(stranger) is stranger and Card.get(stranger.id) is tables.cards_by_id[stranger.id])
+
+for state_service in play_positions(3):
+    state = state_service.get_board_state()
+    color = state_service.get_active_player().color
+    player_state = PlayerState(state=state.hide_state(), your_hand=state.players[color].hand, your_color=color)
+    parsed = PlayerState.model_validate_json(player_state.model_dump_json())
+    results.append(
+        all(card is Card.get(card.id) for card in state.deck + state.discard + state.wilds)
+        and all(card is Card.get(card.id) for player in state.players.values() for card in player.hand.values())
+        and all(parsed.your_hand[card_id] is card for card_id, card in player_state.your_hand.items())
+    )
+print(f"cards: {len(results)} checks, all interned {all(results)}")
+assert all(results), "cards differ from card_list.json or are not interned"
@@ -0,0 +1,92 @@
+import random
+from collections import defaultdict
+from game.server.game_logic.game import Game
+from game.server.game_logic.action_space_generator import ActionSpaceGenerator
+from game.server.game_logic.state_changer import StateChanger
+from game.server.game_logic.services.validators import BuildValidator
+from game.schema import BuildAction, IndustryType, PlayerColor
+
+action_generator = ActionSpaceGenerator()
+build_validator = BuildValidator()
+
+def mixed_cities(state_service):
+    # Города, где индустрия есть и в слоте на одну, и в слоте на две индустрии
+    out = set()
+    for name, city in state_service.get_cities().items():
+        for industry in IndustryType:
+            sizes = {len(slot.industry_type_options) for slot in city.slots.values() if industry in slot.industry_type_options}
+            if len(sizes) > 1:
+                out.add(name)
+    return out
+
+def available(state_service, player, slot, industry):
+    if industry not in slot.industry_type_options:
+        return False
+    if slot.building_placed is None:
+        return True
+    building = state_service.get_current_building(player, industry)
+    return building is not None and build_validator._validate_overbuild(slot.building_placed, building, state_service, player).is_valid
+
+def per_slot_filter(state_service, player, city, industry):
+    '''Старый фильтр по слотам: слот годится, если нет доступного слота с меньшим числом индустрий'''
+    slots = city.slots.values()
+    return {
+        slot.id for slot in slots
+        if available(state_service, player, slot, industry) and not any(
+            len(other.industry_type_options) < len(slot.industry_type_options) and available(state_service, player, other, industry)
+            for other in slots
+        )
+    }
+
+def min_tier_filter(state_service, player, city, industry):
+    '''Фильтр генератора до ярусов: только слоты с минимальным числом индустрий'''
+    sizes = [len(slot.industry_type_options) for slot in city.slots.values() if industry in slot.industry_type_options]
+    return {
+        slot.id for slot in city.slots.values()
+        if industry in slot.industry_type_options and len(slot.industry_type_options) == min(sizes)
+        and available(state_service, player, slot, industry)
+    }
+
+def check(state_service, results, counts):
+    player = state_service.get_active_player()
+    cities = mixed_cities(state_service)
+    generated = defaultdict(set)
+    for action in action_generator.get_action_space(state_service, player.color):
+        if isinstance(action, BuildAction):
+            city_name = state_service.get_building_slot(action.slot_id).city
+            if city_name in cities:
+                generated[(city_name, action.industry)].add(action.slot_id)
+    for (city_name, industry), slot_ids in generated.items():
+        city = state_service.get_city(city_name)
+        results.append(slot_ids == per_slot_filter(state_service, player, city, industry))
+        old = min_tier_filter(state_service, player, city, industry)
+        if old:
+            counts['same tier'] += 1
+            results.append(slot_ids == old)
+        else:
+            # Слоты первого яруса заняты: стройка переходит на слоты с двумя индустриями
+            counts['next tier'] += 1
+
+results = []
+counts = defaultdict(int)
+for seed in range(12):
+    random.seed(seed)
+    player_count = 2 + seed % 3
+    game = Game()
+    game.start(player_count, list(PlayerColor)[:player_count])
+    state_service = game.state_service
+    state_changer = StateChanger(state_service)
+    for era in range(2):
+        while not state_service.is_terminal():
+            check(state_service, results, counts)
+            action = action_generator.sample_action(state_service, state_service.get_active_player().color)
+            if action is None:
+                break
+            state_changer.apply_action(action, state_service, state_service.get_active_player())
+        if era == 0:
+            # Случайная партия упирается в конец раунда, поэтому эпоху меняем напрямую
+            state_changer.turn_manager._prepare_next_era(state_service)
+
+print(f"{len(results)} checks, {dict(counts)}, all equal {all(results)}")
+assert counts['same tier'] and counts['next tier'], "no mixed city was checked in both cases"
+assert all(results), "build slots differ from the per-slot filter"
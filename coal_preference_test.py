@@ -0,0 +1,73 @@
+import random
+from game.server.game_logic.game import Game
+from game.server.game_logic.action_space_generator import ActionSpaceGenerator
+from game.server.game_logic.state_changer import StateChanger
+from game.schema import BuildAction, NetworkAction, IndustryType, PlayerColor, ResourceSource, ResourceType
+
+action_generator = ActionSpaceGenerator()
+# Дальний уголь при оставшемся ближнем, либо ближнее кольцо выбрано не полностью
+PREFERENCE_MESSAGES = ("Distant coal requested while nearer coal is left", "have coal consumption preference")
+
+def coal_slots(state_service, ring):
+    # Шахты с углём в городах кольца
+    cities = set(state_service.city_index.mask_cities(ring))
+    return [
+        building.slot_id for building in state_service.get_stocked_buildings(IndustryType.COAL)
+        if state_service.get_building_slot(building.slot_id).city in cities
+    ]
+
+def distant_swaps(state_service, action):
+    '''Копии действия, где уголь из ближнего кольца заменён углём из дальнего'''
+    if isinstance(action, BuildAction):
+        rings = state_service.get_coal_rings(city_name=state_service.get_building_slot(action.slot_id).city)
+    else:
+        rings = state_service.get_coal_rings(link_id=action.link_id)
+    rings = [ring for ring in rings if ring]
+    if len(rings) < 2:
+        return []
+    near = set(coal_slots(state_service, rings[0]))
+    far = [slot_id for ring in rings[1:] for slot_id in coal_slots(state_service, ring)]
+    swaps = []
+    for i, resource in enumerate(action.resources_used):
+        if resource.resource_type == ResourceType.COAL and resource.building_slot_id in near:
+            for slot_id in far:
+                resources = list(action.resources_used)
+                resources[i] = ResourceSource(resource_type=ResourceType.COAL, building_slot_id=slot_id)
+                swaps.append(action.model_copy(update={'resources_used': resources}))
+            break
+    return swaps
+
+def check(state_service, validation_service, results):
+    player = state_service.get_active_player()
+    for action in action_generator.get_action_space(state_service, player.color):
+        if not isinstance(action, (BuildAction, NetworkAction)):
+            continue
+        for swapped in distant_swaps(state_service, action):
+            result = validation_service.validate_action(swapped, state_service, player)
+            results.append((isinstance(action, BuildAction), not result.is_valid and any(message in result.message for message in PREFERENCE_MESSAGES)))
+
+results = []
+for seed in range(40):
+    random.seed(seed)
+    player_count = 2 + seed % 3
+    game = Game()
+    game.start(player_count, list(PlayerColor)[:player_count])
+    state_service = game.state_service
+    validation_service = game.action_processor.validation_service
+    state_changer = StateChanger(state_service)
+    for era in range(2):
+        while not state_service.is_terminal():
+            check(state_service, validation_service, results)
+            action = action_generator.sample_action(state_service, state_service.get_active_player().color)
+            if action is None:
+                break
+            state_changer.apply_action(action, state_service, state_service.get_active_player())
+        if era == 0:
+            # Случайная партия упирается в конец раунда, поэтому эпоху меняем напрямую
+            state_changer.turn_manager._prepare_next_era(state_service)
+
+builds = [ok for is_build, ok in results if is_build]
+links = [ok for is_build, ok in results if not is_build]
+print(f"distant coal: {len(builds)} builds, {len(links)} links, all rejected {all(builds) and all(links)}")
+assert builds, "no build with coal at two distances"
+assert all(builds) and all(links), "distant coal accepted while nearer coal is left"
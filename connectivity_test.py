@@ -0,0 +1,152 @@
+import random
+import time
+from game.server.game_logic.game import Game
+from game.server.game_logic.action_space_generator import ActionSpaceGenerator
+from game.server.game_logic.state_changer import StateChanger
+from game.server.game_logic.services.connectivity import CityConnectivity
+from game.schema import ActionContext, ActionType, IndustryType, NetworkAction, PlayerColor
+
+action_generator = ActionSpaceGenerator()
+
+def components(connectivity, cities):
+    return sorted(sorted(connectivity.members(city)) for city in cities if connectivity.find(city) == city)
+
+def rebuilt(state_service):
+    return CityConnectivity.from_links(
+        [city for city in link.cities if city in state_service.get_cities()]
+        for link in state_service.iter_links()
+        if link.owner is not None
+    )
+
+def network(state_service, color):
+    cities = {state_service.get_building_slot(building.slot_id).city for building in state_service.get_buildings_by_owner(color)}
+    cities.update(city for link in state_service.iter_links() if link.owner == color for city in link.cities)
+    return cities or set(state_service.get_cities())
+
+def coal_locations(state_service, start):
+    # Обход в ширину по занятым связям, как до колец расстояний
+    coal = {state_service.get_building_slot(building.slot_id).city for building in state_service.get_stocked_buildings(IndustryType.COAL)}
+    graph = {}
+    for link in state_service.iter_links():
+        if link.owner is not None:
+            for city in link.cities:
+                graph.setdefault(city, set()).update(other for other in link.cities if other != city)
+    distances = {city: 0 for city in start}
+    frontier = list(start)
+    while frontier:
+        reached = []
+        for city in frontier:
+            for neighbor in graph.get(city, ()):
+                if neighbor not in distances:
+                    distances[neighbor] = distances[city] + 1
+                    reached.append(neighbor)
+        frontier = reached
+    return {city: distance for city, distance in distances.items() if city in coal}
+
+def check(state_service):
+    cities = list(state_service.get_cities())
+    connectivity = rebuilt(state_service)
+    merchants = {name for name, city in state_service.get_cities().items() if city.is_merchant}
+    return (
+        components(state_service._get_connectivity(), cities) == components(connectivity, cities)
+        and all(set(state_service.get_player_network(color)) == network(state_service, color) for color in state_service.get_players())
+        and all(state_service.market_access_exists(city) == bool(merchants & set(connectivity.members(city))) for city in cities)
+        and all(state_service.get_player_coal_locations(city_name=city) == coal_locations(state_service, [city]) for city in cities)
+        and all(state_service.get_player_coal_locations(link_id=link.id) == coal_locations(state_service, link.cities) for link in state_service.iter_links())
+    )
+
+def play(state_service, results):
+    state_changer = StateChanger(state_service)
+    while not state_service.is_terminal():
+        active_player = state_service.get_active_player()
+        # Ветка-клон и откат не должны портить компоненты основной линии
+        branch = state_service.clone()
+        action = action_generator.sample_action(branch, active_player.color)
+        if action is None:
+            break
+        StateChanger(branch).apply_action(action, branch, branch.get_active_player())
+        results.append(check(branch))
+        action = action_generator.sample_action(state_service, active_player.color)
+        token = state_service.get_undo_token()
+        state_changer.apply_action(action, state_service, state_service.get_active_player())
+        results.append(check(state_service))
+        state_service.rollback(token)
+        results.append(check(state_service))
+        state_changer.apply_action(action, state_service, active_player)
+        results.append(check(state_service))
+
+results = []
+for seed in range(6):
+    random.seed(seed)
+    player_count = 2 + seed % 3
+    game = Game()
+    game.start(player_count, list(PlayerColor)[:player_count])
+    state_service = game.state_service
+    play(state_service, results)
+    linked = any(link.owner is not None for link in state_service.iter_links())
+    # Случайная партия упирается в конец раунда, поэтому эпоху меняем напрямую
+    StateChanger(state_service).turn_manager._prepare_next_era(state_service)
+    connectivity = state_service._get_connectivity()
+    results.append(linked and not any(connectivity.is_linked(city) for city in state_service.get_cities()))
+    play(state_service, results)
+    print(seed, all(results))
+
+print(f"{len(results)} checks, all equal {all(results)}")
+assert all(results)
+
+def network_actions(state_service, player):
+    # Связи текущей эпохи: касающиеся сети игрока и не касающиеся её
+    network = state_service.get_network_mask(player.color)
+    card_id = next(iter(player.hand))
+    touching, outside = [], []
+    for link in state_service.iter_links():
+        if link.owner is None and state_service.get_era() in link.type:
+            action = NetworkAction(link_id=link.id, card_id=card_id, resources_used=[])
+            (touching if state_service.get_link_mask(link.id) & network else outside).append(action)
+    return touching, outside
+
+# Проверка «связь должна касаться сети» раньше не срабатывала; теперь связь вне сети отклоняется
+random.seed(1)
+game = Game()
+game.start(2, list(PlayerColor)[:2])
+state_service = game.state_service
+validation_service = game.action_processor.validation_service
+outside_checked = 0
+while outside_checked < 20:
+    player = state_service.get_active_player()
+    if state_service.get_action_context() == ActionContext.MAIN and state_service.get_network_mask(player.color) != state_service._board_mask:
+        touching, outside = network_actions(state_service, player)
+        for action in outside:
+            result = validation_service.validate_action(action, state_service, player)
+            assert not result.is_valid and result.message == "Link not in player's network", (action, result)
+            outside_checked += 1
+        for action in touching:
+            result = validation_service.validate_action(action, state_service, player)
+            assert result.is_valid or result.message != "Link not in player's network", (action, result)
+        offered = {action.link_id for action in action_generator.get_action_space(state_service, player.color) if action.action == ActionType.NETWORK}
+        assert not offered & {action.link_id for action in outside}
+    action = action_generator.sample_action(state_service, player.color)
+    if action is None:
+        StateChanger(state_service).turn_manager._prepare_next_era(state_service)
+        continue
+    StateChanger(state_service).apply_action(action, state_service, player)
+print(f"{outside_checked} links outside the network rejected")
+
+random.seed(0)
+game = Game()
+game.start(4, list(PlayerColor)[:4])
+state_service = game.state_service
+for _ in range(60):
+    action = action_generator.sample_action(state_service, state_service.get_active_player().color)
+    StateChanger(state_service).apply_action(action, state_service, state_service.get_active_player())
+cities = list(state_service.get_cities())
+start = time.perf_counter()
+for _ in range(2000):
+    state_service.invalidate_connectivity_cache()
+    state_service.are_connected(cities[0], cities[-1])
+rebuild_time = time.perf_counter() - start
+start = time.perf_counter()
+for _ in range(2000):
+    state_service.are_connected(cities[0], cities[-1])
+query_time = time.perf_counter() - start
+print(f"rebuild and query {rebuild_time:.3f}s, query {query_time:.3f}s")
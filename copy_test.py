@@ -2,8 +2,7 @@ import time
 import json
 from copy import deepcopy
 from game.server.game_logic.game import Game
-from game.schema import PlayerColor
-from game.server.game_logic.services.fast_copy import CopyEngine
+from game.schema import PlayerColor, PlacedBuilding, IndustryType
 from pathlib import Path
 
 def compare_objects(obj1, obj2, path="root"):
@@ -55,14 +54,14 @@ def compare_objects(obj1, obj2, path="root"):
             return False
         return True
 
-def benchmark_copy(engine, state, num_iterations=1000):
+def benchmark_copy(state, num_iterations=1000):
     """Замеряет производительность разных методов копирования"""
     
-    # Тестируем fast_copy
-    print(f"Тестируем fast_copy ({num_iterations} итераций)...")
+    # Тестируем clone
+    print(f"Тестируем clone ({num_iterations} итераций)...")
     start_time = time.perf_counter()
     for i in range(num_iterations):
-        copy = engine.fast_copy(state)
+        copy = state.clone()
     fast_copy_time = time.perf_counter() - start_time
     
     # Тестируем стандартный deepcopy
@@ -75,28 +74,27 @@ def benchmark_copy(engine, state, num_iterations=1000):
     return fast_copy_time, deepcopy_time
 
 def main():
-    engine = CopyEngine()
     game = Game()
     colors = list(PlayerColor)
     game.start(4, colors) 
-    state = game.get_player_state(game.state_service.get_active_player().color)
+    state = game.state_service
     
     print("=== Тестирование корректности копирования ===")
     
-    # Тестируем fast_copy
-    state_fast_copy = engine.fast_copy(state)
-    print("fast_copy корректность:", compare_objects(state, state_fast_copy))
+    # Тестируем clone
+    state_fast_copy = state.clone()
+    print("clone корректность:", compare_objects(state.state, state_fast_copy.state))
     
     # Тестируем deepcopy для сравнения
     state_deepcopy = deepcopy(state)
-    print("deepcopy корректность:", compare_objects(state, state_deepcopy))
+    print("deepcopy корректность:", compare_objects(state.state, state_deepcopy.state))
     
     # Сравниваем JSON вывод
-    original_json = state.model_dump_json()
-    fast_copy_json = state_fast_copy.model_dump_json()
-    deepcopy_json = state_deepcopy.model_dump_json()
+    original_json = state.get_exposed_state().model_dump_json()
+    fast_copy_json = state_fast_copy.get_exposed_state().model_dump_json()
+    deepcopy_json = state_deepcopy.get_exposed_state().model_dump_json()
     
-    print("JSON оригинал == JSON fast_copy:", original_json == fast_copy_json)
+    print("JSON оригинал == JSON clone:", original_json == fast_copy_json)
     print("JSON оригинал == JSON deepcopy:", original_json == deepcopy_json)
     
     # Сохраняем в файлы для визуальной проверки
@@ -113,10 +111,10 @@ def main():
     
     # Замер производительности
     num_iterations = 1000
-    fast_time, deepcopy_time = benchmark_copy(engine, state, num_iterations)
+    fast_time, deepcopy_time = benchmark_copy(state, num_iterations)
     
     print(f"\nРезультаты производительности ({num_iterations} итераций):")
-    print(f"fast_copy: {fast_time:.4f} секунд")
+    print(f"clone: {fast_time:.4f} секунд")
     print(f"deepcopy: {deepcopy_time:.4f} секунд")
     
     if fast_time > 0:
@@ -124,7 +122,7 @@ def main():
         print(f"Ускорение: {speedup:.2f}x")
         
         if speedup > 1:
-            print(f"fast_copy быстрее в {speedup:.2f} раз")
+            print(f"clone быстрее в {speedup:.2f} раз")
         else:
             print(f"deepcopy быстрее в {1/speedup:.2f} раз")
     
@@ -132,18 +130,24 @@ def main():
     print("\n=== Тестирование независимости копий ===")
     
     # Изменяем что-то в копии и проверяем, что оригинал не изменился
-    original_color = state_fast_copy.your_color
-    # Временно изменяем цвет в копии
-    state_fast_copy.your_color = "MODIFIED_COLOR"
+    color = state.get_active_player().color
+    original_bank = state.get_player(color).bank
+    slot_id = next(slot.id for slot in state.iter_building_slots() if slot.building_placed is None)
+    state_fast_copy.add_bank(color, 100)
+    state_fast_copy.place_building(slot_id, PlacedBuilding.from_template(state_fast_copy.get_current_building(state_fast_copy.get_player(color), IndustryType.COAL), color, slot_id))
     
     # Проверяем, что оригинал не изменился
-    if state.your_color != "MODIFIED_COLOR":
-        print("✓ Копия независима от оригинала (fast_copy)")
+    if state.get_player(color).bank == original_bank and state.get_building_slot(slot_id).building_placed is None:
+        print("✓ Копия независима от оригинала (clone)")
     else:
         print("✗ Копия разделяет ссылки с оригиналом!")
     
-    # Восстанавливаем оригинальное значение
-    state_fast_copy.your_color = original_color
+    # Изменяем оригинал и проверяем, что копия не изменилась
+    state.add_bank(color, -1)
+    if state_fast_copy.get_player(color).bank == original_bank + 100:
+        print("✓ Оригинал независим от копии (clone)")
+    else:
+        print("✗ Оригинал разделяет ссылки с копией!")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
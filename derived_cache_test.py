@@ -0,0 +1,65 @@
+import random
+from game.server.game_logic.game import Game
+from game.server.game_logic.action_space_generator import ActionSpaceGenerator
+from game.server.game_logic.state_changer import StateChanger
+from game.server.game_logic.services.board_state_service import BoardStateService
+from game.schema import IndustryType, PlayerColor, ResourceType
+
+action_generator = ActionSpaceGenerator()
+
+def queries(state_service):
+    cities = list(state_service.get_cities())
+    calls = [('get_merchant_city_mask', ()), ('_get_merchant_reach', ()), ('_get_adjacency', ()), ('get_player_iron_sources', ())]
+    calls += [('get_network_mask', (color,)) for color in state_service.get_players()]
+    calls += [('get_industry_city_mask', (industry,)) for industry in (IndustryType.COAL, IndustryType.IRON, IndustryType.BREWERY)]
+    calls += [('get_resource_amount_in_city', (city, ResourceType.COAL)) for city in cities]
+    calls += [('get_coal_rings', (city,)) for city in cities]
+    calls += [('get_player_coal_sources', (city,)) for city in cities]
+    calls += [('get_link_component_mask', (link_id,)) for link_id in state_service.get_links()]
+    return calls
+
+def check(state_service):
+    # Кэшированный ответ должен совпадать с вычисленным заново
+    for name, args in queries(state_service):
+        if getattr(state_service, name)(*args) != getattr(BoardStateService, name).__wrapped__(state_service, *args):
+            print('stale', name, args)
+            return False
+    return True
+
+def play(state_service, results):
+    state_changer = StateChanger(state_service)
+    while not state_service.is_terminal():
+        active_player = state_service.get_active_player()
+        branch = state_service.clone()
+        action = action_generator.sample_action(branch, active_player.color)
+        if action is None:
+            break
+        StateChanger(branch).apply_action(action, branch, branch.get_active_player())
+        results.append(check(branch))
+        results.append(check(state_service))
+        action = action_generator.sample_action(state_service, active_player.color)
+        token = state_service.get_undo_token()
+        state_changer.apply_action(action, state_service, state_service.get_active_player())
+        results.append(check(state_service))
+        state_service.rollback(token)
+        results.append(check(state_service))
+        state_changer.apply_action(action, state_service, active_player)
+        results.append(check(state_service))
+
+results = []
+for seed in range(4):
+    random.seed(seed)
+    player_count = 2 + seed % 3
+    game = Game()
+    game.start(player_count, list(PlayerColor)[:player_count])
+    state_service = game.state_service
+    play(state_service, results)
+    # Случайная партия упирается в конец раунда, поэтому эпоху меняем напрямую
+    StateChanger(state_service).turn_manager._prepare_next_era(state_service)
+    results.append(check(state_service))
+    play(state_service, results)
+    print(seed, all(results))
+
+print(f"{len(results)} checks, all equal {all(results)}")
+for name, stats in sorted(state_service.get_cache_stats().items()):
+    print(f"{name}: hits {stats.hits}, misses {stats.misses}, hit rate {stats.hit_rate:.2f}")
@@ -2,8 +2,11 @@ from ...schema import PlayerState, Action
 from typing import List, Set, Optional
 from ...server.game_logic.game import Game
 from ...server.game_logic.action_space_generator import ActionSpaceGenerator
+from ...server.game_logic.action_space_cache import ActionSpaceCache
+from ...server.game_logic.action_codec import ActionCodec
 from ...server.game_logic.state_changer import StateChanger
 from ...server.game_logic.services.board_state_service import BoardStateService
+from ...server.game_logic.services.resource_tables import ResourceTables
 import random
 import math
 import logging
@@ -23,7 +26,7 @@ class Node:
         self.who_moved = who_moved
         
         # Track which actions we've explored (created children for)
-        self.explored_actions: Set[str] = set()
+        self.explored_actions: Set[int] = set()
         
         # Track action history for determinization
         if parent is not None and parent.action_history is not None:
@@ -45,9 +48,9 @@ class Node:
         return legal_action_hashes.issubset(self.explored_actions)
     
     @staticmethod
-    def _hash_action(action: Action) -> str:
-        """Create a hashable string representation of an action."""
-        return json.dumps(action.model_dump(), sort_keys=True)
+    def _hash_action(action: Action) -> int:
+        """Integer code of an action, unique over the static board."""
+        return ActionCodec.get().encode(action)
 
 
 class RandomActionSelector:
@@ -58,14 +61,20 @@ class RandomActionSelector:
             logging.error(f"COULDN'T FIND AN ACTION IN STATE {state.get_board_state().model_dump()}")
             return None
 
+    def sample_action(self, action_space_generator: ActionSpaceGenerator, state) -> Optional[Action]:
+        """Uniform pick without building the whole action space"""
+        return action_space_generator.sample_action(state, state.get_active_player().color, random)
+
 
 class MCTS:
     def __init__(self, simulations: int, exploration: float = 2.0, depth: int = 1000):
+        ResourceTables.warm_up()
         self.simulations = simulations
         self.exploration = exploration
         self.max_depth = depth
         self.action_selector = RandomActionSelector()
         self.action_space_generator = ActionSpaceGenerator()
+        self.action_space_cache = ActionSpaceCache(self.action_space_generator)
         self.root: Optional[Node] = None
 
     def search(self, state: PlayerState) -> Optional[Action]:
@@ -210,12 +219,10 @@ class MCTS:
             raise a
         
     def _get_legal_actions(self, state: BoardStateService) -> List[Action]:
-        """Get all legal actions for the active player in the given state."""
-        actions_list = self.action_space_generator.get_action_space(
-            state,
-            state.get_active_player().color
-        )
-        return actions_list
+        """Get legal actions for the active player, one per card-equivalence class."""
+        player = state.get_active_player()
+        actions_list = self.action_space_cache.get_action_space(state, player.color)
+        return [action for action, _ in self.action_space_generator.collapse_equivalent_cards(actions_list, player.hand)]
 
     def _simulate(self, node: Node, root_info_set: PlayerState) -> dict:
         """
@@ -225,11 +232,7 @@ class MCTS:
         
         depth = 0
         while depth < self.max_depth and not determinized_state.is_terminal():
-            legal_actions = self._get_legal_actions(determinized_state)
-            if not legal_actions:
-                break
-                
-            action = self.action_selector.select_action(legal_actions, determinized_state)
+            action = self.action_selector.sample_action(self.action_space_generator, determinized_state)
             if action is None:
                 break
                 
@@ -3,11 +3,13 @@ from typing import Dict, Optional, List, Set
 from enum import StrEnum
 from ...schema import Action, PlayerState, ActionType, PlayerColor
 from ...server.game_logic.services.board_state_service import BoardStateService
+from ...server.game_logic.services.resource_tables import ResourceTables
 from ...server.game_logic.action_space_generator import ActionSpaceGenerator
+from ...server.game_logic.action_space_cache import ActionSpaceCache
+from ...server.game_logic.action_codec import ActionCodec
 from ...server.game_logic.state_changer import StateChanger
 from ...server.game_logic.game import Game
 from copy import deepcopy
-import json
 import random
 import logging
 
@@ -35,7 +37,7 @@ class Node:
         self.who_moved = who_moved
 
         self.explored_action_types: Set[str] = set()
-        self.explored_actions: Set[str] = set()
+        self.explored_actions: Set[int] = set()
 
         if parent is not None and parent.action_history is not None:
             self.action_history = parent.action_history.copy()
@@ -60,8 +62,8 @@ class Node:
             return legal_action_hashes.issubset(self.explored_actions)
         
     @staticmethod
-    def _hash_action(action: Action) -> str:
-        return json.dumps(action.model_dump(), sort_keys=True)
+    def _hash_action(action: Action) -> int:
+        return ActionCodec.get().encode(action)
     
 
 class RandomActionSelector:
@@ -72,13 +74,19 @@ class RandomActionSelector:
             logging.error(f"COULDN'T FIND AN ACTION IN STATE {state.get_board_state().model_dump()}")
             return None
 
+    def sample_action(self, action_space_generator: ActionSpaceGenerator, state) -> Optional[Action]:
+        """Uniform pick without building the whole action space"""
+        return action_space_generator.sample_action(state, state.get_active_player().color, random)
+
 class HierarchicalMCTS:
     def __init__(self, simulations:int, exploration:float = 2.0, depth:int = 1000):
+        ResourceTables.warm_up()
         self.simulations = simulations
         self.exploration = exploration
         self.max_depth = depth
         self.action_selector = RandomActionSelector()
         self.action_space_generator = ActionSpaceGenerator()
+        self.action_space_cache = ActionSpaceCache(self.action_space_generator)
         self.root: Optional[Node] = None
 
     def _determinize_state(self, state:PlayerState, history:List[Action]=[]) -> BoardStateService:
@@ -86,7 +94,9 @@ class HierarchicalMCTS:
         return Game.from_partial_state(state_copy, history).state_service
 
     def _get_legal_actions(self, state:BoardStateService) -> List[Action]:
-        return self.action_space_generator.get_action_space(state, state.get_active_player().color)
+        player = state.get_active_player()
+        actions = self.action_space_cache.get_action_space(state, player.color)
+        return [action for action, _ in self.action_space_generator.collapse_equivalent_cards(actions, player.hand)]
 
     def _apply_action(self, state: BoardStateService, action: Action):
         active_player = state.get_active_player()
@@ -243,11 +253,7 @@ class HierarchicalMCTS:
 
         depth = 0
         while depth < self.max_depth and not determinized_state.is_terminal():
-            legal_actions = self._get_legal_actions(determinized_state)
-            if not legal_actions:
-                break
-
-            action = self.action_selector.select_action(legal_actions, determinized_state)
+            action = self.action_selector.sample_action(self.action_space_generator, determinized_state)
             if action is None:
                 break
 
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Literal, List, Union, Optional
+from typing import Annotated, Literal, List, Union, Optional
 from collections import defaultdict
 from .common import ActionType, ResourceSource, ResourceAmounts, ResourceType, IndustryType
 from enum import StrEnum
@@ -93,7 +93,10 @@ Action = Union[
 class RequestType(StrEnum):
     REQUEST_STATE = 'state'
     REQUEST_ACTIONS = 'actions'
+    VALIDATE_ACTIONS = 'validate'
     GOD_MODE = 'god_mode'
 
 class Request(BaseModel):
     request: RequestType
+    # Кандидаты для VALIDATE_ACTIONS
+    actions: List[Annotated[Action, Field(discriminator='action')]] = []
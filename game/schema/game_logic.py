@@ -1,7 +1,8 @@
-from dataclasses import dataclass, field
-from typing import Any, List, Optional, Dict, Set, ClassVar
+from dataclasses import dataclass, field, replace
+from typing import Any, List, Optional, Dict, Set, ClassVar, Tuple
 from enum import StrEnum
 from pydantic import BaseModel
+from pydantic_core import core_schema
 
 @dataclass(slots=True)
 class GameEntity:
@@ -60,14 +61,94 @@ class ResourceAmounts:
     beer: int = 0
     money: int = 0
     
+# Статическая разметка поля (id, города, варианты индустрий, концы связей) живёт в общих
+# неизменяемых записях BoardTopology; объекты партии хранят ссылку на запись и только изменяемые поля
+@dataclass(frozen=True, slots=True)
+class MerchantSlotTopology:
+    id: int
+    city: str
+
+@dataclass(frozen=True, slots=True)
+class SlotTopology:
+    id: int
+    city: str
+    industry_type_options: Tuple[IndustryType, ...]
+
+@dataclass(frozen=True, slots=True)
+class LinkTopology:
+    id: int
+    type: Tuple[LinkType, ...]
+    cities: Tuple[str, ...]
+
+@dataclass(frozen=True, slots=True)
+class CityTopology:
+    name: str
+    slot_ids: Tuple[int, ...]
+    is_merchant: bool
+    merchant_min_players: Optional[int]
+    merchant_slot_ids: Tuple[int, ...]
+
+# Записи, разобранные из JSON клиентом, сводятся к одному экземпляру на ключ, как карты
+_topology_table: Dict[tuple, Any] = {}
+
+def intern_topology(record):
+    key = (type(record), record.name if isinstance(record, CityTopology) else record.id)
+    canonical = _topology_table.get(key)
+    if canonical is None:
+        _topology_table[key] = record
+        return record
+    return canonical if canonical == record else record
+
+def _wire_schema(cls, wire, handler) -> core_schema.CoreSchema:
+    '''Validates and serializes an overlay entity in the shape of its wire dataclass'''
+    wire_schema = handler.generate_schema(wire)
+    return core_schema.union_schema(
+        [
+            core_schema.is_instance_schema(cls),
+            core_schema.no_info_after_validator_function(cls.from_wire, wire_schema)
+        ],
+        serialization=core_schema.plain_serializer_function_ser_schema(
+            lambda entity: entity.to_wire(),
+            return_schema=wire_schema
+        )
+    )
+
 @dataclass
-class MerchantSlot(GameEntity):
+class _MerchantSlotWire:
     id: int
     city: str
     merchant_type: MerchantType
     beer_available: bool = True
 
-@dataclass
+@dataclass(slots=True)
+class MerchantSlot(GameEntity):
+    topology: MerchantSlotTopology
+    merchant_type: MerchantType
+    beer_available: bool = True
+
+    @property
+    def id(self) -> int:
+        return self.topology.id
+
+    @property
+    def city(self) -> str:
+        return self.topology.city
+
+    def __deepcopy__(self, memo) -> 'MerchantSlot':
+        return MerchantSlot(self.topology, self.merchant_type, self.beer_available)
+
+    @classmethod
+    def from_wire(cls, wire: _MerchantSlotWire) -> 'MerchantSlot':
+        return cls(intern_topology(MerchantSlotTopology(wire.id, wire.city)), wire.merchant_type, wire.beer_available)
+
+    def to_wire(self) -> _MerchantSlotWire:
+        return _MerchantSlotWire(self.topology.id, self.topology.city, self.merchant_type, self.beer_available)
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler) -> core_schema.CoreSchema:
+        return _wire_schema(cls, _MerchantSlotWire, handler)
+
+@dataclass(slots=True)
 class Building(GameEntity):
     id: int
     industry_type: IndustryType
@@ -90,28 +171,224 @@ class Building(GameEntity):
     def is_sellable(self) -> bool:
         return self.industry_type in (IndustryType.BOX, IndustryType.COTTON, IndustryType.POTTERY)
 
+@dataclass(slots=True)
+class PlacedBuilding(GameEntity):
+    '''
+    Building on the board: only owner, slot, resources and flip state are per game,
+    everything else is read from the shared roster template.
+    Serializes to the same shape as Building.
+    '''
+    template: Building
+    owner: PlayerColor
+    slot_id: Optional[int] = None
+    resource_count: int = 0
+    flipped: bool = False
+
+    @classmethod
+    def from_template(cls, template: Building, owner: PlayerColor, slot_id: Optional[int]) -> 'PlacedBuilding':
+        return cls(template, owner, slot_id, template.resource_count, template.flipped)
+
+    @classmethod
+    def from_building(cls, building: Building) -> 'PlacedBuilding':
+        return cls(building, building.owner, building.slot_id, building.resource_count, building.flipped)
+
+    def as_building(self) -> Building:
+        return replace(self.template, owner=self.owner, slot_id=self.slot_id, resource_count=self.resource_count, flipped=self.flipped)
+
+    @property
+    def id(self) -> int:
+        return self.template.id
+
+    @property
+    def industry_type(self) -> IndustryType:
+        return self.template.industry_type
+
+    @property
+    def level(self) -> int:
+        return self.template.level
+
+    @property
+    def cost(self) -> ResourceAmounts:
+        return self.template.cost
+
+    @property
+    def victory_points(self) -> int:
+        return self.template.victory_points
+
+    @property
+    def sell_cost(self) -> Optional[int]:
+        return self.template.sell_cost
+
+    @property
+    def is_developable(self) -> bool:
+        return self.template.is_developable
+
+    @property
+    def link_victory_points(self) -> int:
+        return self.template.link_victory_points
+
+    @property
+    def era_exclusion(self) -> Optional[LinkType]:
+        return self.template.era_exclusion
+
+    @property
+    def income(self) -> int:
+        return self.template.income
+
+    def get_cost(self) -> ResourceAmounts:
+        return self.template.cost
+
+    def is_sellable(self) -> bool:
+        return self.template.is_sellable()
+
+    def __deepcopy__(self, memo) -> 'PlacedBuilding':
+        return PlacedBuilding(self.template, self.owner, self.slot_id, self.resource_count, self.flipped)
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler) -> core_schema.CoreSchema:
+        building_schema = handler.generate_schema(Building)
+        return core_schema.union_schema(
+            [
+                core_schema.is_instance_schema(cls),
+                core_schema.no_info_after_validator_function(cls.from_building, building_schema)
+            ],
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda building: building.as_building(),
+                return_schema=building_schema
+            )
+        )
+
 @dataclass
-class BuildingSlot(GameEntity):
+class _BuildingSlotWire:
     id: int
     city: str
     industry_type_options: List[IndustryType]
-    building_placed: Optional[Building] = None
+    building_placed: Optional[PlacedBuilding] = None
+
+@dataclass(slots=True)
+class BuildingSlot(GameEntity):
+    topology: SlotTopology
+    building_placed: Optional[PlacedBuilding] = None
+
+    @property
+    def id(self) -> int:
+        return self.topology.id
+
+    @property
+    def city(self) -> str:
+        return self.topology.city
+
+    @property
+    def industry_type_options(self) -> Tuple[IndustryType, ...]:
+        return self.topology.industry_type_options
+
+    def __deepcopy__(self, memo) -> 'BuildingSlot':
+        building = self.building_placed
+        return BuildingSlot(self.topology, building.__deepcopy__(memo) if building is not None else None)
+
+    @classmethod
+    def from_wire(cls, wire: _BuildingSlotWire) -> 'BuildingSlot':
+        return cls(intern_topology(SlotTopology(wire.id, wire.city, tuple(wire.industry_type_options))), wire.building_placed)
+
+    def to_wire(self) -> _BuildingSlotWire:
+        topology = self.topology
+        return _BuildingSlotWire(topology.id, topology.city, list(topology.industry_type_options), self.building_placed)
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler) -> core_schema.CoreSchema:
+        return _wire_schema(cls, _BuildingSlotWire, handler)
 
 @dataclass
-class Link(GameEntity):
+class _LinkWire:
     id: int
-    type: List[LinkType] 
+    type: List[LinkType]
     cities: List[str]
     owner: Optional[str]
 
+@dataclass(slots=True)
+class Link(GameEntity):
+    topology: LinkTopology
+    owner: Optional[str] = None
+
+    @property
+    def id(self) -> int:
+        return self.topology.id
+
+    @property
+    def type(self) -> Tuple[LinkType, ...]:
+        return self.topology.type
+
+    @property
+    def cities(self) -> Tuple[str, ...]:
+        return self.topology.cities
+
+    def __deepcopy__(self, memo) -> 'Link':
+        return Link(self.topology, self.owner)
+
+    @classmethod
+    def from_wire(cls, wire: _LinkWire) -> 'Link':
+        return cls(intern_topology(LinkTopology(wire.id, tuple(wire.type), tuple(wire.cities))), wire.owner)
+
+    def to_wire(self) -> _LinkWire:
+        topology = self.topology
+        return _LinkWire(topology.id, list(topology.type), list(topology.cities), self.owner)
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler) -> core_schema.CoreSchema:
+        return _wire_schema(cls, _LinkWire, handler)
+
 @dataclass
-class City(GameEntity):
+class _CityWire:
     name: str
-    slots: Dict[int, BuildingSlot]  
+    slots: Dict[int, BuildingSlot]
     is_merchant: bool
     merchant_slots: Optional[Dict[int, MerchantSlot]] = None
     merchant_min_players: Optional[int] = None
 
+@dataclass(slots=True)
+class City(GameEntity):
+    topology: CityTopology
+    slots: Dict[int, BuildingSlot]
+    merchant_slots: Optional[Dict[int, MerchantSlot]] = None
+
+    @property
+    def name(self) -> str:
+        return self.topology.name
+
+    @property
+    def is_merchant(self) -> bool:
+        return self.topology.is_merchant
+
+    @property
+    def merchant_min_players(self) -> Optional[int]:
+        return self.topology.merchant_min_players
+
+    def __deepcopy__(self, memo) -> 'City':
+        return City(
+            self.topology,
+            {slot_id: slot.__deepcopy__(memo) for slot_id, slot in self.slots.items()},
+            {mslot_id: mslot.__deepcopy__(memo) for mslot_id, mslot in self.merchant_slots.items()} if self.merchant_slots is not None else None
+        )
+
+    @classmethod
+    def from_wire(cls, wire: _CityWire) -> 'City':
+        topology = intern_topology(CityTopology(
+            wire.name,
+            tuple(wire.slots),
+            wire.is_merchant,
+            wire.merchant_min_players,
+            tuple(wire.merchant_slots) if wire.merchant_slots is not None else ()
+        ))
+        return cls(topology, wire.slots, wire.merchant_slots)
+
+    def to_wire(self) -> _CityWire:
+        topology = self.topology
+        return _CityWire(topology.name, self.slots, topology.is_merchant, self.merchant_slots, topology.merchant_min_players)
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler) -> core_schema.CoreSchema:
+        return _wire_schema(cls, _CityWire, handler)
+
 @dataclass
 class Market:
     coal_count: int = 0
@@ -119,16 +396,46 @@ class Market:
     coal_cost: int = 0
     iron_cost: int = 0
 
-@dataclass
+@dataclass(slots=True)
 class Card(GameEntity):
+    '''
+    Cards are interned by id: the table holds one canonical instance per card,
+    shared by decks, hands and parsed client states.
+    '''
     id: int
     card_type: CardType
     value: str
-    
+
+    MOCK_ID_BASE: ClassVar[int] = 100
+    _table: ClassVar[Dict[int, 'Card']] = {}
+
+    @classmethod
+    def intern(cls, card: 'Card') -> 'Card':
+        canonical = cls._table.get(card.id)
+        if canonical is None:
+            cls._table[card.id] = card
+            return card
+        # Карта с тем же id, но другим содержимым не подменяется каноничной
+        return canonical if canonical == card else card
+
     @classmethod
-    def mock(cls) -> 'Card':
-        import random
-        return Card(id=random.randint(100, 10**6), card_type=CardType.CITY, value='mock')
+    def get(cls, card_id: int) -> Optional['Card']:
+        return cls._table.get(card_id)
+
+    def __deepcopy__(self, memo) -> 'Card':
+        return self
+
+    @classmethod
+    def mock(cls, index: int = 0) -> 'Card':
+        '''Placeholder for an unknown card; distinct indexes give distinct ids'''
+        card = cls._table.get(cls.MOCK_ID_BASE + index)
+        if card is None:
+            card = cls.intern(Card(id=cls.MOCK_ID_BASE + index, card_type=CardType.CITY, value='mock'))
+        return card
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler) -> core_schema.CoreSchema:
+        return core_schema.no_info_after_validator_function(cls.intern, handler(source))
 
 class PlayerExposed(BaseModel):
     hand_size: int
@@ -142,7 +449,7 @@ class PlayerExposed(BaseModel):
     has_city_wild: bool = False
     has_industry_wild: bool = False
 
-@dataclass
+@dataclass(slots=True)
 class Player:
     hand: Dict[int, Card]
     available_buildings: Dict[IndustryType, int]
@@ -320,4 +627,7 @@ class StateRequestResult(RequestResult):
     result: PlayerState
 
 class ActionSpaceRequestResult(RequestResult):
-    result:List = []
\ No newline at end of file
+    result:List = []
+
+class ValidationRequestResult(RequestResult):
+    result: List[ValidationResult] = []
\ No newline at end of file
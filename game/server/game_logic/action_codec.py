@@ -0,0 +1,257 @@
+from bisect import bisect_right
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Type
+from ...schema import (
+    Action,
+    ActionType,
+    BuildAction,
+    CommitAction,
+    DevelopAction,
+    IndustryType,
+    LoanAction,
+    NetworkAction,
+    PassAction,
+    ResourceSource,
+    ResourceType,
+    ScoutAction,
+    SellAction,
+    ShortfallAction,
+)
+from .services.packed_state import BoardIndex
+from .services.resource_tables import ResourceTables
+
+
+class ActionCodec:
+    '''
+    Bijection between actions and integers over a fixed index space derived from the static board.
+    A code is head * resource_radix + sources: the head numbers the action type block and the
+    card, slot, link and industry digits inside it (0 stands for an absent field), the low part
+    holds the resource sources in order, one base-source_radix digit each.
+    Every field adds its own term to the code, so a group of actions is encoded by summing
+    the terms of its fixed fields and axes.
+    '''
+    _instance = None
+
+    ACTION_CLASSES: Mapping[ActionType, Type[Action]] = {
+        ActionType.BUILD: BuildAction,
+        ActionType.SELL: SellAction,
+        ActionType.LOAN: LoanAction,
+        ActionType.SCOUT: ScoutAction,
+        ActionType.DEVELOP: DevelopAction,
+        ActionType.NETWORK: NetworkAction,
+        ActionType.PASS: PassAction,
+        ActionType.SHORTFALL: ShortfallAction,
+        ActionType.COMMIT: CommitAction,
+    }
+    # Поля в порядке старшинства разрядов
+    FIELDS: Mapping[ActionType, Tuple[str, ...]] = {
+        ActionType.BUILD: ('card_id', 'slot_id', 'industry'),
+        ActionType.SELL: ('card_id', 'slot_id'),
+        ActionType.LOAN: ('card_id',),
+        ActionType.SCOUT: ('card_id',),
+        ActionType.DEVELOP: ('card_id', 'industry'),
+        ActionType.NETWORK: ('card_id', 'link_id'),
+        ActionType.PASS: ('card_id',),
+        ActionType.SHORTFALL: ('slot_id',),
+        ActionType.COMMIT: (),
+    }
+    SCOUT_CARDS = 3
+    RESOURCES = 'resources_used'
+
+    RESOURCE_TYPES: Tuple[ResourceType, ...] = tuple(ResourceType)
+    INDUSTRIES: Tuple[IndustryType, ...] = tuple(IndustryType)
+
+    @classmethod
+    def get(cls) -> 'ActionCodec':
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        index = BoardIndex.get()
+        tables = ResourceTables.get()
+        self.card_ids: Tuple[int, ...] = tuple(sorted(tables.cards_by_id))
+        self.card_pos: Dict[int, int] = {card_id: pos for pos, card_id in enumerate(self.card_ids)}
+        self.slot_ids = index.slot_ids
+        self.slot_pos = index.slot_pos
+        self.merchant_ids = index.merchant_ids
+        self.merchant_pos = index.merchant_pos
+        self.link_ids = index.link_ids
+        self.link_pos = index.link_pos
+        self.industry_pos: Dict[IndustryType, int] = {industry: pos for pos, industry in enumerate(self.INDUSTRIES)}
+
+        # Больше всего ресурсов за раз берут стройка, продажа и двойная железная дорога (уголь и пиво)
+        buildings = tables.buildings_by_id.values()
+        self.max_sources: int = max(
+            2,
+            max(building.cost.coal + building.cost.iron for building in buildings),
+            max(building.sell_cost or 0 for building in buildings),
+        )
+        # Источник: 0 - нет, иначе 1 + тип ресурса * места + место (рынок, слот здания, слот торговца)
+        self.places = 1 + len(self.slot_ids) + len(self.merchant_ids)
+        self.source_radix: int = 1 + len(self.RESOURCE_TYPES) * self.places
+        self.resource_radix: int = self.source_radix ** self.max_sources
+
+        card_radix = len(self.card_ids) + 1
+        radices = {
+            'card_id': card_radix,
+            'slot_id': len(self.slot_ids) + 1,
+            'link_id': len(self.link_ids) + 1,
+            'industry': len(self.INDUSTRIES) + 1,
+        }
+        self.action_types: Tuple[ActionType, ...] = tuple(self.FIELDS)
+        self.offsets: List[int] = []
+        self.radices: Dict[Tuple[ActionType, str], int] = {}
+        self.strides: Dict[Tuple[ActionType, str], int] = {}
+        size = 0
+        for action_type, fields in self.FIELDS.items():
+            self.offsets.append(size)
+            block = 1
+            for name in reversed(fields):
+                radix = card_radix ** self.SCOUT_CARDS if action_type == ActionType.SCOUT else radices[name]
+                self.radices[action_type, name] = radix
+                self.strides[action_type, name] = block
+                block *= radix
+            size += block
+        self.head_size: int = size
+        self.size: int = size * self.resource_radix
+        self._offset_by_type: Dict[ActionType, int] = dict(zip(self.action_types, self.offsets))
+
+    # --- Encoding ---
+    def encode(self, action: Action) -> int:
+        action_type = action.action
+        code = self._offset_by_type[action_type] * self.resource_radix
+        for name in self.FIELDS[action_type]:
+            code += self.field_code(action_type, name, getattr(action, name))
+        return code + self._encode_sources(getattr(action, self.RESOURCES, None))
+
+    def encode_fields(self, action_type: ActionType, fields: Mapping[str, Any]) -> int:
+        '''Code of the action given by its field values; fields that are left out count as absent'''
+        code = self._offset_by_type[action_type] * self.resource_radix
+        for name, value in fields.items():
+            code += self.field_code(action_type, name, value)
+        return code
+
+    def field_code(self, action_type: ActionType, name: str, value: Any) -> int:
+        '''Term that one field value adds to the code of an action of the given type'''
+        if name == self.RESOURCES:
+            return self._encode_sources(value)
+        if value is None:
+            return 0
+        if name not in self.FIELDS[action_type]:
+            raise ValueError(f"{action_type} action has no encoded field {name}")
+        if name == 'card_id':
+            digit = self._card_digit(value) if action_type != ActionType.SCOUT else self._scout_digit(value)
+        elif name == 'slot_id':
+            digit = self._digit(self.slot_pos, value, 'slot')
+        elif name == 'link_id':
+            digit = self._digit(self.link_pos, value, 'link')
+        else:
+            digit = self._digit(self.industry_pos, value, 'industry')
+        return digit * self.strides[action_type, name] * self.resource_radix
+
+    def type_head(self, action_type: ActionType) -> int:
+        '''First head index of the action type block'''
+        return self._offset_by_type[action_type]
+
+    def head_term(self, action_type: ActionType, name: str, value: Any) -> int:
+        '''Term that one field value adds to the head index; resource sources are not part of the head'''
+        if name == self.RESOURCES:
+            return 0
+        return self.field_code(action_type, name, value) // self.resource_radix
+
+    def split(self, code: int) -> Tuple[int, int]:
+        '''Head index (type, cards, slot, link, industry) and the resource sources part of a code'''
+        return divmod(code, self.resource_radix)
+
+    def _card_digit(self, card_id: int) -> int:
+        return self._digit(self.card_pos, card_id, 'card')
+
+    def _scout_digit(self, card_ids: List[int]) -> int:
+        if len(card_ids) != self.SCOUT_CARDS:
+            raise ValueError(f"Scout takes {self.SCOUT_CARDS} cards, got {len(card_ids)}")
+        digit = 0
+        for card_id in card_ids:
+            digit = digit * (len(self.card_ids) + 1) + self._card_digit(card_id)
+        return digit
+
+    @staticmethod
+    def _digit(positions: Mapping[Any, int], value: Any, what: str) -> int:
+        try:
+            return positions[value] + 1
+        except KeyError:
+            raise ValueError(f"Unknown {what} {value}") from None
+
+    def _encode_sources(self, sources: Optional[List[ResourceSource]]) -> int:
+        if not sources:
+            return 0
+        if len(sources) > self.max_sources:
+            raise ValueError(f"At most {self.max_sources} resource sources can be encoded, got {len(sources)}")
+        code = 0
+        for source in reversed(sources):
+            code = code * self.source_radix + self._source_digit(source)
+        return code
+
+    def _source_digit(self, source: ResourceSource) -> int:
+        if source.building_slot_id is not None:
+            place = self._digit(self.slot_pos, source.building_slot_id, 'slot')
+        elif source.merchant_slot_id is not None:
+            place = len(self.slot_ids) + self._digit(self.merchant_pos, source.merchant_slot_id, 'merchant slot')
+        else:
+            place = 0
+        return 1 + self.RESOURCE_TYPES.index(source.resource_type) * self.places + place
+
+    # --- Decoding ---
+    def decode(self, code: int) -> Action:
+        if not 0 <= code < self.size:
+            raise ValueError(f"Action code {code} out of range")
+        head, sources = self.split(code)
+        type_pos = bisect_right(self.offsets, head) - 1
+        action_type = self.action_types[type_pos]
+        rest = head - self.offsets[type_pos]
+        fields: Dict[str, Any] = {}
+        for name in self.FIELDS[action_type]:
+            digit = rest // self.strides[action_type, name] % self.radices[action_type, name]
+            if action_type == ActionType.SCOUT:
+                fields[name] = self._decode_scout(digit)
+            elif digit:
+                fields[name] = self._decode_field(name, digit - 1)
+        action_class = self.ACTION_CLASSES[action_type]
+        if self.RESOURCES in action_class.model_fields:
+            fields[self.RESOURCES] = self._decode_sources(sources)
+        elif sources:
+            raise ValueError(f"{action_type} action takes no resources")
+        return action_class(**fields)
+
+    def _decode_field(self, name: str, pos: int) -> Any:
+        if name == 'card_id':
+            return self.card_ids[pos]
+        if name == 'slot_id':
+            return self.slot_ids[pos]
+        if name == 'link_id':
+            return self.link_ids[pos]
+        return self.INDUSTRIES[pos]
+
+    def _decode_scout(self, digit: int) -> List[int]:
+        card_ids = []
+        for _ in range(self.SCOUT_CARDS):
+            digit, pos = divmod(digit, len(self.card_ids) + 1)
+            if not pos:
+                raise ValueError("Scout code is missing a card")
+            card_ids.append(self.card_ids[pos - 1])
+        card_ids.reverse()
+        return card_ids
+
+    def _decode_sources(self, code: int) -> List[ResourceSource]:
+        sources = []
+        while code:
+            code, digit = divmod(code, self.source_radix)
+            if not digit:
+                raise ValueError("Resource sources code has a gap")
+            resource, place = divmod(digit - 1, self.places)
+            source = {'resource_type': self.RESOURCE_TYPES[resource]}
+            if 0 < place <= len(self.slot_ids):
+                source['building_slot_id'] = self.slot_ids[place - 1]
+            elif place > len(self.slot_ids):
+                source['merchant_slot_id'] = self.merchant_ids[place - 1 - len(self.slot_ids)]
+            sources.append(ResourceSource(**source))
+        return sources
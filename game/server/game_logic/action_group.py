@@ -0,0 +1,84 @@
+from dataclasses import dataclass, field
+from itertools import product
+from math import prod
+from typing import Any, Dict, Iterator, Sequence, Type
+from ...schema import Action, ActionType
+from .action_codec import ActionCodec
+
+
+class ActionGroup:
+    '''
+    Block of legal actions of one class: fixed fields plus the cartesian product of the
+    choice axes, the first axis varying slowest. Actions are constructed only when the group
+    is iterated or indexed, so it can be counted and sampled without building the rest.
+    '''
+    __slots__ = ('action_class', 'fixed', 'axes')
+
+    def __init__(self, action_class: Type[Action], fixed: Dict[str, Any], axes: Dict[str, Sequence]):
+        self.action_class = action_class
+        self.fixed = fixed
+        self.axes = axes
+
+    @property
+    def action_type(self) -> ActionType:
+        return self.action_class.model_fields['action'].default
+
+    def __len__(self) -> int:
+        return prod(len(axis) for axis in self.axes.values())
+
+    def __getitem__(self, index: int) -> Action:
+        if not 0 <= index < len(self):
+            raise IndexError(f"Action index {index} out of range")
+        choice = {}
+        for name, axis in reversed(self.axes.items()):
+            index, pos = divmod(index, len(axis))
+            choice[name] = axis[pos]
+        return self.action_class(**self.fixed, **choice)
+
+    def count_by(self, name: str) -> Dict[Any, int]:
+        '''Number of actions in the group per value of a field; list values (scout cards) count per element'''
+        if name in self.fixed:
+            values, share = (self.fixed[name],), len(self)
+        elif name in self.axes and self.axes[name]:
+            values, share = self.axes[name], len(self) // len(self.axes[name])
+        else:
+            return {}
+        counts: Dict[Any, int] = {}
+        for value in values:
+            for key in (value if isinstance(value, list) else (value,)):
+                if key is not None:
+                    counts[key] = counts.get(key, 0) + share
+        return counts
+
+    def __iter__(self) -> Iterator[Action]:
+        names = tuple(self.axes)
+        for values in product(*self.axes.values()):
+            yield self.action_class(**self.fixed, **dict(zip(names, values)))
+
+    def iter_codes(self, codec: ActionCodec) -> Iterator[int]:
+        '''Codes of the actions in iteration order, without constructing them'''
+        action_type = self.action_type
+        base = codec.encode_fields(action_type, self.fixed)
+        axes = [[codec.field_code(action_type, name, value) for value in axis] for name, axis in self.axes.items()]
+        for terms in product(*axes):
+            yield base + sum(terms)
+
+
+@dataclass
+class ActionCounts:
+    '''Legal action counts of a position, split by action type and by the card, slot and link used'''
+    total: int = 0
+    by_type: Dict[ActionType, int] = field(default_factory=dict)
+    by_card: Dict[int, int] = field(default_factory=dict)
+    by_slot: Dict[int, int] = field(default_factory=dict)
+    by_link: Dict[int, int] = field(default_factory=dict)
+
+    def add(self, group: ActionGroup) -> None:
+        size = len(group)
+        if not size:
+            return
+        self.total += size
+        self.by_type[group.action_type] = self.by_type.get(group.action_type, 0) + size
+        for name, counts in (('card_id', self.by_card), ('slot_id', self.by_slot), ('link_id', self.by_link)):
+            for key, count in group.count_by(name).items():
+                counts[key] = counts.get(key, 0) + count
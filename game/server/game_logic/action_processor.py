@@ -1,21 +1,28 @@
 from .services.validation_service import ActionValidationService
 from .services.event_bus import EventBus
-from ...schema import BoardState, Action, PlayerColor, ActionProcessResult, Request, RequestType, RequestResult, PlayerState, ActionSpaceRequestResult
+from ...schema import BoardState, Action, PlayerColor, ActionProcessResult, Request, RequestType, RequestResult, PlayerState, ActionSpaceRequestResult, ValidationRequestResult, ValidationResult
 from .state_changer import StateChanger
 from .action_space_generator import ActionSpaceGenerator
+from .action_space_cache import ActionSpaceCache
 from .action_cat_provider import ActionsCatProvider
 from .services.board_state_service import BoardStateService
+import logging
+import random
 
 
 class ActionProcessor():
-
-    def __init__(self, state_service:BoardStateService, event_bus:EventBus=None):
+    def __init__(self, state_service:BoardStateService, event_bus:EventBus=None, trusted_check_rate:float=0.0):
         self.state_service = state_service
         self.validation_service = ActionValidationService(event_bus)
         self.state_changer = StateChanger(state_service, event_bus)
         self.action_space_generator = ActionSpaceGenerator()
+        self.action_space_cache = ActionSpaceCache(self.action_space_generator)
         self.event_bus = event_bus
         self.ac_provider = ActionsCatProvider()
+        # Доля доверенных действий, которые всё равно проходят валидацию; по умолчанию перепроверки нет
+        self.trusted_check_rate = trusted_check_rate
+        # Своя последовательность, чтобы выборка перепроверок не сдвигала случайность партии
+        self.trusted_check_rng = random.Random()
 
     def process_incoming_message(self, message, color:PlayerColor):
         if isinstance(message, Request):
@@ -33,15 +40,38 @@ class ActionProcessor():
                 your_hand=self.state_service.get_player(color).hand
             )
         elif request.request is RequestType.REQUEST_ACTIONS:
-            actions = self.action_space_generator.get_action_space(self.state_service, color)
+            actions = self.action_space_cache.get_action_space(self.state_service, color)
             return ActionSpaceRequestResult(
                 success=True,
                 result=actions
             )
+        elif request.request is RequestType.VALIDATE_ACTIONS:
+            if not self.state_service.is_player_to_move(color):
+                results = [ValidationResult(is_valid=False, message=f"Current turn is {self.state_service.get_active_player().color}") for _ in request.actions]
+            else:
+                results = self.validation_service.validate_many(request.actions, self.state_service, self.state_service.get_player(color))
+            return ValidationRequestResult(
+                success=True,
+                result=results
+            )
         elif request.request is RequestType.GOD_MODE:
             return self.state_service.get_board_state()
 
-    def _process_action(self, action: Action, color: PlayerColor) -> ActionProcessResult:
+    def process_trusted_action(self, action: Action, color: PlayerColor, fingerprint: int) -> ActionProcessResult:
+        '''
+        Applies an action produced by ActionSpaceGenerator without running the validators.
+        The fingerprint is BoardStateService.get_view_hash(color) of the state the action was
+        generated from; an action generated from any other state is validated as usual.
+        A share of trusted actions (trusted_check_rate) is still validated as a cross-check.
+        '''
+        trusted = fingerprint == self.state_service.get_view_hash(color)
+        checked = trusted and self.trusted_check_rng.random() < self.trusted_check_rate
+        result = self._process_action(action, color, validate=not trusted or checked)
+        if checked and not result.processed:
+            logging.error(f"Trusted action {action} failed the cross-check: {result.message}")
+        return result
+
+    def _process_action(self, action: Action, color: PlayerColor, validate: bool = True) -> ActionProcessResult:
         # Проверяем, может ли игрок делать ход
         if not self.state_service.is_player_to_move(color):
             return ActionProcessResult(
@@ -55,8 +85,8 @@ class ActionProcessor():
             )
 
         player = self.state_service.get_player(color)
-        validation = self.validation_service.validate_action(action, self.state_service, player)
-        if not validation.is_valid:
+        validation = self.validation_service.validate_action(action, self.state_service, player) if validate else None
+        if validation is not None and not validation.is_valid:
             return ActionProcessResult(
                 processed=False,
                 message=validation.message,
@@ -0,0 +1,107 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Mapping, Tuple
+from ...schema import Action, PlayerColor
+from .action_space_generator import ActionSpaceGenerator
+from .services.board_state_service import BoardStateService
+from .services.packed_state import BoardIndex
+from .services.zobrist import ZobristHasher
+
+
+class ActionSpaceCache:
+    '''
+    LRU cache in front of ActionSpaceGenerator.get_action_space.
+    Whole action spaces are keyed by the Zobrist state key and the player. On a miss every
+    action class is looked up separately, keyed by the fingerprint of the state aspects it
+    reads, so a change to the market or to one player's hand only regenerates the classes
+    that depend on it. Stale entries are never reused and simply age out.
+    '''
+    ERA = 'era'
+    CONTEXT = 'context'
+    SUBACTION = 'subaction'
+    MARKET = 'market'
+    LINKS = 'links'
+    CITIES = 'cities'
+    PLAYER = 'player'
+
+    # Аспекты состояния, от которых зависят действия каждого класса
+    DEPENDENCIES: Mapping[str, Tuple[str, ...]] = {
+        'BuildAction': (ERA, MARKET, LINKS, CITIES, PLAYER),
+        'SellAction': (SUBACTION, LINKS, CITIES, PLAYER),
+        'NetworkAction': (ERA, SUBACTION, MARKET, LINKS, CITIES, PLAYER),
+        'DevelopAction': (CONTEXT, SUBACTION, MARKET, CITIES, PLAYER),
+        'ScoutAction': (PLAYER,),
+        'LoanAction': (PLAYER,),
+        'PassAction': (PLAYER,),
+        'CommitAction': (SUBACTION,),
+        'ShortfallAction': (CITIES,),
+    }
+
+    def __init__(self, generator: ActionSpaceGenerator, maxsize: int = 4096):
+        self.generator = generator
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._city_aspects = tuple(ZobristHasher.city_aspect(name) for name in BoardIndex.get().city_names)
+
+    def get_action_space(self, state_service: BoardStateService, color: PlayerColor) -> List[Action]:
+        key = ('space', state_service.get_state_hash(), color)
+        actions = self._get(key)
+        if actions is None:
+            self.misses += 1
+            actions = self._build(state_service, color)
+            self._put(key, actions)
+        else:
+            self.hits += 1
+        return list(actions)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def _build(self, state_service: BoardStateService, color: PlayerColor) -> Tuple[Action, ...]:
+        player = state_service.get_player(color)
+        aspects = self._aspect_getters(state_service, color)
+        fingerprint: Dict[str, Hashable] = {}
+        actions = []
+        for action_class in self.generator.cat_getter.get_expected_params(state_service):
+            dependencies = self.DEPENDENCIES[action_class]
+            for dependency in dependencies:
+                if dependency not in fingerprint:
+                    fingerprint[dependency] = aspects[dependency]()
+            key = (action_class, color) + tuple(fingerprint[dependency] for dependency in dependencies)
+            class_actions = self._get(key)
+            if class_actions is None:
+                class_actions = tuple(
+                    action
+                    for group in self.generator.iter_type_groups(state_service, player, action_class)
+                    for action in group
+                )
+                self._put(key, class_actions)
+            actions.extend(class_actions)
+        return tuple(actions)
+
+    def _aspect_getters(self, state_service: BoardStateService, color: PlayerColor) -> Dict[str, Callable[[], Hashable]]:
+        return {
+            self.ERA: state_service.get_era,
+            self.CONTEXT: state_service.get_action_context,
+            self.SUBACTION: lambda: state_service.subaction_count,
+            self.MARKET: lambda: state_service.get_aspect_hash(ZobristHasher.MARKET),
+            self.LINKS: lambda: state_service.get_aspect_hash(ZobristHasher.LINKS),
+            self.CITIES: lambda: tuple(state_service.get_aspect_hash(aspect) for aspect in self._city_aspects),
+            self.PLAYER: lambda: state_service.get_aspect_hash(ZobristHasher.player_aspect(color)),
+        }
+
+    # --- LRU ---
+    def _get(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _put(self, key: tuple, value: Tuple[Action, ...]) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
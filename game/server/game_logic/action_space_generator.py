@@ -19,12 +19,19 @@ from ...schema import (
     MerchantType,
     LinkType,
     CommitAction,
+    Card,
 )
-from typing import List
-from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+from collections import Counter, defaultdict
+from math import comb, prod
 import itertools
+import random
+import numpy as np
 from .action_cat_provider import ActionsCatProvider
+from .action_codec import ActionCodec
+from .action_group import ActionCounts, ActionGroup
 from .services.board_state_service import BoardStateService
+from .services.board_topology import BoardTopology
 
 
 class ActionSpaceGenerator():
@@ -32,49 +39,156 @@ class ActionSpaceGenerator():
         self.cat_getter = ActionsCatProvider()
 
     def get_action_space(self, state_service:BoardStateService, color:PlayerColor) -> List[Action]:
+        return list(self.iter_action_space(state_service, color))
+
+    def iter_action_space(self, state_service:BoardStateService, color:PlayerColor) -> Iterator[Action]:
+        for group in self.iter_action_groups(state_service, color):
+            yield from group
+
+    def iter_encoded_action_space(self, state_service:BoardStateService, color:PlayerColor) -> Iterator[int]:
+        '''Legal actions as ActionCodec codes, in the order of get_action_space'''
+        codec = ActionCodec.get()
+        for group in self.iter_action_groups(state_service, color):
+            yield from group.iter_codes(codec)
+
+    def get_canonical_action_space(self, state_service:BoardStateService, color:PlayerColor) -> List[Tuple[Action, int]]:
+        '''One action per distinct outcome, with the number of legal actions it stands for'''
+        actions = self.get_action_space(state_service, color)
+        return self.collapse_equivalent_cards(actions, state_service.get_player(color).hand)
+
+    def collapse_equivalent_cards(self, actions:List[Action], hand:Dict[int, Card]) -> List[Tuple[Action, int]]:
+        '''
+        Cards of the same type and value leave the same options for the rest of the game, so
+        actions that differ only in which of them is spent have one outcome. Of those the action
+        spending the lowest card ids is kept, paired with the count of actions it replaces.
+        Wild cards differ in value from every other card and are never merged with them.
+        '''
+        classes = self._card_classes(hand)
+        out = []
+        for action in actions:
+            card_id = action.card_id
+            if card_id is None:
+                out.append((action, 1))
+            elif isinstance(card_id, list):
+                used = Counter(classes[c] for c in card_id)
+                if sorted(card_id) != sorted(c for ids, count in used.items() for c in ids[:count]):
+                    continue
+                out.append((action, prod(comb(len(ids), count) for ids, count in used.items())))
+            elif classes[card_id][0] == card_id:
+                out.append((action, len(classes[card_id])))
+        return out
+
+    @staticmethod
+    def _card_classes(hand:Dict[int, Card]) -> Dict[int, Tuple[int, ...]]:
+        '''Card id -> ids of the interchangeable cards in hand, ascending'''
+        by_kind: dict = {}
+        for card in hand.values():
+            by_kind.setdefault((card.card_type, card.value), []).append(card.id)
+        classes = {}
+        for ids in by_kind.values():
+            ids = tuple(sorted(ids))
+            for card_id in ids:
+                classes[card_id] = ids
+        return classes
+
+    def iter_action_groups(self, state_service:BoardStateService, color:PlayerColor) -> Iterator[ActionGroup]:
+        '''Legal actions as lazily built groups, in the order of get_action_space'''
         player = state_service.get_player(color)
         valid_action_types = self.cat_getter.get_expected_params(state_service)
-        out = []
         for action in valid_action_types:
-            match action:
-                case "BuildAction":
-                    out.extend(self.get_valid_build_actions(state_service, player))
-                case "SellAction":
-                    out.extend(self.get_valid_sell_actions(state_service, player))
-                case "NetworkAction":
-                    out.extend(self.get_valid_network_actions(state_service, player))
-                case "DevelopAction":
-                    out.extend(self.get_valid_develop_actions(state_service, player, gloucester=state_service.get_action_context() == ActionContext.GLOUCESTER_DEVELOP))
-                case "ScoutAction":
-                    out.extend(self.get_valid_scout_actions(player))
-                case "LoanAction":
-                    out.extend(self.get_valid_loan_actions(player))
-                case "PassAction":
-                    out.extend(self.get_valid_pass_actions(player))
-                case "CommitAction":
-                    out.extend(self.get_valid_commit_actions(state_service))
-                case "ShortfallAction":
-                    out.extend(self.get_valid_shortfall_actions(state_service, player))
-        return out
+            yield from self.iter_type_groups(state_service, player, action)
+
+    def iter_type_groups(self, state_service:BoardStateService, player:Player, action:str) -> Iterator[ActionGroup]:
+        '''Legal action groups of one action class, named as in ActionsCatProvider'''
+        match action:
+            case "BuildAction":
+                yield from self._build_groups(state_service, player)
+            case "SellAction":
+                yield from self._sell_groups(state_service, player)
+            case "NetworkAction":
+                yield from self._network_groups(state_service, player)
+            case "DevelopAction":
+                yield from self._develop_groups(state_service, player, gloucester=state_service.get_action_context() == ActionContext.GLOUCESTER_DEVELOP)
+            case "ScoutAction":
+                yield from self._scout_groups(player)
+            case "LoanAction":
+                yield from self._loan_groups(player)
+            case "PassAction":
+                yield from self._pass_groups(player)
+            case "CommitAction":
+                yield from self._commit_groups(state_service)
+            case "ShortfallAction":
+                yield from self._shortfall_groups(state_service, player)
+
+    def legal_mask(self, state_service:BoardStateService, color:PlayerColor):
+        '''
+        Boolean vector over the ActionCodec head index space (type, cards, slot, link, industry):
+        True where at least one legal action has that head. Heads of each action group are
+        the outer sum of the terms of its axes, so nothing is constructed per action.
+        '''
+        codec = ActionCodec.get()
+        mask = np.zeros(codec.head_size, dtype=bool)
+        for group in self.iter_action_groups(state_service, color):
+            if not len(group):
+                continue
+            action_type = group.action_type
+            head = codec.type_head(action_type) + sum(codec.head_term(action_type, name, value) for name, value in group.fixed.items())
+            heads = np.array([head], dtype=np.int64)
+            for name, axis in group.axes.items():
+                if name == codec.RESOURCES:
+                    continue
+                terms = np.fromiter((codec.head_term(action_type, name, value) for value in axis), dtype=np.int64, count=len(axis))
+                heads = np.add.outer(heads, terms).ravel()
+            mask[heads] = True
+        return mask
+
+    def count_actions(self, state_service:BoardStateService, color:PlayerColor) -> ActionCounts:
+        '''Sizes of the action space without constructing any action'''
+        counts = ActionCounts()
+        for group in self.iter_action_groups(state_service, color):
+            counts.add(group)
+        return counts
+
+    def sample_action(self, state_service:BoardStateService, color:PlayerColor, rng=random) -> Optional[Action]:
+        '''Uniformly random legal action; only the chosen one is constructed'''
+        groups = []
+        total = 0
+        for group in self.iter_action_groups(state_service, color):
+            size = len(group)
+            if size:
+                groups.append((group, size))
+                total += size
+        if not total:
+            return None
+        index = rng.randrange(total)
+        for group, size in groups:
+            if index < size:
+                return group[index]
+            index -= size
 
     def get_valid_build_actions(self, state_service: BoardStateService, player: Player) -> List[BuildAction]:
-        out: List[BuildAction] = []
-        append_out = out.append
+        return [action for group in self._build_groups(state_service, player) for action in group]
 
+    def _build_groups(self, state_service: BoardStateService, player: Player) -> Iterator[ActionGroup]:
         cards = player.hand.values()
 
-        # Собираем доступные для строительства или перестройки слоты по городам
-        slots_by_city: dict = {}
+        # Занятые слоты по городам: слот -> индустрия, которой его можно перестроить, или None, если нельзя
+        # None вместо словаря - в городе строить нельзя вовсе
         state = state_service.get_board_state()
-        for city in state.cities.values():
-            city_slots = city.slots.values()
-            buildings_in_city = [s.building_placed for s in city_slots if s.building_placed is not None]
-            if state_service.get_era() == LinkType.CANAL and any(b.owner == player.color for b in buildings_in_city): # check for 1 building per city per player in canal era
-                slots_by_city[city.name] = []
+        topology = BoardTopology.get(len(state.players))
+        canal = state_service.get_era() == LinkType.CANAL
+        blocked_by_city: dict = {}
+        for city_name, city_topology in topology.cities.items():
+            city_buildings = state_service.get_city_buildings(city_name)
+            if canal and any(b.owner == player.color for b in city_buildings.values()): # check for 1 building per city per player in canal era
+                blocked_by_city[city_name] = None
                 continue
-            for slot in city_slots:
-                if (slot.building_placed is None or self._overbuildable(slot.building_placed, player, state_service)):
-                    slots_by_city.setdefault(slot.city, []).append(slot)
+            blocked = {
+                slot_id: building.industry_type if self._overbuildable(building, player, state_service) else None
+                for slot_id, building in city_buildings.items()
+            }
+            if sum(industry is None for industry in blocked.values()) < len(city_topology.slot_ids):
+                blocked_by_city[city_name] = blocked
 
         industries = list(IndustryType)
 
@@ -137,28 +251,23 @@ class ActionSpaceGenerator():
             coal_data_cache[city_name] = data
             return data
 
-        # Предрасчет приоритета слотов по отраслям в каждом городе (min-слоты для индустрии)
-        allowed_slots_per_city_industry: dict = {}
-        for city_name, city in state.cities.items():
-            
-            # min len per industry
-            local_min = {}
-            for industry in IndustryType:
-                for slot in slots_by_city.get(city_name, []):
-                    if industry in slot.industry_type_options:
-                        if len(slot.industry_type_options) < local_min.get(industry, 10**9):
-                            local_min[industry] = len(slot.industry_type_options)
-
-            # allowed slots set per industry (only slots with minimal options_len for that industry)
-            per_industry = {ind: [] for ind in IndustryType}
-            for slot in slots_by_city.get(city_name, []):
-                options_len = len(slot.industry_type_options)
-                for ind in slot.industry_type_options:
-                    if local_min.get(ind, 10**9) == options_len:
-                        per_industry[ind].append(slot)
-                
-            allowed_slots_per_city_industry[city_name] = per_industry
-        
+        # Приоритет слотов статичен: индустрия занимает слоты первого яруса, где есть свободное место
+        allowed_slots_cache: dict = {}
+
+        def get_allowed_slots(city_name: str, industry: IndustryType, blocked: dict) -> List[int]:
+            key = (city_name, industry)
+            cached = allowed_slots_cache.get(key)
+            if cached is not None:
+                return cached
+            allowed = []
+            for tier in topology.slot_priority[city_name][industry]:
+                # Занятый слот доступен, только если его можно перестроить зданием той же индустрии
+                allowed = [slot_id for slot_id in tier if blocked.get(slot_id, industry) == industry]
+                if allowed:
+                    break
+            allowed_slots_cache[key] = allowed
+            return allowed
+
         allowed_industry_for_card: dict = {}
         for card in cards:
             if card.card_type == CardType.CITY:
@@ -263,11 +372,10 @@ class ActionSpaceGenerator():
 
             return True, market_coal_count, market_iron_count
 
-        # Основные циклы: по картам → индустриям → городам/слотам
-        # кэши для комбо и рыночных стоимостей
+        # Основные циклы: по картам → индустриям → городам; слоты и комбинации ресурсов - оси группы
+        # кэши для комбо ресурсов
         resource_combo_cache: dict = {}
-        coal_cost_cache: dict[int, int] = {}
-        iron_cost_cache: dict[int, int] = {}
+        affordable_cache: dict = {}
         calculate_coal_cost = state_service.calculate_coal_cost
         calculate_iron_cost = state_service.calculate_iron_cost
         player_bank = player.bank
@@ -276,9 +384,10 @@ class ActionSpaceGenerator():
             # Допустимые города для карты
             if card.card_type == CardType.CITY:
                 if card.value == 'wild':
-                    valid_cities = set(slots_by_city.keys())
+                    # Городской джокер не действует на фермерские пивоварни
+                    valid_cities = tuple(city_name for city_name in blocked_by_city if 'brewery' not in city_name)
                 else:
-                    valid_cities = {card.value} if card.value in slots_by_city else set()
+                    valid_cities = (card.value,) if card.value in blocked_by_city else ()
             else:
                 valid_cities = network
 
@@ -307,17 +416,17 @@ class ActionSpaceGenerator():
                 iron_required = cost.iron
 
                 for city_name in valid_cities:
-                    city_slots = slots_by_city.get(city_name)
-                    if not city_slots:
+                    blocked = blocked_by_city.get(city_name)
+                    if blocked is None:
                         continue
 
-                    coal_data = get_coal_data_for_city(city_name)
-
                     # Только слоты, допускаемые правилом приоритета для данной индустрии
-                    allowed_slots = allowed_slots_per_city_industry[city_name].get(industry, [])
-                    if not allowed_slots:
+                    slot_ids = get_allowed_slots(city_name, industry, blocked)
+                    if not slot_ids:
                         continue
 
+                    coal_data = get_coal_data_for_city(city_name)
+
                     # подготовить валидные комбинации ресурсов для города и требований
                     cache_key = (city_name, coal_required, iron_required)
                     combos = resource_combo_cache.get(cache_key)
@@ -332,34 +441,25 @@ class ActionSpaceGenerator():
                             combos.append((coal_comb, iron_comb, market_coal_count, market_iron_count))
                         resource_combo_cache[cache_key] = combos
 
-                    for slot in allowed_slots:
-                        # индустрия должна поддерживаться слотом
-                        if industry not in slot.industry_type_options:
-                            continue 
-
-                        # Комбинации ресурсов и валидация
+                    # Комбинации, на которые хватает денег, зависят только от стоимости здания
+                    affordable_key = (cache_key, base_money)
+                    affordable = affordable_cache.get(affordable_key)
+                    if affordable is None:
+                        affordable = []
                         for coal_comb, iron_comb, market_coal_count, market_iron_count in combos:
-                            coal_cost = coal_cost_cache.get(market_coal_count)
-                            if coal_cost is None:
-                                coal_cost = calculate_coal_cost(market_coal_count) if market_coal_count else 0
-                                coal_cost_cache[market_coal_count] = coal_cost
-                            iron_cost = iron_cost_cache.get(market_iron_count)
-                            if iron_cost is None:
-                                iron_cost = calculate_iron_cost(market_iron_count) if market_iron_count else 0
-                                iron_cost_cache[market_iron_count] = iron_cost
-                            total = base_money + coal_cost + iron_cost
+                            total = base_money + calculate_coal_cost(market_coal_count) + calculate_iron_cost(market_iron_count)
                             if player_bank < total:
                                 continue
+                            affordable.append(list(coal_comb) + list(iron_comb))
+                        affordable_cache[affordable_key] = affordable
+                    if not affordable:
+                        continue
 
-                            resources_used = list(coal_comb) + list(iron_comb)
-                            append_out(BuildAction(
-                                slot_id=slot.id,
-                                card_id=card.id,
-                                industry=industry,
-                                resources_used=resources_used
-                            ))
-
-        return out
+                    yield ActionGroup(
+                        BuildAction,
+                        {'card_id': card.id, 'industry': industry},
+                        {'slot_id': slot_ids, 'resources_used': affordable}
+                    )
     
     def _overbuildable(self, to_overbuild: Building, player: Player, state_service: BoardStateService) -> bool:
         # Проверяем уровень здания
@@ -383,35 +483,27 @@ class ActionSpaceGenerator():
             }
             if resource_checks.get(to_overbuild.industry_type, 0) > 0:
                 return False
+            # ...и на поле тоже не должно остаться ни одного кубика
+            if state_service.get_stocked_buildings(to_overbuild.industry_type):
+                return False
 
         return True
 
     def get_valid_sell_actions(self, state_service:BoardStateService, player:Player) -> List[SellAction]:
-        out = []
-        cards = player.hand
+        return [action for group in self._sell_groups(state_service, player) for action in group]
+
+    def _sell_groups(self, state_service:BoardStateService, player:Player) -> Iterator[ActionGroup]:
+        cards = list(player.hand)
         slots = [
-                slot 
-                for city in state_service.get_cities().values() 
-                for slot in city.slots.values() 
-                if slot.building_placed is not None and slot.building_placed.is_sellable() and slot.building_placed.owner == player.color
-            ] 
-
-        # Предрасчет купцов с пивом, доступных из города
-        connected_merchant_beer_by_city: dict[str, list[ResourceSource]] = {}
-        for city in state_service.get_cities().values():
-            city_name = city.name
-            sources: list[ResourceSource] = []
-            for s in state_service.iter_merchant_slots():
-                if not s.beer_available:
-                    continue
-                if not state_service.are_connected(city_name, s.city):
-                    continue
-                # тип соответствия проверим позже по индустрии строения
-                sources.append(ResourceSource(resource_type=ResourceType.BEER, merchant_slot_id=s.id))
-            connected_merchant_beer_by_city[city_name] = sources
+            state_service.get_building_slot(building.slot_id)
+            for building in state_service.get_buildings_by_owner(player.color)
+            if building.is_sellable()
+        ]
 
         for slot in slots:
-            if not state_service.can_sell(slot.city, slot.building_placed.industry_type):
+            # Купцы считаются один раз на компоненту связности
+            merchants = state_service.get_merchant_reach(slot.city)
+            if not merchants.accepts(slot.building_placed.industry_type):
                 continue
 
             beer_required = slot.building_placed.sell_cost
@@ -424,14 +516,12 @@ class ActionSpaceGenerator():
                 beer_buildings = state_service.get_player_beer_sources(player.color, city_name=slot.city)
                 beer_sources = [ResourceSource(resource_type=ResourceType.BEER, building_slot_id=building.slot_id) for building in beer_buildings]
                 # купцы: тип соответствует индустрии ИЛИ ANY
-                merchant_sources = []
-                for src in connected_merchant_beer_by_city.get(slot.city, []):
-                    s = state_service.get_merchant_slot(src.merchant_slot_id)
-                    if s.merchant_type == MerchantType.ANY or s.merchant_type == MerchantType(slot.building_placed.industry_type):
-                        merchant_sources.append(src)
-                beer_sources.extend(merchant_sources)
+                for merchant_slot_id, merchant_type in merchants.beer:
+                    if merchant_type == MerchantType.ANY or merchant_type == MerchantType(slot.building_placed.industry_type):
+                        beer_sources.append(ResourceSource(resource_type=ResourceType.BEER, merchant_slot_id=merchant_slot_id))
                 beer_amounts = {b.slot_id: b.resource_count for b in beer_buildings}
                 beer_combinations = itertools.combinations_with_replacement(beer_sources, beer_required)
+            valid_combos = []
             for beer_combo in beer_combinations:
                 beer_used = defaultdict(int)
                 merchant_beer_used = False
@@ -450,38 +540,31 @@ class ActionSpaceGenerator():
                 
                 if not valid:
                     continue
+                valid_combos.append(beer_combo)
 
-                if state_service.subaction_count > 0:
-                    out.append(SellAction(
-                        slot_id=slot.id,
-                        resources_used=beer_combo))
-                else:
-                    for card in cards:
-                        out.append(SellAction(
-                            slot_id=slot.id,
-                            resources_used=beer_combo,
-                            card_id=card
-                        ))
-
-        return out
+            if state_service.subaction_count > 0:
+                yield ActionGroup(SellAction, {'slot_id': slot.id}, {'resources_used': valid_combos})
+            else:
+                yield ActionGroup(SellAction, {'slot_id': slot.id}, {'resources_used': valid_combos, 'card_id': cards})
         
     def get_valid_network_actions(self, state_service:BoardStateService, player:Player) -> List[NetworkAction]:
-        out = []
+        return [action for group in self._network_groups(state_service, player) for action in group]
+
+    def _network_groups(self, state_service:BoardStateService, player:Player) -> Iterator[ActionGroup]:
         if state_service.subaction_count > 1:
-            return out
-        cards = player.hand
-        network = state_service.get_player_network(player.color)
+            return
+        cards = list(player.hand)
+        network = state_service.get_network_mask(player.color)
         links = [link for link in state_service.iter_links()
-            if link.owner is None and not network.isdisjoint(link.cities) and state_service.get_era() in link.type]
+            if link.owner is None and state_service.get_link_mask(link.id) & network and state_service.get_era() in link.type]
         base_cost = state_service.get_link_cost(state_service.subaction_count)
         if base_cost.money > player.bank:
-            return out
+            return
         
         if state_service.get_era() == LinkType.CANAL:
             if state_service.subaction_count == 0:
-                return [NetworkAction(link_id=link.id, card_id=card, resources_used=[]) 
-                   for link in links for card in player.hand]
-            return [] 
+                yield ActionGroup(NetworkAction, {'resources_used': []}, {'link_id': [link.id for link in links], 'card_id': cards})
+            return
         
         for link in links:
             coal_buildings = state_service.get_player_coal_sources(link_id=link.id)
@@ -499,7 +582,7 @@ class ActionSpaceGenerator():
                     break
             
             if not coal_sources:
-                if any(state_service.market_access_exists(city_name=city) for city in link.cities):
+                if state_service.get_link_component_mask(link.id) & state_service.get_merchant_city_mask():
                     market_cost = state_service.calculate_coal_cost(base_cost.coal)
                     if market_cost + base_cost.money > player.bank:
                         continue
@@ -510,26 +593,16 @@ class ActionSpaceGenerator():
             beer_buildings = state_service.get_player_beer_sources(color=player.color, link_id=link.id)
             beer_sources = [ResourceSource(resource_type=ResourceType.BEER, building_slot_id=b.slot_id) for b in beer_buildings]
             if state_service.subaction_count > 0:
-                for coal_source in coal_sources:
-                    for beer_source in beer_sources:
-                        res = [coal_source, beer_source]
-                        out.append(NetworkAction(
-                            resources_used=res,
-                            link_id=link.id
-                        ))
+                resources = [[coal_source, beer_source] for coal_source in coal_sources for beer_source in beer_sources]
+                yield ActionGroup(NetworkAction, {'link_id': link.id}, {'resources_used': resources})
             else:
-                for coal_source in coal_sources:
-                    for card in cards:
-                        out.append(NetworkAction(
-                            resources_used=[coal_source],
-                            link_id=link.id,
-                            card_id=card
-                        ))
-
-        return out
+                yield ActionGroup(NetworkAction, {'link_id': link.id}, {'resources_used': [[coal_source] for coal_source in coal_sources], 'card_id': cards})
                         
     def get_valid_develop_actions(self, state_service:BoardStateService, player:Player, gloucester=False) -> List[DevelopAction]:
-        cards = player.hand
+        return [action for group in self._develop_groups(state_service, player, gloucester) for action in group]
+
+    def _develop_groups(self, state_service:BoardStateService, player:Player, gloucester=False) -> Iterator[ActionGroup]:
+        cards = list(player.hand)
         iron_buildings = state_service.get_player_iron_sources()
         if not gloucester:
             if iron_buildings:
@@ -537,7 +610,7 @@ class ActionSpaceGenerator():
             else:
                 cost = state_service.calculate_iron_cost(state_service.get_develop_cost().iron)
                 if cost > player.bank:
-                    return []
+                    return
                 iron_sources = [ResourceSource(resource_type=ResourceType.IRON)]
         else:
             iron_sources = list()
@@ -548,47 +621,57 @@ class ActionSpaceGenerator():
             if building and building.is_developable:
                 industries.append(industry)
 
+        resources = [[source] for source in iron_sources]
         if state_service.subaction_count > 0:
             if gloucester:
-                return[DevelopAction(industry=industry, resources_used=[]) for industry in industries]
-            return [DevelopAction(industry=industry, resources_used=[source])
-                for industry in industries for source in iron_sources]
+                yield ActionGroup(DevelopAction, {'resources_used': []}, {'industry': industries})
+            else:
+                yield ActionGroup(DevelopAction, {}, {'industry': industries, 'resources_used': resources})
         else:
-            return [DevelopAction(industry=industry, resources_used=[source], card_id=card)
-                for industry in industries for source in iron_sources for card in cards]
+            yield ActionGroup(DevelopAction, {}, {'industry': industries, 'resources_used': resources, 'card_id': cards})
 
     def get_valid_scout_actions(self, player:Player) -> List[ScoutAction]:
+        return [action for group in self._scout_groups(player) for action in group]
+
+    def _scout_groups(self, player:Player) -> Iterator[ActionGroup]:
         cards = player.hand.values()
-        out = []
         if len(cards) < 3:
-            return []
+            return
         if any(card.value == 'wild' for card in cards):
-            return []
+            return
         ids = [card.id for card in cards]
-        for combo in itertools.combinations(ids, 3):
-            out.append(ScoutAction(card_id=list(combo)))
-        return out
+        yield ActionGroup(ScoutAction, {}, {'card_id': [list(combo) for combo in itertools.combinations(ids, 3)]})
 
     def get_valid_loan_actions(self, player:Player) -> List[LoanAction]:
+        return [action for group in self._loan_groups(player) for action in group]
+
+    def _loan_groups(self, player:Player) -> Iterator[ActionGroup]:
         if player.income < -7:
-            return []
-        return [LoanAction(card_id=card) for card in player.hand]
+            return
+        yield ActionGroup(LoanAction, {}, {'card_id': list(player.hand)})
     
     def get_valid_pass_actions(self, player:Player) -> List[PassAction]:
-        return [PassAction(card_id=card) for card in player.hand]
+        return [action for group in self._pass_groups(player) for action in group]
+
+    def _pass_groups(self, player:Player) -> Iterator[ActionGroup]:
+        yield ActionGroup(PassAction, {}, {'card_id': list(player.hand)})
 
     def get_valid_commit_actions(self, state_service:BoardStateService):
+        return [action for group in self._commit_groups(state_service) for action in group]
+
+    def _commit_groups(self, state_service:BoardStateService) -> Iterator[ActionGroup]:
         if state_service.subaction_count > 0:
-            return [CommitAction()]
-        else:
-            return []
+            yield ActionGroup(CommitAction, {}, {})
     
     def get_valid_shortfall_actions(self, state_service:BoardStateService, player:Player):
-        buildings = [building for building in state_service.iter_placed_buildings() if building.owner is player.color]
+        return [action for group in self._shortfall_groups(state_service, player) for action in group]
+
+    def _shortfall_groups(self, state_service:BoardStateService, player:Player) -> Iterator[ActionGroup]:
+        buildings = state_service.get_buildings_by_owner(player.color)
         if buildings:
-            return [ShortfallAction(slot_id=building.slot_id) for building in buildings]
+            yield ActionGroup(ShortfallAction, {}, {'slot_id': [building.slot_id for building in buildings]})
         else:
-            return [ShortfallAction()]
+            yield ActionGroup(ShortfallAction, {}, {})
 
     def _remove_duplicates(self, lst):
         seen = set()
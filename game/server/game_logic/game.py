@@ -41,7 +41,7 @@ class Game:
             state = BoardState.cardless(partial_state.state)
             known_hand = partial_state.your_hand.copy()
             deck_size = partial_state.state.deck_size
-            state.deck = [Card.mock() for _ in range(deck_size)]
+            state.deck = [Card.mock(i) for i in range(deck_size)]
             transient_state_service = BoardStateService(state)
             initializer = GameInitializer() 
             card_dict = initializer._build_card_dict()
@@ -150,10 +150,10 @@ class Game:
         self.event_bus = EventBus()
         self.initializer = GameInitializer()
 
-    def start(self, player_count:int, player_colors:List[PlayerColor]):
+    def start(self, player_count:int, player_colors:List[PlayerColor], trusted_check_rate:float=0.0):
         self.replay_service = ReplayService(self.event_bus)
         self.state_service = BoardStateService(self.initializer.create_initial_state(player_count, player_colors))
-        self.action_processor = ActionProcessor(self.state_service, event_bus=self.event_bus)
+        self.action_processor = ActionProcessor(self.state_service, event_bus=self.event_bus, trusted_check_rate=trusted_check_rate)
         self.status = GameStatus.ONGOING
     
     def get_player_state(self, color:PlayerColor, state:BoardState=None) -> PlayerState:
@@ -175,6 +175,17 @@ class Game:
             process_result.end_of_game = True
         return process_result
 
+    def process_trusted_action(self, action:Action, color:PlayerColor, fingerprint:int) -> ActionProcessResult:
+        '''Same as process_action for an action taken from the action space generator, see ActionProcessor.process_trusted_action'''
+        if self.status is not GameStatus.ONGOING:
+            raise ValueError(f'Cannot submit actions to a game in {self.status}')
+        process_result = self.action_processor.process_trusted_action(action, color, fingerprint)
+        if self.concluded():
+            self.status = GameStatus.COMPLETE
+            self.replay_service.save_replay(self.REPLAYS_PATH / self.id)
+            process_result.end_of_game = True
+        return process_result
+
     def concluded(self):
         return self.state_service.get_deck_size() == 0 and all(not player.hand for player in self.state_service.get_players().values()) and self.state_service.get_era() is LinkType.RAIL
 
@@ -1,22 +1,13 @@
 from ...schema import PlayerColor, BoardState, LinkType, Building, Player, Card, CardType, City, MerchantSlot, MerchantType, BuildingSlot, IndustryType, Link, Market, ActionContext
 from ...schema import ResourceAmounts, ResourceType
-from pathlib import Path
+from .services.board_topology import BoardTopology
+from .services.resource_tables import ResourceTables
 from typing import List, Dict
 import random
-import json
 
 
 class GameInitializer():
 
-    # Use project-relative paths instead of hardcoded absolute paths
-    RES_PATH = Path(__file__).resolve().parent.parent / 'res'
-    BUILDING_ROSTER_PATH = Path(RES_PATH / 'building_table.json')
-    CARD_LIST_PATH = Path(RES_PATH / 'card_list.json')
-    CITIES_LIST_PATH = Path(RES_PATH / 'cities_list.json')
-    MERCHANTS_TOKENS_PATH = Path(RES_PATH /'merchant_tokens.json')
-    LINKS_PATH = Path(RES_PATH / 'city_links.json')
-
-
     def create_initial_state(self, player_count: int, player_colors: List[PlayerColor]) -> BoardState:
         
         self.deck = self._build_initial_deck(player_count)
@@ -25,7 +16,7 @@ class GameInitializer():
 
         cities = self._create_cities(player_count)
 
-        links = self._create_links()
+        links = self._create_links(player_count)
 
         market = self._create_starting_market()
 
@@ -62,102 +53,25 @@ class GameInitializer():
         )
     
     def _build_initial_deck(self, player_count:int) -> List[Card]:
-        out:List[Card] = []
-        with open(self.CARD_LIST_PATH) as cardfile:
-            cards_data = json.load(cardfile)
-        for card_data in cards_data:
-            if card_data['player_count'] <= player_count:
-                card = Card(
-                    id=card_data["id"],
-                    card_type=CardType(card_data["card_type"]),
-                    value=card_data["value"]
-                )
-                out.append(card)
+        out:List[Card] = list(ResourceTables.get().get_deck(player_count))
         random.shuffle(out)
         return out
 
     def _build_card_dict(self) -> Dict[int, Card]:
-        out:Dict[Card] = {}
-        with open(self.CARD_LIST_PATH) as cardfile:
-            cards_data = json.load(cardfile)
-        for card_data in cards_data:
-            card = Card(
-                id=card_data["id"],
-                card_type=CardType(card_data["card_type"]),
-                value=card_data["value"]
-            )
-            out[card.id] = card
-        wilds = self._build_wild_deck()
-        for wild in wilds:
-            out[wild.id] = wild
-        return out        
+        return dict(ResourceTables.get().cards_by_id)
 
     def _build_wild_deck(self) -> List[Card]:
-        INDUSTRY_ID = 65
-        CITY_ID = 66
-        return [Card(card_type=CardType.INDUSTRY, id=INDUSTRY_ID, value='wild'), Card(card_type=CardType.CITY, id=CITY_ID, value='wild')]
+        return list(ResourceTables.get().wild_cards)
 
     def _create_cities(self, player_count:int) -> Dict[str, City]:
         '''
         Базовая генерация городов без связей
         '''
-        out:Dict[str, City] = {}
-        with open(self.CITIES_LIST_PATH) as cityfile:
-            cities_data:dict = json.load(cityfile)
-
-        with open(self.MERCHANTS_TOKENS_PATH) as merchantsfile:
-            tokens_data = json.load(merchantsfile)
-        tokens = []
-        for token_data in tokens_data:
-            if token_data['player_count'] <= player_count:
-                tokens.append(MerchantType(token_data['type']))
-        random.shuffle(tokens)
-
-        for city_data in cities_data:
-            city_name = city_data['name']
-            slots=[BuildingSlot(
-                    id=slot['id'],
-                    city=city_name,
-                    industry_type_options=[IndustryType(industry) for industry in slot['industry_type_options']]
-                ) for slot in city_data['building_slots']] if 'building_slots' in city_data.keys() else []
-            is_merchant = city_data.get('merchant', False)
-            if is_merchant:
-                mslots = {}
-                city_player_count = city_data['player_count']
-                if player_count >= city_player_count:
-                    merchant_slot_types = [tokens.pop() for _ in range(len(city_data['merchant_slots']))]
-                else:
-                    merchant_slot_types = [mslot['merchant_type'] for mslot in city_data["merchant_slots"]] 
-                for slot in city_data['merchant_slots']:
-                    mslots[slot['id']] = (MerchantSlot(
-                        id=slot['id'],
-                        city=city_name,
-                        merchant_type=merchant_slot_types.pop()
-                    ))
-            city = (City(
-                name=city_name,
-                slots={slot.id: slot for slot in slots},
-                is_merchant=city_data.get('merchant', False),
-                merchant_min_players=city_data.get('player_count'),
-                merchant_slots=mslots if is_merchant else None
-            ))
-            out[city_name] = city
+        topology = BoardTopology.get(player_count)
+        return topology.create_cities(topology.deal_merchant_types())
 
-        return out
-
-
-    def _create_links(self) -> List[Link]:
-        out:Dict[int, Link] = {}
-        with open(self.LINKS_PATH) as linksfile:
-            links_data:dict = json.load(linksfile) 
-        for link_data in links_data:
-            out[link_data["id"]] = Link(
-                id=link_data['id'],
-                type=link_data['transport'],
-                cities=link_data['cities'],
-                owner=None
-            )
-        return out
+    def _create_links(self, player_count:int) -> Dict[int, Link]:
+        return BoardTopology.get(player_count).create_links()
     
     def _create_starting_market(self) -> Market:
         coal_count = 13
@@ -1,29 +1,280 @@
-from collections import deque
-from typing import Callable, Iterator, List, Optional, Dict, Set, Union
-from ....schema import BoardState, City, Building, MerchantSlot, BuildingSlot,  IndustryType, Player, PlayerColor, ResourceType, LinkType, ResourceAmounts, MerchantType, ActionContext, Card, Link
+from copy import copy
+from dataclasses import dataclass, replace
+from typing import Callable, FrozenSet, Iterator, List, Mapping, Optional, Dict, Set, Tuple, Union
+from ....schema import BoardState, Market, City, Building, PlacedBuilding, MerchantSlot, BuildingSlot,  IndustryType, Player, PlayerColor, ResourceType, LinkType, ResourceAmounts, MerchantType, ActionContext, Card, Link
 from .building_provider import BuildingProvider
-import math
+from .connectivity import CityConnectivity
+from .derived_cache import CacheStats, DerivedCache, Generations, derived
+from .market_tables import MarketTables
+from .packed_state import BoardIndex
+from .state_journal import StateJournal, UndoToken
+from .zobrist import ZobristHasher
+
+@dataclass(frozen=True)
+class MerchantReach:
+    '''Merchants of one connectivity component: their tile types and the slots that still have beer'''
+    types: FrozenSet[MerchantType] = frozenset()
+    beer: Tuple[Tuple[int, MerchantType], ...] = ()
+
+    def accepts(self, industry: IndustryType) -> bool:
+        return MerchantType.ANY in self.types or MerchantType(industry) in self.types
+
 
 class BoardStateService:
     
-    COAL_MAX_COST:int = 8
-    IRON_MAX_COST:int = 6
-    COAL_MAX_COUNT:int = 14
-    IRON_MAX_COUNT:int = 10
+    COAL_MAX_COST:int = MarketTables.COAL_MAX_COST
+    IRON_MAX_COST:int = MarketTables.IRON_MAX_COST
+    NO_MERCHANTS = MerchantReach()
+    COAL_MAX_COUNT:int = MarketTables.COAL_MAX_COUNT
+    IRON_MAX_COUNT:int = MarketTables.IRON_MAX_COUNT
     
     def __init__(self, board_state: BoardState):
         self.state = board_state
+        self.journal: Optional[StateJournal] = None
+        # None - сервис единолично владеет всем состоянием; иначе id -> объект, уже скопированный этим сервисом
+        self._owned: Optional[Dict[int, object]] = None
+        self.market_tables = MarketTables.get()
         self.update_market_costs()
-        self._connectivity_cache = None
-        self._graph_cache = None
-        self._coal_cities_cache = None
-        self._merchant_cities_cache = None
-        self._networks_cache = None
-        self._iron_cache = None
+        self._connectivity: Optional[CityConnectivity] = None
+        # Связность общая с клоном или точкой отката: перед слиянием её нужно скопировать
+        self._connectivity_shared = False
+        self.generations = Generations()
+        self.derived_cache = DerivedCache()
+        self.city_index = BoardIndex.get()
+        self._board_mask = self.city_index.city_mask(board_state.cities)
         self.round_count = 1
+        self.hasher = ZobristHasher(board_state)
+        self._build_indexes()
         
         self.building_provider = BuildingProvider()
 
+    # --- Journaling ---
+    def start_journal(self) -> StateJournal:
+        if self.journal is None:
+            self.journal = StateJournal()
+        return self.journal
+
+    def stop_journal(self) -> None:
+        self.journal = None
+
+    def get_undo_token(self) -> UndoToken:
+        journal = self.start_journal()
+        self._connectivity_shared = True
+        return UndoToken(journal=journal, mark=journal.mark(), derived=(self.hasher.snapshot(), self._connectivity))
+
+    def rollback(self, token: UndoToken) -> None:
+        if token.journal is not self.journal:
+            raise ValueError("Undo token was issued by a different journal")
+        self.journal.rollback(token.mark)
+        hashes, connectivity = token.derived
+        self.hasher.restore(hashes)
+        self._reindex_buildings()
+        self.invalidate_caches()
+        self._connectivity = connectivity
+        self._connectivity_shared = True
+
+    # --- Copy-on-write clones ---
+    def clone(self) -> 'BoardStateService':
+        '''
+        Branch of the state that shares cities, links, players, market and card lists with this
+        service. Either side copies a substructure the first time it mutates it, so a clone costs
+        a few dict copies and a rollout step copies only the cities and players it touches.
+        Undo tokens issued before the clone are invalidated.
+        '''
+        clone = BoardStateService.__new__(BoardStateService)
+        clone.state = copy(self.state)
+        clone.journal = None
+        clone._owned = {}
+        clone._connectivity = self._connectivity
+        clone._connectivity_shared = True
+        clone.generations = self.generations.copy()
+        clone.derived_cache = self.derived_cache
+        clone.city_index = self.city_index
+        clone.market_tables = self.market_tables
+        clone._board_mask = self._board_mask
+        clone.round_count = self.round_count
+        clone.hasher = ZobristHasher()
+        clone.hasher.restore(self.hasher.snapshot())
+        clone._slots_by_id = self._slots_by_id.copy()
+        clone._merchant_slots_by_id = self._merchant_slots_by_id.copy()
+        clone._buildings_by_owner = {color: buildings.copy() for color, buildings in self._buildings_by_owner.items()}
+        clone._buildings_by_industry = {industry: buildings.copy() for industry, buildings in self._buildings_by_industry.items()}
+        clone._buildings_by_city = {city_name: buildings.copy() for city_name, buildings in self._buildings_by_city.items()}
+        clone.building_provider = self.building_provider
+
+        # Всё, чем владел родитель, теперь общее
+        self._owned = {}
+        self._connectivity_shared = True
+        if self.journal is not None:
+            self.journal = StateJournal()
+        return clone
+
+    def _is_owned(self, obj) -> bool:
+        return self._owned is None or id(obj) in self._owned
+
+    def _take(self, obj):
+        if self._owned is not None:
+            self._owned[id(obj)] = obj
+        return obj
+
+    def _own_player(self, color: PlayerColor) -> Player:
+        player = self.state.players[color]
+        if self._is_owned(player):
+            return player
+        if not self._is_owned(self.state.players):
+            self.state.players = self._take(self.state.players.copy())
+        player = self._take(replace(player, hand=player.hand.copy(), available_buildings=player.available_buildings.copy()))
+        self.state.players[color] = player
+        return player
+
+    def _own_city(self, name: str) -> City:
+        city = self.state.cities[name]
+        if self._is_owned(city):
+            return city
+        if not self._is_owned(self.state.cities):
+            self.state.cities = self._take(self.state.cities.copy())
+        # Копия города включает его слоты и стоящие на них здания
+        city = self._take(city.__deepcopy__({}))
+        self.state.cities[name] = city
+        self._slots_by_id.update(city.slots)
+        if city.merchant_slots:
+            self._merchant_slots_by_id.update(city.merchant_slots)
+        for slot_id, slot in city.slots.items():
+            if slot.building_placed is not None:
+                self._index_building(slot_id, slot.building_placed)
+        return city
+
+    def _own_slot(self, slot: BuildingSlot) -> BuildingSlot:
+        return self._own_city(slot.city).slots[slot.id]
+
+    def _own_link(self, link_id: int) -> Link:
+        link = self.state.links[link_id]
+        if self._is_owned(link):
+            return link
+        if not self._is_owned(self.state.links):
+            self.state.links = self._take(self.state.links.copy())
+        link = self._take(link.__deepcopy__({}))
+        self.state.links[link_id] = link
+        return link
+
+    def _own_market(self) -> Market:
+        if not self._is_owned(self.state.market):
+            self.state.market = self._take(replace(self.state.market))
+        return self.state.market
+
+    def _own_cards(self, name: str) -> List[Card]:
+        cards = getattr(self.state, name)
+        if not self._is_owned(cards):
+            cards = self._take(cards.copy())
+            setattr(self.state, name, cards)
+        return cards
+
+    def _set(self, obj, name: str, value) -> None:
+        if self.journal is not None:
+            self.journal.record_attr(obj, name)
+        setattr(obj, name, value)
+
+    def _set_state_field(self, name: str, value) -> None:
+        self.hasher.update_turn(name, getattr(self.state, name), value)
+        self._set(self.state, name, value)
+        self.generations.bump(Generations.TURN)
+
+    def _set_player_field(self, player: Player, name: str, value) -> None:
+        player = self._own_player(player.color)
+        self.hasher.update_player(player.color, name, getattr(player, name), value)
+        self._set(player, name, value)
+        self.generations.bump(Generations.PLAYERS)
+
+    def _set_market_field(self, name: str, value: int) -> None:
+        market = self._own_market()
+        self.hasher.update_market(name, getattr(market, name), value)
+        self._set(market, name, value)
+        self.generations.bump(Generations.MARKET)
+
+    def _set_building_field(self, slot: BuildingSlot, name: str, value) -> PlacedBuilding:
+        slot = self._own_slot(slot)
+        building = slot.building_placed
+        old_feature = self.hasher.building_feature(slot.id, building)
+        self._set(building, name, value)
+        self.hasher.update_slot(slot.city, old_feature, self.hasher.building_feature(slot.id, building))
+        self.generations.bump(Generations.RESOURCES if name == 'resource_count' else Generations.SLOTS)
+        return building
+
+    def _set_slot_building(self, slot: BuildingSlot, building: Optional[PlacedBuilding]) -> None:
+        slot = self._own_slot(slot)
+        self.hasher.update_slot(
+            slot.city,
+            self.hasher.building_feature(slot.id, slot.building_placed),
+            self.hasher.building_feature(slot.id, building)
+        )
+        if slot.building_placed is not None:
+            self._unindex_building(slot.id, slot.building_placed)
+        self._set(slot, 'building_placed', building)
+        if building is not None:
+            self._index_building(slot.id, building)
+        self.generations.bump(Generations.SLOTS)
+
+    # --- Entity indexes ---
+    # Здания индексируются по id слота; id слотов идут в порядке обхода карты,
+    # поэтому сортировка по ключу даёт тот же порядок, что и полный обход городов
+    def _build_indexes(self) -> None:
+        self._slots_by_id: Dict[int, BuildingSlot] = {}
+        self._merchant_slots_by_id: Dict[int, MerchantSlot] = {}
+        for city in self.state.cities.values():
+            self._slots_by_id.update(city.slots)
+            if city.merchant_slots:
+                self._merchant_slots_by_id.update(city.merchant_slots)
+        self._reindex_buildings()
+
+    def _reindex_buildings(self) -> None:
+        self._buildings_by_owner: Dict[PlayerColor, Dict[int, PlacedBuilding]] = {color: {} for color in self.state.players}
+        self._buildings_by_industry: Dict[IndustryType, Dict[int, PlacedBuilding]] = {industry: {} for industry in IndustryType}
+        self._buildings_by_city: Dict[str, Dict[int, PlacedBuilding]] = {city_name: {} for city_name in self.state.cities}
+        for slot_id, slot in self._slots_by_id.items():
+            if slot.building_placed is not None:
+                self._index_building(slot_id, slot.building_placed)
+
+    def _index_building(self, slot_id: int, building: PlacedBuilding) -> None:
+        self._buildings_by_owner.setdefault(building.owner, {})[slot_id] = building
+        self._buildings_by_industry[building.industry_type][slot_id] = building
+        self._buildings_by_city[self._slots_by_id[slot_id].city][slot_id] = building
+
+    def _unindex_building(self, slot_id: int, building: PlacedBuilding) -> None:
+        self._buildings_by_owner.get(building.owner, {}).pop(slot_id, None)
+        self._buildings_by_industry[building.industry_type].pop(slot_id, None)
+        self._buildings_by_city[self._slots_by_id[slot_id].city].pop(slot_id, None)
+
+    def get_buildings_by_owner(self, color: PlayerColor) -> List[PlacedBuilding]:
+        buildings = self._buildings_by_owner.get(color, {})
+        return [buildings[slot_id] for slot_id in sorted(buildings)]
+
+    def get_buildings_by_industry(self, industry: IndustryType) -> List[PlacedBuilding]:
+        buildings = self._buildings_by_industry[industry]
+        return [buildings[slot_id] for slot_id in sorted(buildings)]
+
+    def get_city_buildings(self, city_name: str) -> Mapping[int, PlacedBuilding]:
+        '''Placed buildings of a city by slot id; the view is kept up to date as buildings are placed and removed'''
+        return self._buildings_by_city[city_name]
+
+    def get_stocked_buildings(self, industry: IndustryType) -> List[PlacedBuilding]:
+        '''Placed buildings of a resource industry that still hold resources, in board order'''
+        return [building for building in self.get_buildings_by_industry(industry) if building.resource_count > 0]
+
+    def get_state_hash(self) -> int:
+        '''64-bit Zobrist key of the full state, maintained incrementally'''
+        return self.hasher.value
+
+    def get_aspect_hash(self, aspect) -> int:
+        return self.hasher.aspects.get(aspect, 0)
+
+    def get_view_hash(self, color: PlayerColor) -> int:
+        '''State key without the other players' aspects: the same for every determinization of what color sees'''
+        value = self.hasher.value
+        for other in self.state.players:
+            if other != color:
+                value ^= self.get_aspect_hash(ZobristHasher.player_aspect(other))
+        return value
+
     # --- Encapsulated BoardState accessors/mutators (public API) ---
     def get_board_state(self) -> BoardState:
         return self.state
@@ -33,20 +284,78 @@ class BoardStateService:
         return self.state.subaction_count
 
     def increase_subaction_count(self) -> None:
-        self.state.subaction_count += 1
+        self._set_state_field('subaction_count', self.state.subaction_count + 1)
 
     def reset_subaction_count(self) -> None:
-        self.state.subaction_count = 0
+        self._set_state_field('subaction_count', 0)
 
     def wipe_hands(self) -> None:
-        for _, player in self.get_players().items():
-            player.hand = {}
+        for color in self.get_players():
+            self.set_player_hand(color, {})
 
     def clear_discard(self) -> None:
-        self.state.discard = []
+        self._set(self.state, 'discard', [])
+        self.generations.bump(Generations.HANDS)
 
     def give_player_a_card(self, color:PlayerColor, card:Card) -> None:
-        self.get_player(color).hand[card.id] = card
+        hand = self._own_player(color).hand
+        if self.journal is not None:
+            self.journal.record_dict(hand)
+        if card.id in hand:
+            self.hasher.toggle_card(color, card.id)
+        hand[card.id] = card
+        self.hasher.toggle_card(color, card.id)
+        self.generations.bump(Generations.HANDS)
+
+    def take_card_from_hand(self, color:PlayerColor, card_id:int) -> Card:
+        hand = self._own_player(color).hand
+        if self.journal is not None and card_id in hand:
+            self.journal.record_dict(hand)
+        card = hand.pop(card_id)
+        self.hasher.toggle_card(color, card_id)
+        self.generations.bump(Generations.HANDS)
+        return card
+
+    def set_player_hand(self, color:PlayerColor, hand:Dict[int, Card]) -> None:
+        player = self._own_player(color)
+        for card_id in player.hand:
+            self.hasher.toggle_card(color, card_id)
+        self._set(player, 'hand', hand)
+        for card_id in hand:
+            self.hasher.toggle_card(color, card_id)
+        self.generations.bump(Generations.HANDS)
+
+    def add_bank(self, color:PlayerColor, amount:int) -> None:
+        player = self.get_player(color)
+        self._set_player_field(player, 'bank', player.bank + amount)
+
+    def set_bank(self, color:PlayerColor, value:int) -> None:
+        self._set_player_field(self.get_player(color), 'bank', value)
+
+    def add_income(self, color:PlayerColor, amount:int) -> None:
+        player = self.get_player(color)
+        self._set_player_field(player, 'income', player.income + amount)
+
+    def add_income_points(self, color:PlayerColor, amount:int) -> None:
+        player = self.get_player(color)
+        self._set_player_field(player, 'income_points', player.income_points + amount)
+
+    def add_victory_points(self, color:PlayerColor, amount:int) -> None:
+        player = self.get_player(color)
+        self._set_player_field(player, 'victory_points', player.victory_points + amount)
+
+    def add_money_spent(self, color:PlayerColor, amount:int) -> None:
+        player = self.get_player(color)
+        self._set_player_field(player, 'money_spent', player.money_spent + amount)
+
+    def reset_money_spent(self, color:PlayerColor) -> None:
+        self._set_player_field(self.get_player(color), 'money_spent', 0)
+
+    def set_has_city_wild(self, color:PlayerColor, value:bool) -> None:
+        self._set_player_field(self.get_player(color), 'has_city_wild', value)
+
+    def set_has_industry_wild(self, color:PlayerColor, value:bool) -> None:
+        self._set_player_field(self.get_player(color), 'has_industry_wild', value)
 
     def get_exposed_state(self):
         return self.state.hide_state()
@@ -64,32 +373,50 @@ class BoardStateService:
         return self.state.turn_order
     
     def set_turn_order(self, new_order: List[PlayerColor]) -> None:
-        self.state.turn_order = new_order
+        self._set_state_field('turn_order', new_order)
 
     def advance_turn_order(self) -> PlayerColor:
-        self.state.turn_index += 1
+        self._set_state_field('turn_index', self.state.turn_index + 1)
         return self.state.turn_index
 
     def get_actions_left(self) -> int:
         return self.state.actions_left
 
     def set_actions_left(self, value: int) -> None:
-        self.state.actions_left = value
+        self._set_state_field('actions_left', value)
 
     def get_action_context(self) -> ActionContext:
         return self.state.action_context
 
     def set_action_context(self, ctx: ActionContext) -> None:
-        self.state.action_context = ctx
+        self._set_state_field('action_context', ctx)
 
     def get_deck(self) -> List[Card]:
         return self.state.deck
 
+    def set_deck(self, deck: List[Card]) -> None:
+        self.hasher.update_turn('deck_size', len(self.state.deck), len(deck))
+        self._set(self.state, 'deck', self._take(deck))
+        self.generations.bump(Generations.HANDS)
+
+    def draw_card(self) -> Card:
+        deck = self._own_cards('deck')
+        card = deck.pop()
+        if self.journal is not None:
+            self.journal.record_pop(deck, card)
+        self.hasher.update_turn('deck_size', len(self.state.deck) + 1, len(self.state.deck))
+        self.generations.bump(Generations.HANDS)
+        return card
+
     def get_deck_size(self) -> int:
         return len(self.state.deck)
 
     def append_discard(self, card: 'Card') -> None:
-        self.state.discard.append(card)
+        discard = self._own_cards('discard')
+        if self.journal is not None:
+            self.journal.record_append(discard)
+        discard.append(card)
+        self.generations.bump(Generations.HANDS)
 
     def get_wild_cards(self) -> List['Card']:
         return self.state.wilds
@@ -110,8 +437,43 @@ class BoardStateService:
     def get_link(self, link_id: int) -> Link:
         return self.state.links[link_id]
 
-    def set_link_owner(self, link_id: int, owner: PlayerColor) -> None:
-        self.state.links[link_id].owner = owner
+    def set_link_owner(self, link_id: int, owner: Optional[PlayerColor]) -> None:
+        link = self._own_link(link_id)
+        previous = link.owner
+        self.hasher.update_link(link_id, previous, owner)
+        self._set(link, 'owner', owner)
+        self.generations.bump(Generations.LINKS)
+        if (previous is None) == (owner is None):
+            return
+        if owner is None:
+            # Связи теряются только при смене эпохи: компоненты строятся заново при следующем запросе
+            self._connectivity = None
+        elif self._connectivity is not None:
+            if self._connectivity_shared:
+                self._connectivity = self._connectivity.copy()
+                self._connectivity_shared = False
+            self._connectivity.add_link(city for city in link.cities if city in self.state.cities)
+
+    def place_building(self, slot_id: int, building: PlacedBuilding) -> None:
+        self._set_slot_building(self.get_building_slot(slot_id), building)
+
+    def remove_building(self, slot_id: int) -> None:
+        self._set_slot_building(self.get_building_slot(slot_id), None)
+
+    def consume_building_resource(self, slot_id: int, amount: int = 1) -> PlacedBuilding:
+        slot = self.get_building_slot(slot_id)
+        return self._set_building_field(slot, 'resource_count', slot.building_placed.resource_count - amount)
+
+    def flip_building(self, slot_id: int) -> PlacedBuilding:
+        return self._set_building_field(self.get_building_slot(slot_id), 'flipped', True)
+
+    def use_merchant_beer(self, merchant_slot_id: int) -> MerchantSlot:
+        merchant = self.get_merchant_slot(merchant_slot_id)
+        merchant = self._own_city(merchant.city).merchant_slots[merchant_slot_id]
+        self.hasher.update_merchant(merchant.city, merchant.id, merchant.merchant_type, merchant.beer_available, False)
+        self._set(merchant, 'beer_available', False)
+        self.generations.bump(Generations.RESOURCES)
+        return merchant
 
     def get_market_coal_count(self) -> int:
         return self.state.market.coal_count
@@ -122,98 +484,133 @@ class BoardStateService:
     def get_era(self) -> LinkType:
         return self.state.era
 
-    def invalidate_connectivity_cache(self):
-        """Вызывается при любом изменении графа связей"""
-        self._connectivity_cache = None
-        self._graph_cache = None
-        self._coal_cities_cache = None
-        self._networks_cache = None
-
-    def invalidate_networks_cache(self):
-        self._networks_cache = None
-
-    def invalidate_coal_cache(self):
-        self._coal_cities_cache = None
-
-    def _build_condition_caches(self):
-        """Предварительно вычисляем города с углем и торговцами"""
-        self._coal_cities_cache = set()
-        self._merchant_cities_cache = set()
-        
-        for city_name, city in self.get_cities().items():
-            # Кэш для угольных городов
-            if any(slot.building_placed is not None and
-                  slot.building_placed.industry_type == IndustryType.COAL and
-                  slot.building_placed.resource_count > 0
-                  for slot in city.slots.values()):
-                self._coal_cities_cache.add(city_name)
-            
-            # Кэш для городов с торговцами
-            if city.is_merchant:
-                self._merchant_cities_cache.add(city_name)
+    def set_era(self, era: LinkType) -> None:
+        self._set_state_field('era', era)
 
-    def _build_graph(self) -> Dict[str, Set[str]]:
-        """Построение графа один раз для состояния"""
-        if self._graph_cache is not None:
-            return self._graph_cache
+    def invalidate_caches(self):
+        '''Forgets all derived data, for changes made past the mutators (journal rollback)'''
+        self.generations.bump_all()
+        self.invalidate_connectivity_cache()
 
-        graph = {}
+    def invalidate_connectivity_cache(self):
+        """Сбрасывает компоненты связности, они соберутся заново из занятых связей"""
+        self._connectivity = None
+
+    def get_cache_stats(self) -> Dict[str, CacheStats]:
+        '''Hit and miss counts of the derived queries, shared by this service and its clones'''
+        return self.derived_cache.stats
+
+    # --- City bitmasks (BoardIndex.city_bits) ---
+    def get_city_bit(self, city_name: str) -> int:
+        return self.city_index.city_bits[city_name]
+
+    def get_link_mask(self, link_id: int) -> int:
+        '''Cities at the ends of a link'''
+        return self.city_index.link_masks[link_id] & self._board_mask
+
+    @derived()
+    def get_merchant_city_mask(self) -> int:
+        return self.city_index.city_mask(name for name, city in self.get_cities().items() if city.is_merchant)
+
+    @derived(Generations.SLOTS, Generations.RESOURCES)
+    def get_industry_city_mask(self, industry: IndustryType) -> int:
+        '''Cities with a building of the industry that still holds resources, by the building index'''
+        mask = 0
+        city_bits = self.city_index.city_bits
+        for building in self._buildings_by_industry[industry].values():
+            if building.resource_count > 0:
+                mask |= city_bits[self._slots_by_id[building.slot_id].city]
+        return mask
+
+    def get_component_mask(self, city_name: str) -> int:
+        '''Cities connected to the city, the city included'''
+        return self._get_connectivity().mask(city_name)
+
+    @derived(Generations.LINKS)
+    def get_link_component_mask(self, link_id: int) -> int:
+        '''Cities connected to either end of a link'''
+        connectivity = self._get_connectivity()
+        mask = 0
+        for city in self.city_index.mask_cities(self.get_link_mask(link_id)):
+            mask |= connectivity.mask(city)
+        return mask
+
+    @derived(Generations.LINKS)
+    def _get_adjacency(self) -> Tuple[int, ...]:
+        """Маски соседей по занятым связям, по позиции города в BoardIndex"""
+        index = self.city_index
+        adjacency = [0] * len(index.city_names)
         for link in self.iter_links():
             if link.owner is None:
                 continue
-            cities_in_link = [city for city in link.cities if city in self.get_cities()]
-            
-            for i, city1 in enumerate(cities_in_link):
-                if city1 not in graph:
-                    graph[city1] = set()
-                for j, city2 in enumerate(cities_in_link):
-                    if i != j:
-                        graph[city1].add(city2)
-        
-        self._graph_cache = graph
-        return graph
-    
-    def _get_connectivity_components(self) -> Dict[str, int]:
-        """Вычисление компонент связности один раз для состояния"""
-        if self._connectivity_cache is not None:
-            return self._connectivity_cache
-            
-        graph = self._build_graph()
-        visited = set()
-        components = {}
-        component_id = 0
-        
-        for city in graph:
-            if city not in visited:
-                # BFS для нахождения всей компоненты
-                queue = deque([city])
-                visited.add(city)
-                current_component = set()
-                
-                while queue:
-                    current_city = queue.popleft()
-                    current_component.add(current_city)
-                    components[current_city] = component_id
-                    
-                    for neighbor in graph.get(current_city, set()):
-                        if neighbor not in visited:
-                            visited.add(neighbor)
-                            queue.append(neighbor)
-                
-                component_id += 1
-        
-        self._connectivity_cache = components
-        return components
-    
+            link_mask = self.get_link_mask(link.id)
+            for city in index.mask_cities(link_mask):
+                adjacency[index.city_pos[city]] |= link_mask & ~index.city_bits[city]
+        return tuple(adjacency)
+
+    @derived(Generations.LINKS)
+    def get_distance_rings(self, city_name: Optional[str] = None, link_id: Optional[int] = None) -> Tuple[int, ...]:
+        '''
+        Cities by the number of owned links to a city, or to the nearer end of a link: ring k is
+        the mask of the cities k links away, ring 0 the start itself. Rings only reach the
+        start's component.
+        '''
+        start = self.get_city_bit(city_name) if link_id is None else self.get_link_mask(link_id)
+        adjacency = self._get_adjacency()
+        rings = []
+        seen = frontier = start
+        while frontier:
+            rings.append(frontier)
+            reached = 0
+            mask = frontier
+            while mask:
+                low = mask & -mask
+                reached |= adjacency[low.bit_length() - 1]
+                mask ^= low
+            frontier = reached & ~seen
+            seen |= frontier
+        return tuple(rings)
+
+    def _get_connectivity(self) -> CityConnectivity:
+        """Компоненты связности; после сброса собираются заново из занятых связей"""
+        if self._connectivity is None:
+            cities = self.get_cities()
+            self._connectivity = CityConnectivity.from_links(
+                [city for city in link.cities if city in cities]
+                for link in self.iter_links()
+                if link.owner is not None
+            )
+            self._connectivity_shared = False
+        return self._connectivity
+
+    @derived(Generations.LINKS, Generations.RESOURCES)
+    def _get_merchant_reach(self) -> Dict[str, MerchantReach]:
+        '''Merchants per connectivity component root; a city outside every link is a component of its own'''
+        connectivity = self._get_connectivity()
+        types: Dict[str, Set[MerchantType]] = {}
+        beer: Dict[str, List[Tuple[int, MerchantType]]] = {}
+        for city in self.get_cities().values():
+            if not city.is_merchant or not city.merchant_slots:
+                continue
+            component = connectivity.find(city.name)
+            for slot in city.merchant_slots.values():
+                types.setdefault(component, set()).add(slot.merchant_type)
+                if slot.beer_available:
+                    beer.setdefault(component, []).append((slot.id, slot.merchant_type))
+        reach = {
+            component: MerchantReach(types=frozenset(component_types), beer=tuple(beer.get(component, ())))
+            for component, component_types in types.items()
+        }
+        return reach
+
+    def get_merchant_reach(self, city_name: str) -> MerchantReach:
+        '''Merchant types and merchant slots with beer (id, type) connected to a city, in board order'''
+        reach = self._get_merchant_reach()
+        return reach.get(self._get_connectivity().find(city_name), self.NO_MERCHANTS)
+
     def are_connected(self, city1: str, city2: str) -> bool:
         """Быстрая проверка связности через компоненты"""
-        if city1 == city2:
-            return True
-            
-        components = self._get_connectivity_components()
-        return (city1 in components and 
-                city2 in components and 
-                components[city1] == components[city2])
+        return self._get_connectivity().connected(city1, city2)
     
     def find_paths(
         self,
@@ -261,14 +658,10 @@ class BoardStateService:
                     found_cities[city] = 0
 
         # Используем компоненты связности для быстрой проверки
-        components = self._get_connectivity_components()
-        graph = self._build_graph()
+        connectivity = self._get_connectivity()
         
         # Для каждого стартового города находим его компоненту
-        start_components = set()
-        for city in valid_start_cities:
-            if city in components:
-                start_components.add(components[city])
+        start_components = {connectivity.find(city) for city in valid_start_cities if connectivity.is_linked(city)}
         
         if not start_components:
             return found_cities if find_all else False
@@ -276,30 +669,21 @@ class BoardStateService:
         # Быстрая проверка без BFS для случая find_all=False
         if not find_all:
             # Проверяем все города в нужных компонентах
-            for city, comp_id in components.items():
-                if comp_id in start_components and target_check(city):
-                    return True
-            return False
+            return any(target_check(city) for root in start_components for city in connectivity.members(root))
 
-        # Для find_all=True делаем BFS только по нужным компонентам
-        visited = set(valid_start_cities)
-        queue = deque([(city, 0) for city in valid_start_cities])
-        
-        while queue:
-            current_city, distance = queue.popleft()
-            neighbors = graph.get(current_city, set())
-            
-            for neighbor in neighbors:
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    new_distance = distance + 1
-                    if target_check(neighbor):
-                        found_cities[neighbor] = new_distance
-                    queue.append((neighbor, new_distance))
+        # Для find_all=True расстояния берём из колец, стартовые города уже учтены
+        if start_link_id is not None:
+            rings = self.get_distance_rings(link_id=start_link_id)
+        else:
+            rings = self.get_distance_rings(city_name=start)
+        for distance, ring in enumerate(rings[1:], 1):
+            for city in self.city_index.mask_cities(ring):
+                if target_check(city):
+                    found_cities[city] = distance
 
         return found_cities
     
-    def iter_placed_buildings(self) -> Iterator[Building]:
+    def iter_placed_buildings(self) -> Iterator[PlacedBuilding]:
         for city in self.get_cities().values():
             for slot in city.slots.values():
                 if slot.building_placed is not None:
@@ -317,93 +701,80 @@ class BoardStateService:
                 for slot in city.slots.values():
                     yield slot
     
-    def get_player_iron_sources(self) -> Set[Building]:
-        if self._iron_cache:
-            return self._iron_cache
-        out = []
-        for building in self.iter_placed_buildings():
-            if building.industry_type == IndustryType.IRON and building.resource_count > 0:
-                out.append(building)
-        self._iron_cache = out
-        return out
-
-    def invalidate_iron_cache(self):
-        self._iron_cache = None
+    @derived(Generations.SLOTS, Generations.RESOURCES)
+    def get_player_iron_sources(self) -> List[PlacedBuilding]:
+        return self.get_stocked_buildings(IndustryType.IRON)
+
+    @derived(Generations.LINKS, Generations.SLOTS, Generations.RESOURCES)
+    def get_coal_rings(self, city_name: Optional[str] = None, link_id: Optional[int] = None) -> Tuple[int, ...]:
+        '''Cities with coal left in their mines by distance: entry k masks the ones k links away'''
+        if link_id is not None:
+            if link_id not in self.get_links():
+                return ()
+        elif city_name not in self.get_cities():
+            return ()
+        coal_mask = self.get_industry_city_mask(IndustryType.COAL)
+        # Быстрая проверка: если угольных городов нет вообще
+        if not coal_mask:
+            return ()
+        return tuple(ring & coal_mask for ring in self.get_distance_rings(city_name, link_id))
 
     def get_player_coal_locations(self, city_name: Optional[str] = None, link_id: Optional[int] = None) -> Dict[str, int]:
         '''Returns dict: city name, priority'''
-        if self._coal_cities_cache is None:
-            self._build_condition_caches()
-        
-        # Быстрая проверка: если нет угольных городов вообще
-        if not self._coal_cities_cache:
-            return {}
-        
-        return self.find_paths(
-            start=city_name, 
-            start_link_id=link_id, 
-            target_condition=lambda city: city in self._coal_cities_cache,
-            find_all=True
-        ) 
-
-    def get_player_coal_sources(self, city_name:Optional[str]=None, link_id:Optional[str]=None) -> List[tuple[Building, int]]:
+        locations = {}
+        for distance, ring in enumerate(self.get_coal_rings(city_name, link_id)):
+            for city in self.city_index.mask_cities(ring):
+                locations[city] = distance
+        return locations
+
+    @derived(Generations.LINKS, Generations.SLOTS, Generations.RESOURCES)
+    def get_player_coal_sources(self, city_name:Optional[str]=None, link_id:Optional[str]=None) -> List[tuple[PlacedBuilding, int]]:
         '''Returns list of tuples: Building, priority, sorted by priority asc'''        
         out = []
-        coal_cities = self.get_player_coal_locations(city_name, link_id)
-        for city, priority in coal_cities.items():
-            for slot in self.get_city(city).slots.values():
-                if slot.building_placed is not None:
-                    building = slot.building_placed
-                    if building.industry_type == IndustryType.COAL and building.resource_count > 0:
-                        out.append((building, priority))
-
-        out.sort(key=lambda x: x[1])
+        coal_rings = self.get_coal_rings(city_name, link_id)
+        if not any(coal_rings):
+            return out
+        by_city: Dict[str, List[PlacedBuilding]] = {}
+        for building in self.get_stocked_buildings(IndustryType.COAL):
+            by_city.setdefault(self._slots_by_id[building.slot_id].city, []).append(building)
+        for priority, ring in enumerate(coal_rings):
+            for city in self.city_index.mask_cities(ring):
+                for building in by_city[city]:
+                    out.append((building, priority))
         return out
     
-    def get_player_beer_sources(self, color:PlayerColor, city_name:Optional[str]=None, link_id:Optional[int]=None) -> List[Building]:
+    def get_player_beer_sources(self, color:PlayerColor, city_name:Optional[str]=None, link_id:Optional[int]=None) -> List[PlacedBuilding]:
         out = []
-        for building in self.iter_placed_buildings():
-            if building.industry_type == IndustryType.BREWERY:
-                if building.owner == color:
-                    out.append(building)
-                else:
-                    city = self.get_building_slot(building.slot_id).city
+        reach = None
+        city_bits = self.city_index.city_bits
+        for building in self.get_buildings_by_industry(IndustryType.BREWERY):
+            if building.owner == color:
+                out.append(building)
+            else:
+                if reach is None:
                     if city_name:
-                        connected = self.are_connected(city_name, city)
+                        reach = self.get_component_mask(city_name)
                     elif link_id:
-                        link = self.get_link(link_id)
-                        connected = any(self.are_connected(c, city) for c in link.cities)
+                        reach = self.get_link_component_mask(link_id)
                     else:
                         raise ValueError('Beer search requires either a city name or a link id')
-                    if connected:
-                        out.append(building)
+                if city_bits[self._slots_by_id[building.slot_id].city] & reach:
+                    out.append(building)
         return out
     
 
     def market_access_exists(self, city_name: str) -> bool:
-        if self._merchant_cities_cache is None:
-            self._build_condition_caches()
-        
-        # Быстрая проверка: если нет городов с торговцами
-        if not self._merchant_cities_cache:
+        if city_name not in self.get_cities():
             return False
-        
-        return self.find_paths(
-            start=city_name, 
-            target_condition=lambda city: city in self._merchant_cities_cache
-        )
+        return bool(self.get_component_mask(city_name) & self.get_merchant_city_mask())
 
     def get_building_slot(self, building_slot_id) -> BuildingSlot:
-        for city in self.get_cities().values():
-            if building_slot_id in city.slots:
-                return city.slots[building_slot_id]
+        return self._slots_by_id.get(building_slot_id)
     
     def get_merchant_slot(self, merchant_slot_id:int) -> MerchantSlot:
-            for city in self.get_cities().values():
-                if city.merchant_slots is not None:
-                    if merchant_slot_id in city.merchant_slots:
-                        return city.merchant_slots[merchant_slot_id]
+        return self._merchant_slots_by_id.get(merchant_slot_id)
 
+    @derived(Generations.SLOTS, Generations.RESOURCES)
     def get_resource_amount_in_city(self, city_name:str, resource_type:ResourceType) -> int:
         out = 0
         for building_slot in self.get_city(city_name).slots.values():
@@ -412,33 +783,22 @@ class BoardStateService:
                     out += building_slot.building_placed.resource_count
         return out
     
-    def get_player_network(self, player_color: PlayerColor) -> Set[str]:
-        if self._networks_cache is None:
-            self._networks_cache = {}
-        if player_color in self._networks_cache:
-            return self._networks_cache[player_color]
-        
-        network = self._build_player_network(player_color)
-        self._networks_cache[player_color] = network
-        return network
-    
-    def _build_player_network(self, player_color: PlayerColor) -> Set[str]:
-        slot_cities = {
-            city.name for city in self.get_cities().values()
-            if any(slot.building_placed and slot.building_placed.owner == player_color
-                for slot in city.slots.values())
-        }
-        
-        link_cities = {
-            city for link in self.iter_links()
-            if link.owner == player_color
-            for city in link.cities
-        }
+    def get_player_network(self, player_color: PlayerColor) -> Tuple[str, ...]:
+        '''Cities of the player's network in board order'''
+        return self.city_index.mask_cities(self.get_network_mask(player_color))
+
+    @derived(Generations.LINKS, Generations.SLOTS)
+    def get_network_mask(self, player_color: PlayerColor) -> int:
+        city_bits = self.city_index.city_bits
+        network = 0
+        for slot_id in self._buildings_by_owner.get(player_color, {}):
+            network |= city_bits[self._slots_by_id[slot_id].city]
+        for link in self.iter_links():
+            if link.owner == player_color:
+                network |= self.get_link_mask(link.id)
 
-        if not slot_cities and not link_cities:
-            return set(self.get_cities())
-        
-        return slot_cities | link_cities 
+        # Без зданий и связей игрок может строить где угодно
+        return network or self._board_mask
 
     def get_link_cost(self, subaction_count=0):
         if self.get_era() == LinkType.CANAL:
@@ -450,10 +810,7 @@ class BoardStateService:
                 return ResourceAmounts(money=10, coal=1, beer=1)
     
     def can_sell(self, city_name:str, industry:IndustryType) -> bool:
-        eligible_merchants = [city for city in self.get_cities().values() if city.is_merchant and (any(slot.merchant_type in [MerchantType.ANY, MerchantType(industry)] for slot in city.merchant_slots.values()))]
-        for merchant in eligible_merchants:
-            if self.are_connected(city_name, merchant.name):
-                return True
+        return self.get_merchant_reach(city_name).accepts(industry)
 
     def get_develop_cost(self, glousecter=False) -> ResourceAmounts:
         if glousecter:
@@ -478,7 +835,7 @@ class BoardStateService:
         return self.state.turn_index
     
     def reset_turn_index(self) -> None:
-        self.state.turn_index = 0
+        self._set_state_field('turn_index', 0)
 
     def get_active_player(self) -> Player:
         if self.get_action_context() is not ActionContext.SHORTFALL:
@@ -488,8 +845,9 @@ class BoardStateService:
             return players_in_shortfall[0]
     
     def update_market_costs(self):
-        self.state.market.coal_cost = self.COAL_MAX_COST - math.ceil(self.get_market_coal_count() / 2)
-        self.state.market.iron_cost = self.IRON_MAX_COST - math.ceil(self.get_market_iron_count() / 2)
+        market = self._own_market()
+        self._set(market, 'coal_cost', self.market_tables.price(ResourceType.COAL, self.get_market_coal_count()))
+        self._set(market, 'iron_cost', self.market_tables.price(ResourceType.IRON, self.get_market_iron_count()))
 
     def sellable_amount(self, resource_type:ResourceType):
         if resource_type == ResourceType.IRON:
@@ -497,39 +855,25 @@ class BoardStateService:
         elif resource_type == ResourceType.COAL:
             return self.COAL_MAX_COST - self.get_market_coal_count()
     
+    def _get_market_count(self, resource_type: ResourceType) -> int:
+        if resource_type == ResourceType.COAL:
+            return self.get_market_coal_count()
+        if resource_type == ResourceType.IRON:
+            return self.get_market_iron_count()
+        return 0
+
     def _calculate_resource_cost(
         self, 
         resource_type: ResourceType, 
         amount: int
     ) -> int:
-        if resource_type == ResourceType.COAL:
-            current_count = self.get_market_coal_count()
-            max_cost = self.COAL_MAX_COST
-        elif resource_type == ResourceType.IRON:
-            current_count = self.get_market_iron_count()
-            max_cost = self.IRON_MAX_COST
-        else:
-            raise ValueError("Market can only sell iron and coal")
-        
-        total_cost = 0
-        temp_count = current_count
-        
-        for _ in range(amount):
-            if temp_count <= 0:
-                current_cost = max_cost
-            else:
-                current_cost = max_cost - math.ceil(temp_count / 2)
-                temp_count -= 1
-                
-            total_cost += current_cost
-            
-        return total_cost
+        return self.market_tables.buy_cost(resource_type, self._get_market_count(resource_type), amount)
     
     def calculate_coal_cost(self, amount: int) -> int:
-        return self._calculate_resource_cost(ResourceType.COAL, amount)
+        return self.market_tables.buy_cost(ResourceType.COAL, self.state.market.coal_count, amount)
     
     def calculate_iron_cost(self, amount: int) -> int:
-        return self._calculate_resource_cost(ResourceType.IRON, amount)
+        return self.market_tables.buy_cost(ResourceType.IRON, self.state.market.iron_count, amount)
     
     def purchase_resource(
         self, 
@@ -539,9 +883,9 @@ class BoardStateService:
         total_cost = self._calculate_resource_cost(resource_type, amount)
         
         if resource_type == ResourceType.COAL:
-            self.state.market.coal_count = max(0, self.get_market_coal_count() - amount)
+            self._set_market_field('coal_count', max(0, self.get_market_coal_count() - amount))
         elif resource_type == ResourceType.IRON:
-            self.state.market.iron_count = max(0, self.get_market_iron_count() - amount)
+            self._set_market_field('iron_count', max(0, self.get_market_iron_count() - amount))
             
         self.update_market_costs()
         return total_cost
@@ -552,30 +896,7 @@ class BoardStateService:
         resource_type: ResourceType, 
         amount: int
     ) -> int:
-        if resource_type == ResourceType.COAL:
-            current_count = self.get_market_coal_count()
-            max_cost = self.COAL_MAX_COST
-            max_count = self.COAL_MAX_COUNT
-        elif resource_type == ResourceType.IRON:
-            current_count = self.get_market_iron_count()
-            max_cost = self.IRON_MAX_COST
-            max_count = self.IRON_MAX_COUNT
-        else:
-            raise ValueError("Market can only buy iron and coal")
-        
-        total_revenue = 0
-        temp_count = current_count
-        
-        for _ in range(amount):
-            if current_count >= max_count:
-                break
-            # Цена уменьшается по мере увеличения количества на рынке
-            current_price = max_cost - math.ceil((temp_count + 1) / 2)
-            current_price = max(0, current_price)  # Не может быть отрицательной
-            total_revenue += current_price
-            temp_count += 1  # Увеличиваем количество после продажи
-            
-        return total_revenue
+        return self.market_tables.sell_price(resource_type, self._get_market_count(resource_type), amount)
 
     def sell_resource(
         self, 
@@ -585,9 +906,9 @@ class BoardStateService:
         total_revenue = self._calculate_resource_sale_price(resource_type, amount)
         
         if resource_type == ResourceType.COAL:
-            self.state.market.coal_count += amount
+            self._set_market_field('coal_count', self.get_market_coal_count() + amount)
         elif resource_type == ResourceType.IRON:
-            self.state.market.iron_count += amount
+            self._set_market_field('iron_count', self.get_market_iron_count() + amount)
             
         self.update_market_costs()
         return total_revenue
@@ -616,24 +937,28 @@ class BoardStateService:
         return out
     
     def recalculate_income(self, player:Player, keep_points=True):
+        # Переданный объект мог устареть, если игрок уже скопирован при записи
+        player = self.get_player(player.color)
         if keep_points:
             if player.income_points <= 10:
-                player.income = player.income_points - 10
+                income = player.income_points - 10
             elif player.income_points <= 30:
-                player.income = (player.income_points - 10) // 2
+                income = (player.income_points - 10) // 2
             elif player.income_points <= 60:
-                player.income = (10 + player.income_points - 30) // 3
+                income = (10 + player.income_points - 30) // 3
             else:
-                player.income = (20 + player.income_points - 60) // 4
+                income = (20 + player.income_points - 60) // 4
+            self._set_player_field(player, 'income', income)
         else:
             if player.income <= 0:
-                player.income_points = player.income + 10
+                income_points = player.income + 10
             elif player.income <= 10:
-                player.income_points = 2 * player.income + 10
+                income_points = 2 * player.income + 10
             elif player.income <= 20:
-                player.income_points = 3 * player.income
+                income_points = 3 * player.income
             else:
-                player.income_points = 3 * player.income + (player.income % 10)
+                income_points = 3 * player.income + (player.income % 10)
+            self._set_player_field(player, 'income_points', income_points)
 
     def check_wilds(self, color:PlayerColor) -> bool:
         player = self.get_player(color)
@@ -645,10 +970,16 @@ class BoardStateService:
         return self.round_count
     
     def advance_round_count(self):
-        self.state.round_count += 1
+        self._set_state_field('round_count', self.state.round_count + 1)
 
     def get_current_building(self, player:Player, industry:IndustryType) -> Building:
-        return self.building_provider.get_building(industry, player.available_buildings[industry])
+        return self.building_provider.get_building(industry, self.get_player(player.color).available_buildings[industry])
 
     def advance_building_index(self, player:Player, industry:IndustryType):
-        player.available_buildings[industry] += 1
\ No newline at end of file
+        player = self._own_player(player.color)
+        if self.journal is not None:
+            self.journal.record_dict(player.available_buildings)
+        index = player.available_buildings[industry]
+        self.hasher.update_player(player.color, industry, index, index + 1)
+        player.available_buildings[industry] = index + 1
+        self.generations.bump(Generations.PLAYERS)
\ No newline at end of file
@@ -0,0 +1,126 @@
+import random
+from typing import Dict, Tuple
+from ....schema import (
+    City, BuildingSlot, Link, MerchantSlot, IndustryType, LinkType, MerchantType,
+    SlotTopology, CityTopology, LinkTopology, MerchantSlotTopology, intern_topology
+)
+from .resource_tables import ResourceTables
+
+
+class BoardTopology:
+    '''
+    Immutable board layout shared by every game with the same player count. It holds the
+    static record of every slot, city, link and merchant slot; a game only owns the overlay
+    built from it: slot occupancy, link owners and merchant tiles with their beer flags. Each
+    overlay object points at its record, which is shared by every game, copy and determinization.
+    '''
+    _instances: Dict[int, 'BoardTopology'] = {}
+
+    @classmethod
+    def get(cls, player_count: int) -> 'BoardTopology':
+        topology = cls._instances.get(player_count)
+        if topology is None:
+            topology = cls(player_count)
+            cls._instances[player_count] = topology
+        return topology
+
+    def __init__(self, player_count: int):
+        self.player_count = player_count
+        tables = ResourceTables.get()
+        cities_data = tables.cities
+        tokens_data = tables.merchant_tokens
+        links_data = tables.links
+
+        slots: Dict[int, SlotTopology] = {}
+        merchant_slots: Dict[int, MerchantSlotTopology] = {}
+        cities: Dict[str, CityTopology] = {}
+        default_merchant_types: Dict[str, Tuple[MerchantType, ...]] = {}
+        for city_data in cities_data:
+            name = city_data['name']
+            slot_ids = []
+            for slot in city_data.get('building_slots', []):
+                slots[slot['id']] = intern_topology(SlotTopology(
+                    id=slot['id'],
+                    city=name,
+                    industry_type_options=tuple(IndustryType(industry) for industry in slot['industry_type_options'])
+                ))
+                slot_ids.append(slot['id'])
+            mslots = city_data.get('merchant_slots', []) if city_data.get('merchant', False) else []
+            for mslot in mslots:
+                merchant_slots[mslot['id']] = intern_topology(MerchantSlotTopology(id=mslot['id'], city=name))
+            cities[name] = intern_topology(CityTopology(
+                name=name,
+                slot_ids=tuple(slot_ids),
+                is_merchant=city_data.get('merchant', False),
+                merchant_min_players=city_data.get('player_count'),
+                merchant_slot_ids=tuple(mslot['id'] for mslot in mslots)
+            ))
+            default_merchant_types[name] = tuple(MerchantType(mslot['merchant_type']) for mslot in mslots)
+
+        self.slots: Dict[int, SlotTopology] = slots
+        self.merchant_slots: Dict[int, MerchantSlotTopology] = merchant_slots
+        self.cities: Dict[str, CityTopology] = cities
+        self.default_merchant_types: Dict[str, Tuple[MerchantType, ...]] = default_merchant_types
+        self.slot_priority: Dict[str, Dict[IndustryType, Tuple[Tuple[int, ...], ...]]] = {
+            name: self._slot_priority(city) for name, city in cities.items()
+        }
+        self.links: Dict[int, LinkTopology] = {
+            link['id']: intern_topology(LinkTopology(
+                id=link['id'],
+                type=tuple(LinkType(transport) for transport in link['transport']),
+                cities=tuple(link['cities'])
+            )) for link in links_data
+        }
+        self.merchant_tokens: Tuple[MerchantType, ...] = tuple(
+            MerchantType(token['type']) for token in tokens_data if token['player_count'] <= player_count
+        )
+
+    def _slot_priority(self, city: CityTopology) -> Dict[IndustryType, Tuple[Tuple[int, ...], ...]]:
+        '''
+        Slots of a city that allow each industry, grouped into tiers by the number of industry
+        options, fewest first. An industry goes to the first tier that has a free slot.
+        '''
+        priority = {}
+        for industry in IndustryType:
+            tiers: Dict[int, list] = {}
+            for slot_id in city.slot_ids:
+                options = self.slots[slot_id].industry_type_options
+                if industry in options:
+                    tiers.setdefault(len(options), []).append(slot_id)
+            priority[industry] = tuple(tuple(tiers[size]) for size in sorted(tiers))
+        return priority
+
+    def deal_merchant_types(self) -> Dict[int, MerchantType]:
+        '''Случайная раскладка жетонов торговцев: в городах, не участвующих при данном числе игроков, лежат жетоны по умолчанию'''
+        tokens = list(self.merchant_tokens)
+        random.shuffle(tokens)
+        out: Dict[int, MerchantType] = {}
+        for city in self.cities.values():
+            if not city.is_merchant:
+                continue
+            if self.player_count >= city.merchant_min_players:
+                city_types = [tokens.pop() for _ in city.merchant_slot_ids]
+            else:
+                city_types = list(self.default_merchant_types[city.name])
+            for mslot_id in city.merchant_slot_ids:
+                out[mslot_id] = city_types.pop()
+        return out
+
+    def create_cities(self, merchant_types: Dict[int, MerchantType]) -> Dict[str, City]:
+        out: Dict[str, City] = {}
+        for city in self.cities.values():
+            out[city.name] = City(
+                city,
+                {slot_id: self.create_slot(slot_id) for slot_id in city.slot_ids},
+                {
+                    mslot_id: MerchantSlot(self.merchant_slots[mslot_id], merchant_types[mslot_id])
+                    for mslot_id in city.merchant_slot_ids
+                } if city.is_merchant else None
+            )
+        return out
+
+    def create_slot(self, slot_id: int) -> BuildingSlot:
+        return BuildingSlot(self.slots[slot_id])
+
+    def create_links(self) -> Dict[int, Link]:
+        return {link.id: Link(link) for link in self.links.values()}
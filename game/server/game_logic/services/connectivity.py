@@ -0,0 +1,81 @@
+from typing import Dict, Iterable, Tuple
+from .packed_state import BoardIndex
+
+
+class CityConnectivity:
+    '''
+    Union-find over the cities joined by owned links. Within an era links are only ever
+    gained, so taking a link is a near constant time merge; losing links (era change,
+    rollback) replaces the structure instead. Every component keeps its members as a city
+    bitmask (BoardIndex.city_bits), so a component is tested against a set of cities with one AND.
+    '''
+    __slots__ = ('_parent', '_masks', '_index')
+
+    def __init__(self):
+        self._parent: Dict[str, str] = {}
+        self._masks: Dict[str, int] = {}
+        self._index = BoardIndex.get()
+
+    @classmethod
+    def from_links(cls, links: Iterable[Iterable[str]]) -> 'CityConnectivity':
+        connectivity = cls()
+        for cities in links:
+            connectivity.add_link(cities)
+        return connectivity
+
+    def copy(self) -> 'CityConnectivity':
+        other = CityConnectivity.__new__(CityConnectivity)
+        other._parent = self._parent.copy()
+        other._masks = self._masks.copy()
+        other._index = self._index
+        return other
+
+    def add_link(self, cities: Iterable[str]) -> bool:
+        '''Joins the cities of a link; returns whether two components were merged'''
+        merged = False
+        first = None
+        for city in cities:
+            if city not in self._parent:
+                self._parent[city] = city
+                self._masks[city] = self._index.city_bits[city]
+            if first is None:
+                first = city
+            elif self._union(first, city):
+                merged = True
+        return merged
+
+    def find(self, city: str) -> str:
+        '''Root of the city's component; a city outside every owned link is its own root'''
+        parent = self._parent
+        if city not in parent:
+            return city
+        # Сжатие путей делением пополам не меняет корни, поэтому безопасно и для общей копии
+        while parent[city] != city:
+            parent[city] = parent[parent[city]]
+            city = parent[city]
+        return city
+
+    def connected(self, city1: str, city2: str) -> bool:
+        return city1 == city2 or (city1 in self._parent and city2 in self._parent and self.find(city1) == self.find(city2))
+
+    def is_linked(self, city: str) -> bool:
+        return city in self._parent
+
+    def mask(self, city: str) -> int:
+        '''Bitmask of the city's component'''
+        mask = self._masks.get(self.find(city))
+        return self._index.city_bits[city] if mask is None else mask
+
+    def members(self, city: str) -> Tuple[str, ...]:
+        return self._index.mask_cities(self.mask(city))
+
+    def _union(self, city1: str, city2: str) -> bool:
+        root1, root2 = self.find(city1), self.find(city2)
+        if root1 == root2:
+            return False
+        # Меньшая компонента подвешивается к большей
+        if self._masks[root1].bit_count() < self._masks[root2].bit_count():
+            root1, root2 = root2, root1
+        self._parent[root2] = root1
+        self._masks[root1] |= self._masks.pop(root2)
+        return True
@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+from functools import wraps
+from itertools import count
+from typing import Callable, Dict
+
+# Один счётчик на процесс: равные поколения аспекта означают одинаковое содержимое, в том числе у клонов
+_next_generation = count(1).__next__
+
+
+class Generations:
+    '''
+    Generation counter per state aspect. Every mutation of an aspect moves it to a fresh
+    generation, so a derived value cached against the generations it read stays valid exactly
+    as long as none of them moves.
+    '''
+    LINKS = 'links'
+    SLOTS = 'slots'          # постройка, снос и переворот зданий
+    RESOURCES = 'resources'  # ресурсы в зданиях и пиво торговцев
+    MARKET = 'market'
+    HANDS = 'hands'          # руки, колода, сброс
+    PLAYERS = 'players'      # деньги, доход, очки, уровни зданий
+    TURN = 'turn'            # эпоха, очередь ходов, контекст
+    ASPECTS = (LINKS, SLOTS, RESOURCES, MARKET, HANDS, PLAYERS, TURN)
+
+    __slots__ = ('counters',)
+
+    def __init__(self):
+        self.counters: Dict[str, int] = {aspect: _next_generation() for aspect in self.ASPECTS}
+
+    def bump(self, aspect: str) -> None:
+        self.counters[aspect] = _next_generation()
+
+    def bump_all(self) -> None:
+        for aspect in self.ASPECTS:
+            self.counters[aspect] = _next_generation()
+
+    def copy(self) -> 'Generations':
+        other = Generations.__new__(Generations)
+        other.counters = self.counters.copy()
+        return other
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class DerivedCache:
+    '''
+    Derived query results keyed by the query, its arguments and the generations of the aspects
+    it reads. Clones share one cache: generations never repeat, so an entry can only be hit by a
+    state with the same content. Past maxsize the oldest entries go first; entries of moved
+    generations are never hit again, so insertion order is close enough to recency.
+    '''
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.stats: Dict[str, CacheStats] = {}
+        self._entries: Dict[tuple, object] = {}
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.stats.clear()
+
+
+_MISSING = object()
+
+
+def derived(*aspects: str) -> Callable:
+    '''
+    Caches a BoardStateService query against the generations of the given aspects. Arguments
+    must be hashable; the result is shared by every caller and must not be mutated.
+    '''
+    def decorator(func: Callable) -> Callable:
+        name = func.__name__
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            cache: DerivedCache = self.derived_cache
+            counters = self.generations.counters
+            key = (name, args, *map(counters.__getitem__, aspects))
+            if kwargs:
+                key += tuple(kwargs.items())
+            entries = cache._entries
+            value = entries.get(key, _MISSING)
+            stats = cache.stats.get(name)
+            if stats is None:
+                stats = cache.stats[name] = CacheStats()
+            if value is not _MISSING:
+                stats.hits += 1
+                return value
+            stats.misses += 1
+            value = func(self, *args, **kwargs)
+            entries[key] = value
+            if len(entries) > cache.maxsize:
+                del entries[next(iter(entries))]
+            return value
+        return wrapper
+    return decorator
@@ -0,0 +1,108 @@
+import math
+from types import MappingProxyType
+from typing import Mapping, Tuple
+from ....schema import ResourceType
+
+
+class MarketTables:
+    '''
+    Cumulative market prices for every market state, built once per process. buy[count][amount]
+    is what buying amount cubes costs with count cubes on the market, sell[count][amount] what
+    selling them brings. Amounts past the table (more cubes than the market track holds) fall
+    back to walking the track cube by cube.
+    '''
+    COAL_MAX_COST: int = 8
+    IRON_MAX_COST: int = 6
+    COAL_MAX_COUNT: int = 14
+    IRON_MAX_COUNT: int = 10
+
+    _instance = None
+
+    @classmethod
+    def get(cls) -> 'MarketTables':
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        self.limits: Mapping[ResourceType, Tuple[int, int]] = MappingProxyType({
+            ResourceType.COAL: (self.COAL_MAX_COST, self.COAL_MAX_COUNT),
+            ResourceType.IRON: (self.IRON_MAX_COST, self.IRON_MAX_COUNT),
+        })
+        self.buy: Mapping[ResourceType, Tuple[Tuple[int, ...], ...]] = MappingProxyType({
+            resource: self._table(self.walk_buy, resource, max_count) for resource, (_, max_count) in self.limits.items()
+        })
+        self.sell: Mapping[ResourceType, Tuple[Tuple[int, ...], ...]] = MappingProxyType({
+            resource: self._table(self.walk_sell, resource, max_count) for resource, (_, max_count) in self.limits.items()
+        })
+        self.unit_price: Mapping[ResourceType, Tuple[int, ...]] = MappingProxyType({
+            resource: tuple(max_cost - math.ceil(count / 2) for count in range(max_count + 1))
+            for resource, (max_cost, max_count) in self.limits.items()
+        })
+
+    # Таблицы неизменяемы и общие для процесса: копии сервиса состояния ссылаются на тот же экземпляр
+    def __copy__(self) -> 'MarketTables':
+        return self
+
+    def __deepcopy__(self, memo) -> 'MarketTables':
+        return self
+
+    def __reduce__(self):
+        return (MarketTables.get, ())
+
+    @staticmethod
+    def _table(walk, resource: ResourceType, max_count: int) -> Tuple[Tuple[int, ...], ...]:
+        return tuple(
+            tuple(walk(resource, count, amount) for amount in range(max_count + 2))
+            for count in range(max_count + 1)
+        )
+
+    def price(self, resource: ResourceType, count: int) -> int:
+        '''Price of the next cube bought with count cubes on the market'''
+        try:
+            return self.unit_price[resource][count]
+        except IndexError:
+            return self.limits[resource][0] - math.ceil(count / 2)
+
+    def buy_cost(self, resource: ResourceType, count: int, amount: int) -> int:
+        try:
+            return self.buy[resource][count][amount]
+        except (KeyError, IndexError):
+            return self.walk_buy(resource, count, amount)
+
+    def sell_price(self, resource: ResourceType, count: int, amount: int) -> int:
+        try:
+            return self.sell[resource][count][amount]
+        except (KeyError, IndexError):
+            return self.walk_sell(resource, count, amount)
+
+    # --- Cube by cube ---
+    def walk_buy(self, resource: ResourceType, count: int, amount: int) -> int:
+        if resource not in self.limits:
+            raise ValueError("Market can only sell iron and coal")
+        max_cost = self.limits[resource][0]
+        total_cost = 0
+        temp_count = count
+        for _ in range(amount):
+            if temp_count <= 0:
+                current_cost = max_cost
+            else:
+                current_cost = max_cost - math.ceil(temp_count / 2)
+                temp_count -= 1
+            total_cost += current_cost
+        return total_cost
+
+    def walk_sell(self, resource: ResourceType, count: int, amount: int) -> int:
+        if resource not in self.limits:
+            raise ValueError("Market can only buy iron and coal")
+        max_cost, max_count = self.limits[resource]
+        total_revenue = 0
+        temp_count = count
+        for _ in range(amount):
+            if count >= max_count:
+                break
+            # Цена уменьшается по мере увеличения количества на рынке
+            current_price = max(0, max_cost - math.ceil((temp_count + 1) / 2))
+            total_revenue += current_price
+            temp_count += 1
+        return total_revenue
@@ -0,0 +1,368 @@
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+from ....schema import BoardState, Market, Player, PlacedBuilding, City, BuildingSlot, Link, MerchantSlot, Card, CardType, PlayerColor, IndustryType, LinkType, MerchantType, ActionContext
+from .building_provider import BuildingProvider
+from .board_topology import BoardTopology
+from .resource_tables import ResourceTables
+
+
+class BoardIndex:
+    '''
+    Static numbering of the board: cities, building slots, merchant slots and links
+    get a fixed position that every packed state shares.
+    '''
+    _instance = None
+
+    @classmethod
+    def get(cls) -> 'BoardIndex':
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        tables = ResourceTables.get()
+        cities_data = tables.cities
+        links_data = tables.links
+
+        self.city_names: Tuple[str, ...] = tuple(city['name'] for city in cities_data)
+        self.city_is_merchant: Dict[str, bool] = {city['name']: city.get('merchant', False) for city in cities_data}
+        self.city_min_players: Dict[str, Optional[int]] = {city['name']: city.get('player_count') for city in cities_data}
+        self.city_slot_ids: Dict[str, Tuple[int, ...]] = {}
+        self.city_merchant_ids: Dict[str, Tuple[int, ...]] = {}
+        self.slot_options: Dict[int, Tuple[IndustryType, ...]] = {}
+        self.slot_city: Dict[int, str] = {}
+        self.merchant_city: Dict[int, str] = {}
+        for city in cities_data:
+            name = city['name']
+            slot_ids = []
+            for slot in city.get('building_slots', []):
+                slot_ids.append(slot['id'])
+                self.slot_city[slot['id']] = name
+                self.slot_options[slot['id']] = tuple(IndustryType(industry) for industry in slot['industry_type_options'])
+            self.city_slot_ids[name] = tuple(slot_ids)
+            merchant_ids = []
+            for mslot in city.get('merchant_slots', []):
+                merchant_ids.append(mslot['id'])
+                self.merchant_city[mslot['id']] = name
+            self.city_merchant_ids[name] = tuple(merchant_ids)
+
+        self.slot_ids: Tuple[int, ...] = tuple(sorted(self.slot_city))
+        self.slot_pos: Dict[int, int] = {slot_id: pos for pos, slot_id in enumerate(self.slot_ids)}
+        self.merchant_ids: Tuple[int, ...] = tuple(sorted(self.merchant_city))
+        self.merchant_pos: Dict[int, int] = {merchant_id: pos for pos, merchant_id in enumerate(self.merchant_ids)}
+
+        self.link_ids: Tuple[int, ...] = tuple(link['id'] for link in links_data)
+        self.link_pos: Dict[int, int] = {link_id: pos for pos, link_id in enumerate(self.link_ids)}
+        self.link_types: Dict[int, Tuple[str, ...]] = {link['id']: tuple(link['transport']) for link in links_data}
+        self.link_cities: Dict[int, Tuple[str, ...]] = {link['id']: tuple(link['cities']) for link in links_data}
+
+        # Любое множество городов - одно целое, бит на город в порядке city_names
+        self.city_pos: Dict[str, int] = {name: pos for pos, name in enumerate(self.city_names)}
+        self.city_bits: Dict[str, int] = {name: 1 << pos for pos, name in enumerate(self.city_names)}
+        self.link_masks: Dict[int, int] = {link_id: self.city_mask(cities) for link_id, cities in self.link_cities.items()}
+
+    def city_mask(self, cities: Iterable[str]) -> int:
+        mask = 0
+        for city in cities:
+            mask |= self.city_bits[city]
+        return mask
+
+    def mask_cities(self, mask: int) -> Tuple[str, ...]:
+        '''Cities of a mask in board order'''
+        cities = []
+        while mask:
+            low = mask & -mask
+            cities.append(self.city_names[low.bit_length() - 1])
+            mask ^= low
+        return tuple(cities)
+
+
+
+class PackedBoardState:
+    '''
+    BoardState packed into a single fixed-size integer buffer.
+    Cloning is one buffer copy, conversion to and from the dataclass form is lossless.
+    '''
+    TYPECODE = 'i'
+    EMPTY = -1
+
+    COLORS: Tuple[PlayerColor, ...] = tuple(PlayerColor)
+    CONTEXTS: Tuple[ActionContext, ...] = tuple(ActionContext)
+    ERAS: Tuple[LinkType, ...] = tuple(LinkType)
+    INDUSTRIES: Tuple[IndustryType, ...] = tuple(IndustryType)
+    MERCHANT_TYPES: Tuple[MerchantType, ...] = tuple(MerchantType)
+    MAX_PLAYERS = len(COLORS)
+
+    # header
+    ERA = 0
+    TURN_INDEX = 1
+    ACTIONS_LEFT = 2
+    ACTION_CONTEXT = 3
+    SUBACTION_COUNT = 4
+    ROUND_COUNT = 5
+    COAL_COUNT = 6
+    IRON_COUNT = 7
+    COAL_COST = 8
+    IRON_COST = 9
+    PLAYER_COUNT = 10
+    PLAYER_COLORS = 11
+    TURN_ORDER_LEN = PLAYER_COLORS + MAX_PLAYERS
+    TURN_ORDER = TURN_ORDER_LEN + 1
+    HEADER_SIZE = TURN_ORDER + MAX_PLAYERS
+
+    # player block
+    BANK = 0
+    INCOME = 1
+    INCOME_POINTS = 2
+    VICTORY_POINTS = 3
+    MONEY_SPENT = 4
+    HAS_CITY_WILD = 5
+    HAS_INDUSTRY_WILD = 6
+    AVAILABLE_BUILDINGS = 7
+    PLAYER_SIZE = AVAILABLE_BUILDINGS + len(INDUSTRIES)
+
+    # slot block
+    SLOT_BUILDING = 0
+    SLOT_OWNER = 1
+    SLOT_RESOURCES = 2
+    SLOT_FLIPPED = 3
+    SLOT_SIZE = 4
+
+    # merchant block
+    MERCHANT_TYPE = 0
+    MERCHANT_BEER = 1
+    MERCHANT_SIZE = 2
+
+    # card regions: deck, discard, wilds, one hand per player; each is [length, ids...]
+    CARD_CAPACITY = 80
+    CARD_REGION_SIZE = CARD_CAPACITY + 1
+    DECK_REGION = 0
+    DISCARD_REGION = 1
+    WILDS_REGION = 2
+    HAND_REGIONS = 3
+
+    _layout: Optional[Tuple[int, int, int, int, int, int]] = None
+
+    __slots__ = ('buffer',)
+
+    def __init__(self, buffer: array):
+        self.buffer = buffer
+
+    @classmethod
+    def layout(cls) -> Tuple[int, int, int, int, int, int]:
+        '''Offsets of the player, slot, link, merchant and card sections and the total size'''
+        if cls._layout is not None:
+            return cls._layout
+        index = BoardIndex.get()
+        players = cls.HEADER_SIZE
+        slots = players + cls.MAX_PLAYERS * cls.PLAYER_SIZE
+        links = slots + len(index.slot_ids) * cls.SLOT_SIZE
+        merchants = links + len(index.link_ids)
+        cards = merchants + len(index.merchant_ids) * cls.MERCHANT_SIZE
+        size = cards + (cls.HAND_REGIONS + cls.MAX_PLAYERS) * cls.CARD_REGION_SIZE
+        cls._layout = (players, slots, links, merchants, cards, size)
+        return cls._layout
+
+    def clone(self) -> 'PackedBoardState':
+        return PackedBoardState(self.buffer[:])
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PackedBoardState):
+            return NotImplemented
+        return self.buffer == other.buffer
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    # --- Packing ---
+    @classmethod
+    def from_board_state(cls, state: BoardState) -> 'PackedBoardState':
+        index = BoardIndex.get()
+        players_off, slots_off, links_off, merchants_off, cards_off, size = cls.layout()
+        buf = array(cls.TYPECODE, bytes(size * array(cls.TYPECODE).itemsize))
+        color_idx = {color: i for i, color in enumerate(cls.COLORS)}
+
+        buf[cls.ERA] = cls.ERAS.index(state.era)
+        buf[cls.TURN_INDEX] = state.turn_index
+        buf[cls.ACTIONS_LEFT] = state.actions_left
+        buf[cls.ACTION_CONTEXT] = cls.CONTEXTS.index(state.action_context)
+        buf[cls.SUBACTION_COUNT] = state.subaction_count
+        buf[cls.ROUND_COUNT] = state.round_count
+        buf[cls.COAL_COUNT] = state.market.coal_count
+        buf[cls.IRON_COUNT] = state.market.iron_count
+        buf[cls.COAL_COST] = state.market.coal_cost
+        buf[cls.IRON_COST] = state.market.iron_cost
+        buf[cls.PLAYER_COUNT] = len(state.players)
+        for i in range(cls.MAX_PLAYERS):
+            buf[cls.PLAYER_COLORS + i] = cls.EMPTY
+            buf[cls.TURN_ORDER + i] = cls.EMPTY
+        buf[cls.TURN_ORDER_LEN] = len(state.turn_order)
+        for i, color in enumerate(state.turn_order):
+            buf[cls.TURN_ORDER + i] = color_idx[color]
+
+        for i, (color, player) in enumerate(state.players.items()):
+            buf[cls.PLAYER_COLORS + i] = color_idx[color]
+            off = players_off + i * cls.PLAYER_SIZE
+            buf[off + cls.BANK] = player.bank
+            buf[off + cls.INCOME] = player.income
+            buf[off + cls.INCOME_POINTS] = player.income_points
+            buf[off + cls.VICTORY_POINTS] = player.victory_points
+            buf[off + cls.MONEY_SPENT] = player.money_spent
+            buf[off + cls.HAS_CITY_WILD] = player.has_city_wild
+            buf[off + cls.HAS_INDUSTRY_WILD] = player.has_industry_wild
+            for j, industry in enumerate(cls.INDUSTRIES):
+                buf[off + cls.AVAILABLE_BUILDINGS + j] = player.available_buildings[industry]
+            cls._pack_cards(buf, cards_off, cls.HAND_REGIONS + i, player.hand.values())
+
+        for city in state.cities.values():
+            for slot in city.slots.values():
+                off = slots_off + index.slot_pos[slot.id] * cls.SLOT_SIZE
+                building = slot.building_placed
+                if building is None:
+                    buf[off + cls.SLOT_OWNER] = cls.EMPTY
+                    continue
+                buf[off + cls.SLOT_BUILDING] = building.id
+                buf[off + cls.SLOT_OWNER] = color_idx[building.owner]
+                buf[off + cls.SLOT_RESOURCES] = building.resource_count
+                buf[off + cls.SLOT_FLIPPED] = building.flipped
+            if city.merchant_slots:
+                for mslot in city.merchant_slots.values():
+                    off = merchants_off + index.merchant_pos[mslot.id] * cls.MERCHANT_SIZE
+                    buf[off + cls.MERCHANT_TYPE] = cls.MERCHANT_TYPES.index(mslot.merchant_type)
+                    buf[off + cls.MERCHANT_BEER] = mslot.beer_available
+
+        for link in state.links.values():
+            buf[links_off + index.link_pos[link.id]] = cls.EMPTY if link.owner is None else color_idx[link.owner]
+
+        cls._pack_cards(buf, cards_off, cls.DECK_REGION, state.deck)
+        cls._pack_cards(buf, cards_off, cls.DISCARD_REGION, state.discard)
+        cls._pack_cards(buf, cards_off, cls.WILDS_REGION, state.wilds)
+        return cls(buf)
+
+    @classmethod
+    def _pack_cards(cls, buf: array, cards_off: int, region: int, cards) -> None:
+        off = cards_off + region * cls.CARD_REGION_SIZE
+        count = 0
+        for card in cards:
+            count += 1
+            if count > cls.CARD_CAPACITY:
+                raise ValueError(f"Card region {region} exceeds capacity {cls.CARD_CAPACITY}")
+            buf[off + count] = card.id
+        buf[off] = count
+
+    # --- Unpacking ---
+    def to_board_state(self) -> BoardState:
+        # Чтение из списка заметно быстрее, чем из array, а клеток читается несколько сотен
+        return self.unpack(self.buffer.tolist())
+
+    @classmethod
+    def unpack(cls, buf: List[int]) -> BoardState:
+        '''Restores a BoardState from the packed cells given as a plain list'''
+        index = BoardIndex.get()
+        buildings_by_id = BuildingProvider().buildings_by_id
+        players_off, slots_off, links_off, merchants_off, cards_off, _ = cls.layout()
+        colors = cls.COLORS
+        empty = cls.EMPTY
+
+        players: Dict[PlayerColor, Player] = {}
+        for i in range(buf[cls.PLAYER_COUNT]):
+            color = colors[buf[cls.PLAYER_COLORS + i]]
+            off = players_off + i * cls.PLAYER_SIZE
+            players[color] = Player(
+                hand={card.id: card for card in cls._unpack_cards(buf, cards_off, cls.HAND_REGIONS + i)},
+                available_buildings={industry: buf[off + cls.AVAILABLE_BUILDINGS + j] for j, industry in enumerate(cls.INDUSTRIES)},
+                color=color,
+                bank=buf[off + cls.BANK],
+                income=buf[off + cls.INCOME],
+                income_points=buf[off + cls.INCOME_POINTS],
+                victory_points=buf[off + cls.VICTORY_POINTS],
+                money_spent=buf[off + cls.MONEY_SPENT],
+                has_city_wild=bool(buf[off + cls.HAS_CITY_WILD]),
+                has_industry_wild=bool(buf[off + cls.HAS_INDUSTRY_WILD])
+            )
+
+        # Объекты партии собираются прямо из буфера поверх общих записей топологии
+        topology = BoardTopology.get(len(players))
+        cities: Dict[str, City] = {}
+        for city in topology.cities.values():
+            slots: Dict[int, BuildingSlot] = {}
+            for slot_id in city.slot_ids:
+                off = slots_off + index.slot_pos[slot_id] * cls.SLOT_SIZE
+                owner = buf[off + cls.SLOT_OWNER]
+                building = None
+                if owner != empty:
+                    building = PlacedBuilding(
+                        buildings_by_id[buf[off + cls.SLOT_BUILDING]],
+                        colors[owner],
+                        slot_id,
+                        buf[off + cls.SLOT_RESOURCES],
+                        bool(buf[off + cls.SLOT_FLIPPED])
+                    )
+                slots[slot_id] = BuildingSlot(topology.slots[slot_id], building)
+            merchant_slots: Optional[Dict[int, MerchantSlot]] = None
+            if city.is_merchant:
+                merchant_slots = {}
+                for merchant_id in city.merchant_slot_ids:
+                    off = merchants_off + index.merchant_pos[merchant_id] * cls.MERCHANT_SIZE
+                    merchant_slots[merchant_id] = MerchantSlot(
+                        topology.merchant_slots[merchant_id],
+                        cls.MERCHANT_TYPES[buf[off + cls.MERCHANT_TYPE]],
+                        bool(buf[off + cls.MERCHANT_BEER])
+                    )
+            cities[city.name] = City(city, slots, merchant_slots)
+
+        links: Dict[int, Link] = {}
+        for link_id, link in topology.links.items():
+            owner = buf[links_off + index.link_pos[link_id]]
+            links[link_id] = Link(link, None if owner == empty else colors[owner])
+
+        return BoardState(
+            cities=cities,
+            links=links,
+            players=players,
+            market=Market(
+                coal_count=buf[cls.COAL_COUNT],
+                iron_count=buf[cls.IRON_COUNT],
+                coal_cost=buf[cls.COAL_COST],
+                iron_cost=buf[cls.IRON_COST]
+            ),
+            deck=cls._unpack_cards(buf, cards_off, cls.DECK_REGION),
+            era=cls.ERAS[buf[cls.ERA]],
+            turn_order=[colors[buf[cls.TURN_ORDER + i]] for i in range(buf[cls.TURN_ORDER_LEN])],
+            turn_index=buf[cls.TURN_INDEX],
+            actions_left=buf[cls.ACTIONS_LEFT],
+            discard=cls._unpack_cards(buf, cards_off, cls.DISCARD_REGION),
+            wilds=cls._unpack_cards(buf, cards_off, cls.WILDS_REGION),
+            action_context=cls.CONTEXTS[buf[cls.ACTION_CONTEXT]],
+            subaction_count=buf[cls.SUBACTION_COUNT],
+            round_count=buf[cls.ROUND_COUNT]
+        )
+
+    @classmethod
+    def _unpack_cards(cls, buf: List[int], cards_off: int, region: int) -> List[Card]:
+        off = cards_off + region * cls.CARD_REGION_SIZE
+        return [cls.card_from_id(card_id) for card_id in buf[off + 1: off + 1 + buf[off]]]
+
+    @staticmethod
+    def card_from_id(card_id: int) -> Card:
+        card = Card.get(card_id)
+        if card is None:
+            card = Card.intern(Card(id=card_id, card_type=CardType.CITY, value='mock'))
+        return card
+
+    # --- Direct accessors for search code ---
+    def get_era(self) -> LinkType:
+        return self.ERAS[self.buffer[self.ERA]]
+
+    def get_action_context(self) -> ActionContext:
+        return self.CONTEXTS[self.buffer[self.ACTION_CONTEXT]]
+
+    def get_link_owner(self, link_id: int) -> Optional[PlayerColor]:
+        owner = self.buffer[self.layout()[2] + BoardIndex.get().link_pos[link_id]]
+        return None if owner == self.EMPTY else self.COLORS[owner]
+
+    def get_slot_building_id(self, slot_id: int) -> Optional[int]:
+        off = self.layout()[1] + BoardIndex.get().slot_pos[slot_id] * self.SLOT_SIZE
+        if self.buffer[off + self.SLOT_OWNER] == self.EMPTY:
+            return None
+        return self.buffer[off + self.SLOT_BUILDING]
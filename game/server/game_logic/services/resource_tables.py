@@ -0,0 +1,126 @@
+import json
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Tuple
+from ....schema import Building, Card, CardType, IndustryType, ResourceAmounts, ResourceType
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class ResourceTables:
+    '''
+    Every file from game/server/res parsed once per process into read-only, pre-indexed tables.
+    Buildings and cards are shared templates: game code must never mutate them.
+    '''
+    RES_PATH = Path(__file__).resolve().parent.parent.parent / 'res'
+    BUILDING_ROSTER_PATH = RES_PATH / 'building_table.json'
+    CARD_LIST_PATH = RES_PATH / 'card_list.json'
+    CITIES_LIST_PATH = RES_PATH / 'cities_list.json'
+    MERCHANTS_TOKENS_PATH = RES_PATH / 'merchant_tokens.json'
+    LINKS_PATH = RES_PATH / 'city_links.json'
+    INDUSTRY_WILD_ID = 65
+    CITY_WILD_ID = 66
+    PLAYER_COUNTS = (2, 3, 4)
+    _instance = None
+
+    @classmethod
+    def get(cls) -> 'ResourceTables':
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def warm_up(cls) -> 'ResourceTables':
+        '''
+        Parses all tables and builds every derived process-wide cache up front.
+        Meant to be called once at server start or as a worker process initializer,
+        so that the first game or search in the process does not pay for loading.
+        '''
+        from .building_provider import BuildingProvider
+        from .board_topology import BoardTopology
+        from .packed_state import BoardIndex
+        tables = cls.get()
+        BuildingProvider()
+        BoardIndex.get()
+        for player_count in cls.PLAYER_COUNTS:
+            BoardTopology.get(player_count)
+        return tables
+
+    def __init__(self):
+        self.cities: Tuple[Mapping[str, Any], ...] = self._load(self.CITIES_LIST_PATH)
+        self.links: Tuple[Mapping[str, Any], ...] = self._load(self.LINKS_PATH)
+        self.merchant_tokens: Tuple[Mapping[str, Any], ...] = self._load(self.MERCHANTS_TOKENS_PATH)
+        self._build_buildings(self._load(self.BUILDING_ROSTER_PATH))
+        self._build_cards(self._load(self.CARD_LIST_PATH))
+
+    @staticmethod
+    def _load(path: Path) -> Tuple[Mapping[str, Any], ...]:
+        with open(path) as openfile:
+            return _freeze(json.load(openfile))
+
+    def _build_buildings(self, buildings_data: Tuple[Mapping[str, Any], ...]) -> None:
+        by_industry: Dict[IndustryType, list] = {}
+        for building in buildings_data:
+            cost_json = building['cost']
+            cost = ResourceAmounts(
+                iron=int(cost_json.get('iron', cost_json.get(ResourceType.IRON, 0))),
+                coal=int(cost_json.get('coal', cost_json.get(ResourceType.COAL, 0))),
+                beer=int(cost_json.get('beer', cost_json.get(ResourceType.BEER, 0))),
+                money=int(cost_json.get('money', 0))
+            )
+            b = Building(
+                id=building['id'],
+                industry_type=building['industry'],
+                level=building['level'],
+                owner=None,
+                flipped=False,
+                cost=cost,
+                resource_count=building.get('resource_count', 0),
+                victory_points=building['vp'],
+                sell_cost=building.get('sell_cost'),
+                is_developable=building.get('developable', True),
+                link_victory_points=building['conn_vp'],
+                era_exclusion=building.get('era_exclusion'),
+                income=building['income']
+            )
+            by_industry.setdefault(b.industry_type, []).append(b)
+        for industry_buildings in by_industry.values():
+            industry_buildings.sort(key=lambda b: b.level)
+        self.buildings_by_industry: Mapping[IndustryType, Tuple[Building, ...]] = MappingProxyType(
+            {industry: tuple(industry_buildings) for industry, industry_buildings in by_industry.items()}
+        )
+        self.buildings_by_id: Mapping[int, Building] = MappingProxyType(
+            {b.id: b for industry_buildings in self.buildings_by_industry.values() for b in industry_buildings}
+        )
+
+    def _build_cards(self, cards_data: Tuple[Mapping[str, Any], ...]) -> None:
+        cards = tuple(
+            (Card.intern(Card(id=card['id'], card_type=CardType(card['card_type']), value=card['value'])), card['player_count'])
+            for card in cards_data
+        )
+        self._cards = cards
+        # Колода для каждого числа игроков в порядке файла, перемешивается уже при раздаче
+        self._decks: Dict[int, Tuple[Card, ...]] = {}
+        for player_count in self.PLAYER_COUNTS:
+            self.get_deck(player_count)
+        self.wild_cards: Tuple[Card, ...] = (
+            Card.intern(Card(card_type=CardType.INDUSTRY, id=self.INDUSTRY_WILD_ID, value='wild')),
+            Card.intern(Card(card_type=CardType.CITY, id=self.CITY_WILD_ID, value='wild'))
+        )
+        cards_by_id = {card.id: card for card, _ in cards}
+        for wild in self.wild_cards:
+            cards_by_id[wild.id] = wild
+        self.cards_by_id: Mapping[int, Card] = MappingProxyType(cards_by_id)
+
+    def get_deck(self, player_count: int) -> Tuple[Card, ...]:
+        deck = self._decks.get(player_count)
+        if deck is None:
+            deck = tuple(card for card, min_players in self._cards if min_players <= player_count)
+            self._decks[player_count] = deck
+        return deck
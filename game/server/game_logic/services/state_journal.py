@@ -0,0 +1,61 @@
+from dataclasses import dataclass
+from typing import Any, List
+
+
+class StateJournal:
+    '''
+    Records every field mutation applied through BoardStateService so that
+    the state can be rolled back to any earlier mark exactly.
+    '''
+    ATTR = 0
+    DICT = 1
+    APPEND = 2
+    POP = 3
+
+    def __init__(self):
+        self._entries: List[tuple] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def mark(self) -> int:
+        return len(self._entries)
+
+    def record_attr(self, obj: Any, name: str) -> None:
+        self._entries.append((self.ATTR, obj, name, getattr(obj, name)))
+
+    def record_dict(self, container: dict) -> None:
+        # Словари в состоянии маленькие (рука, индексы зданий), снимок сохраняет и порядок ключей
+        self._entries.append((self.DICT, container, container.copy(), None))
+
+    def record_append(self, container: list) -> None:
+        self._entries.append((self.APPEND, container, None, None))
+
+    def record_pop(self, container: list, value: Any) -> None:
+        self._entries.append((self.POP, container, value, None))
+
+    def rollback(self, mark: int) -> None:
+        if mark > len(self._entries):
+            raise ValueError(f"Journal mark {mark} is ahead of the journal ({len(self._entries)} entries), tokens must be undone in reverse order")
+        entries = self._entries
+        while len(entries) > mark:
+            kind, target, a, b = entries.pop()
+            if kind == self.ATTR:
+                setattr(target, a, b)
+            elif kind == self.DICT:
+                target.clear()
+                target.update(a)
+            elif kind == self.APPEND:
+                target.pop()
+            elif kind == self.POP:
+                target.append(a)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+@dataclass(frozen=True)
+class UndoToken:
+    journal: StateJournal
+    mark: int
+    derived: Any = None  # снимок производных данных (ключ Zobrist), взятый вместе с меткой
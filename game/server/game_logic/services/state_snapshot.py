@@ -0,0 +1,139 @@
+import struct
+import sys
+from array import array
+from typing import Dict, List, Tuple, Union
+from ....schema import BoardState, BoardStateExposed, PlayerExposed, PlayerState, PlayerColor
+from .packed_state import PackedBoardState
+
+
+class StateSnapshot:
+    '''
+    Versioned binary snapshot of BoardState, BoardStateExposed and PlayerState.
+    The body is the PackedBoardState buffer stored as little-endian int16, followed by
+    a trailer with what the packed board does not hold (deck and hand sizes of a hidden
+    state, the owner's hand and color, the message). Snapshots are only readable by a
+    process with the same board layout, which the header checks.
+    '''
+    MAGIC = b'BRSS'
+    VERSION = 1
+    # magic, version, kind, packed buffer length, trailer length
+    HEADER = struct.Struct('<4sBBHH')
+    TYPECODE = 'h'
+
+    BOARD_STATE = 0
+    EXPOSED = 1
+    PLAYER_STATE = 2
+
+    NO_MESSAGE = -1
+
+    _swap_bytes = sys.byteorder != 'little'
+
+    @classmethod
+    def dump(cls, obj: Union[BoardState, BoardStateExposed, PlayerState]) -> bytes:
+        # Наследники PlayerState (ActionProcessResult) несут лишние поля, их снимок потерял бы
+        if type(obj) is BoardState:
+            return cls._encode(cls.BOARD_STATE, obj, [])
+        if type(obj) is BoardStateExposed:
+            return cls._encode(cls.EXPOSED, BoardState.cardless(obj), cls._exposed_trailer(obj))
+        if type(obj) is PlayerState:
+            trailer = cls._exposed_trailer(obj.state)
+            trailer.append(PackedBoardState.COLORS.index(obj.your_color))
+            trailer.append(len(obj.your_hand))
+            trailer.extend(obj.your_hand)
+            message = b''
+            if obj.message is None:
+                trailer.append(cls.NO_MESSAGE)
+            else:
+                message = obj.message.encode()
+                trailer.append(len(message))
+            return cls._encode(cls.PLAYER_STATE, BoardState.cardless(obj.state), trailer) + message
+        raise TypeError(f"Cannot snapshot {type(obj).__name__}")
+
+    @classmethod
+    def load(cls, data: bytes) -> Union[BoardState, BoardStateExposed, PlayerState]:
+        kind, state, trailer, rest = cls._decode(data)
+        if kind == cls.BOARD_STATE:
+            return state
+        exposed = cls._expose(state, trailer)
+        if kind == cls.EXPOSED:
+            return exposed
+        pos = 1 + len(state.players)
+        your_color = PackedBoardState.COLORS[trailer[pos]]
+        hand_len = trailer[pos + 1]
+        your_hand = {
+            card_id: PackedBoardState.card_from_id(card_id)
+            for card_id in trailer[pos + 2: pos + 2 + hand_len]
+        }
+        message_len = trailer[pos + 2 + hand_len]
+        message = None if message_len == cls.NO_MESSAGE else bytes(rest[:message_len]).decode()
+        return PlayerState.model_construct(message=message, state=exposed, your_hand=your_hand, your_color=your_color)
+
+    # --- Encoding ---
+    @classmethod
+    def _encode(cls, kind: int, state: BoardState, trailer: List[int]) -> bytes:
+        buffer = PackedBoardState.from_board_state(state).buffer
+        body = array(cls.TYPECODE, buffer)
+        body.extend(trailer)
+        if cls._swap_bytes:
+            body.byteswap()
+        return cls.HEADER.pack(cls.MAGIC, cls.VERSION, kind, len(buffer), len(trailer)) + body.tobytes()
+
+    @staticmethod
+    def _exposed_trailer(exposed: BoardStateExposed) -> List[int]:
+        trailer = [exposed.deck_size]
+        trailer.extend(player.hand_size for player in exposed.players.values())
+        return trailer
+
+    # --- Decoding ---
+    @classmethod
+    def _decode(cls, data: bytes) -> Tuple[int, BoardState, List[int], memoryview]:
+        magic, version, kind, packed_len, trailer_len = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC:
+            raise ValueError("Not a state snapshot")
+        if version != cls.VERSION:
+            raise ValueError(f"Unsupported snapshot version {version}, expected {cls.VERSION}")
+        if packed_len != PackedBoardState.layout()[-1]:
+            raise ValueError(f"Snapshot board layout has {packed_len} cells, this board has {PackedBoardState.layout()[-1]}")
+
+        view = memoryview(data)
+        body_end = cls.HEADER.size + (packed_len + trailer_len) * array(cls.TYPECODE).itemsize
+        body = array(cls.TYPECODE)
+        body.frombytes(view[cls.HEADER.size:body_end])
+        if cls._swap_bytes:
+            body.byteswap()
+        # Клетки читаются списком сразу в объекты партии, без промежуточного PackedBoardState
+        cells = body.tolist()
+        return kind, PackedBoardState.unpack(cells[:packed_len]), cells[packed_len:], view[body_end:]
+
+    @staticmethod
+    def _expose(state: BoardState, trailer: List[int]) -> BoardStateExposed:
+        players: Dict[PlayerColor, PlayerExposed] = {}
+        for i, (color, player) in enumerate(state.players.items()):
+            players[color] = PlayerExposed.model_construct(
+                hand_size=trailer[1 + i],
+                available_buildings=player.available_buildings,
+                color=color,
+                bank=player.bank,
+                income=player.income,
+                income_points=player.income_points,
+                victory_points=player.victory_points,
+                money_spent=player.money_spent,
+                has_city_wild=player.has_city_wild,
+                has_industry_wild=player.has_industry_wild
+            )
+        return BoardStateExposed.model_construct(
+            cities=state.cities,
+            links=state.links,
+            players=players,
+            market=state.market,
+            deck_size=trailer[0],
+            era=state.era,
+            turn_order=state.turn_order,
+            turn_index=state.turn_index,
+            actions_left=state.actions_left,
+            discard=state.discard,
+            wilds=state.wilds,
+            action_context=state.action_context,
+            subaction_count=state.subaction_count,
+            round_count=state.round_count
+        )
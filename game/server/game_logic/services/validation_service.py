@@ -1,5 +1,5 @@
-from ....schema import Action, Player, ValidationResult, ActionType, BoardState
-from typing import Dict
+from ....schema import Action, Player, ValidationResult, ActionType, BoardState, BuildAction, SellAction, ShortfallAction, NetworkAction, ResourceAction
+from typing import Dict, List, Optional
 from .validators import ActionValidator, PassValidator, ScoutValidator, LoanValidator, DevelopValidator, NetworkValidator, BuildValidator, SellValidator, CommitValidator, ShortfallValidator
 from .event_bus import EventBus, ValidationEvent
 from ..action_cat_provider import ActionsCatProvider
@@ -38,6 +38,35 @@ class ActionValidationService():
             ))
         return result
     
+    def validate_many(self, actions:List[Action], board_state:BoardStateService, player: Player) -> List[ValidationResult]:
+        '''
+        Validates candidate actions against one state, one result per action in order.
+        An action referring to a slot or link that does not exist is rejected instead of raising.
+        '''
+        results = []
+        for action in actions:
+            # Кандидат со ссылкой на несуществующий слот или связь не должен ронять всю пачку
+            result = self._validate_references(action, board_state)
+            if result is None:
+                result = self.validate_action(action, board_state, player)
+            results.append(result)
+        return results
+
+    def _validate_references(self, action:Action, board_state:BoardStateService) -> Optional[ValidationResult]:
+        if isinstance(action, (BuildAction, SellAction, ShortfallAction)):
+            if action.slot_id is not None and board_state.get_building_slot(action.slot_id) is None:
+                return ValidationResult(is_valid=False, message=f"Malformed action: slot {action.slot_id} does not exist")
+        elif isinstance(action, NetworkAction):
+            if action.link_id not in board_state.get_links():
+                return ValidationResult(is_valid=False, message=f"Malformed action: link {action.link_id} does not exist")
+        if isinstance(action, ResourceAction):
+            for resource in action.resources_used:
+                if resource.building_slot_id is not None and board_state.get_building_slot(resource.building_slot_id) is None:
+                    return ValidationResult(is_valid=False, message=f"Malformed action: slot {resource.building_slot_id} does not exist")
+                if resource.merchant_slot_id is not None and board_state.get_merchant_slot(resource.merchant_slot_id) is None:
+                    return ValidationResult(is_valid=False, message=f"Malformed action: merchant slot {resource.merchant_slot_id} does not exist")
+        return None
+
     def _validate_action_context(self, action_context, action) -> ValidationResult:
             allowed_actions = self.context_map[action_context]
             is_allowed = isinstance(action, allowed_actions)
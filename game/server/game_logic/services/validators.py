@@ -43,13 +43,14 @@ def validate_resources(func):
         if not preference_validation.is_valid:
             return preference_validation
 
-        if isinstance(action, BuildAction):
-            city_name = game_state.get_building_slot(action.slot_id).city
-            link_id = None
-        elif isinstance(action, NetworkAction):
-            city_name = None
-            link_id = action.link_id
-        
+        # Предпочтение ближнего угля проверяется и для стройки, и для связи
+        if isinstance(action, (BuildAction, NetworkAction)):
+            if isinstance(action, BuildAction):
+                city_name = game_state.get_building_slot(action.slot_id).city
+                link_id = None
+            else:
+                city_name = None
+                link_id = action.link_id
             coal_validation = self._validate_coal_preference(game_state, action.resources_used, city_name=city_name, link_id=link_id)
             if not coal_validation.is_valid:
                 return coal_validation
@@ -85,38 +86,35 @@ class BaseValidator(ActionValidator, ABC):
         return ValidationResult(is_valid=True)
             
     def _validate_coal_preference(self, game_state:BoardStateService, resources: List[ResourceSource], city_name:str=None, link_id:int = None) -> ValidationResult:
-        coal_in_resources = any(resource.resource_type == ResourceType.COAL for resource in resources)
-        if not coal_in_resources:
+        resource_requests = [resource for resource in resources if resource.resource_type == ResourceType.COAL]
+        if not resource_requests:
             return ValidationResult(is_valid=True)
         if city_name:
-            available_player_sources = game_state.get_player_coal_locations(city_name=city_name)
+            coal_rings = game_state.get_coal_rings(city_name=city_name)
         elif link_id:
-            available_player_sources = game_state.get_player_coal_locations(link_id=link_id)
+            coal_rings = game_state.get_coal_rings(link_id=link_id)
         else:
             raise ValueError("Must provide either city name or link id")
-        resource_requests = [resource for resource in resources if resource.resource_type == ResourceType.COAL]
         asking_amount = len(resource_requests)
-        requested_cities = [game_state.get_building_slot(resource.building_slot_id).city for resource in resource_requests if resource.building_slot_id is not None]
-        distance_groups = defaultdict(list)
-        for city, distance in available_player_sources.items():
-            distance_groups[distance].append(city)
-        sorted_distances = sorted(distance_groups.keys())
+        requested_bits = [game_state.get_city_bit(game_state.get_building_slot(resource.building_slot_id).city) for resource in resource_requests if resource.building_slot_id is not None]
         remaining_amount = asking_amount
         found_incomplete_group = False
 
-        for distance in sorted_distances:
+        # Кольцо - маска угольных городов на одном расстоянии, от ближних к дальним
+        for group in coal_rings:
+            if not group:
+                continue
+            requested_group_consumption = sum(1 for bit in requested_bits if bit & group)
             if found_incomplete_group:
-                for city in distance_groups[distance]:
-                    if city in requested_cities:
-                        return False
+                if requested_group_consumption:
+                    return ValidationResult(is_valid=False, message="Distant coal requested while nearer coal is left")
                 continue
 
-            group_cities = distance_groups[distance]
+            group_cities = game_state.city_index.mask_cities(group)
             total_group_resource = sum(game_state.get_resource_amount_in_city(city_name=city, resource_type=ResourceType.COAL) for city in group_cities)
             expected_group_consumption = min(remaining_amount, total_group_resource)
-            requested_group_consumption = len([resource for resource in resource_requests if game_state.get_building_slot(resource.building_slot_id).city in group_cities])
             if requested_group_consumption != expected_group_consumption:
-                return ValidationResult(is_valid=False, message=f"Cities {group_cities} have coal consumption preference")
+                return ValidationResult(is_valid=False, message=f"Cities {list(group_cities)} have coal consumption preference")
             
             remaining_amount -= requested_group_consumption
             if expected_group_consumption < total_group_resource:
@@ -164,7 +162,7 @@ class BaseValidator(ActionValidator, ABC):
                     elif isinstance(action, NetworkAction):
                         action:NetworkAction
                         link = game_state.get_link(action.link_id)
-                        connected = any(game_state.are_connected(city, coal_city) for city in link.cities)
+                        connected = game_state.get_link_component_mask(link.id) & game_state.get_city_bit(coal_city)
                         if not connected:
                             return ValidationResult(is_valid=False, message=f"Link {action.link_id} is not connected to city {coal_city}")
                 else:
@@ -177,7 +175,7 @@ class BaseValidator(ActionValidator, ABC):
                     elif isinstance(action, NetworkAction):
                         action:NetworkAction
                         link = game_state.get_link(action.link_id)
-                        connected = any(game_state.market_access_exists(city) for city in link.cities)
+                        connected = game_state.get_link_component_mask(link.id) & game_state.get_merchant_city_mask()
                         if not connected:
                             return ValidationResult(is_valid=False, message=f"Link {action.link_id} is not connected to city {coal_city}")
 
@@ -249,10 +247,9 @@ class NetworkValidator(BaseValidator):
         if game_state.get_era() not in link.type:
             return ValidationResult(is_valid=False, message=f"Link {link.id} doesn't support transport type {game_state.get_era()}")
         
-        network = game_state.get_player_network(player.color)
-        if not network:
-            if not set(link.cities) & network:
-                return ValidationResult(is_valid=False, message="Link not in player's network")
+        # До перехода на маски эта проверка была вложена в 'if not network' и никогда не срабатывала
+        if not game_state.get_link_mask(link.id) & game_state.get_network_mask(player.color):
+            return ValidationResult(is_valid=False, message="Link not in player's network")
 
         for resource in action.resources_used:
             if resource.resource_type == ResourceType.BEER:
@@ -261,7 +258,7 @@ class NetworkValidator(BaseValidator):
                 brewery = game_state.get_building_slot(resource.building_slot_id).building_placed
                 if not brewery.owner == player.color:
                     beer_city = game_state.get_building_slot(resource.building_slot_id).city
-                    connected = any(game_state.are_connected(city, beer_city) for city in link.cities)
+                    connected = game_state.get_link_component_mask(link.id) & game_state.get_city_bit(beer_city)
                     if not connected:
                         return ValidationResult(is_valid=False, message=f"Link {link.id} is not connected to the city {beer_city}")
         return ValidationResult(is_valid=True)
@@ -305,49 +302,53 @@ class BuildValidator(BaseValidator):
             return ValidationResult(is_valid=False, message='wut?')
         
         if action.industry not in slot.industry_type_options:
-            return ValidationResult(is_valid=False, message=f"Can't build {building.industry_type} in a slot that supports {slot.industry_type_options}")
+            return ValidationResult(is_valid=False, message=f"Can't build {building.industry_type} in a slot that supports {list(slot.industry_type_options)}")
 
         city = game_state.get_city(slot.city)
         for s in city.slots.values():
             if (len(s.industry_type_options) < len(slot.industry_type_options)) and action.industry in s.industry_type_options:
-                return ValidationResult(is_valid=False, message=f"Can't build in slot {slot.id} when {s.id} has priority for this industry")
+                if s.building_placed is None or self._validate_overbuild(s.building_placed, building, game_state, player).is_valid:
+                    return ValidationResult(is_valid=False, message=f"Can't build in slot {slot.id} when {s.id} has priority for this industry")
             if s.building_placed is not None:
-                if s.id == action.slot_id:
-                    return ValidationResult(is_valid=False, message=f"Slot {slot.id} already occupied")
                 if s.building_placed.owner == player.color and game_state.get_era() == LinkType.CANAL:
                     return ValidationResult(is_valid=False, message=f"Can't build two buildings in one city during canal era")
         
         # Overbuilding validation
         if slot.building_placed is not None:
-            existing_building = slot.building_placed
-            
-            # Level check
-            if existing_building.level >= building.level:
-                return ValidationResult(is_valid=False, message=f"Cannot overbuild level {existing_building.level} with level {building.level}")
-            
-            # Ownership check
-            if existing_building.owner != player.color:
-                # Industry type check
-                if existing_building.industry_type not in self.OVERBUILDABLE:
-                    return ValidationResult(is_valid=False, message=f"Cannot overbuild {existing_building.industry_type} of another player")
-                
-                # Resource availability check
-                resource_type = ResourceType(existing_building.industry_type)
-                resource_in_market = (
-                    game_state.market.coal_count > 0 if resource_type == ResourceType.COAL
-                    else game_state.market.iron_count > 0
-                )
-                
-                if resource_in_market:
-                    return ValidationResult(is_valid=False, message=f"Cannot overbuild {resource_type} while it's available in market")
-                
-                # Check cities for resource presence
-                for city in game_state.cities.values():
-                    if game_state.get_resource_amount_in_city(city.name, resource_type) > 0:
-                        return ValidationResult(is_valid=False, message=f"Cannot overbuild {resource_type} while present in {city.name}")
+            return self._validate_overbuild(slot.building_placed, building, game_state, player)
 
         return ValidationResult(is_valid=True)  
 
+    def _validate_overbuild(self, existing_building, building, game_state:BoardStateService, player:Player) -> ValidationResult:
+        if existing_building.industry_type != building.industry_type:
+            return ValidationResult(is_valid=False, message=f"Slot {existing_building.slot_id} already occupied")
+        
+        # Level check
+        if existing_building.level >= building.level:
+            return ValidationResult(is_valid=False, message=f"Cannot overbuild level {existing_building.level} with level {building.level}")
+        
+        # Ownership check
+        if existing_building.owner != player.color:
+            # Industry type check
+            if existing_building.industry_type not in self.OVERBUILDABLE:
+                return ValidationResult(is_valid=False, message=f"Cannot overbuild {existing_building.industry_type} of another player")
+            
+            # Resource availability check
+            resource_type = ResourceType(existing_building.industry_type)
+            resource_in_market = (
+                game_state.get_market_coal_count() > 0 if resource_type == ResourceType.COAL
+                else game_state.get_market_iron_count() > 0
+            )
+            
+            if resource_in_market:
+                return ValidationResult(is_valid=False, message=f"Cannot overbuild {resource_type} while it's available in market")
+            
+            # Check cities for resource presence
+            for city in game_state.get_cities().values():
+                if game_state.get_resource_amount_in_city(city.name, resource_type) > 0:
+                    return ValidationResult(is_valid=False, message=f"Cannot overbuild {resource_type} while present in {city.name}")
+        return ValidationResult(is_valid=True)
+
     def _validate_base_action_cost(self, action:BuildAction, game_state:BoardStateService, player:Player):
         building = game_state.get_current_building(player, action.industry)
         moneyless_cost = copy(building.get_cost())
@@ -391,6 +392,8 @@ class SellValidator(BaseValidator):
 
             elif resource.building_slot_id is not None:
                 brewery = game_state.get_building_slot(resource.building_slot_id)
+                if brewery.building_placed is None:
+                    return ValidationResult(is_valid=False, message=f"Selected slot {brewery.id} has no building")
                 if brewery.building_placed.owner != player.color:
                     connected = game_state.are_connected(slot.city, brewery.city)
                     if not connected:
@@ -413,6 +416,10 @@ class ShortfallValidator(BaseValidator):
     def validate(self, action, game_state, player):
         if player.bank >= 0:
             return ValidationResult(is_valid=False, message=f'Player {player.color} is not in shortfall')
+        if action.slot_id:
+            slot = game_state.get_building_slot(action.slot_id)
+            if slot is None or slot.building_placed is None or slot.building_placed.owner != player.color:
+                return ValidationResult(is_valid=False, message=f'Slot {action.slot_id} has no building of player {player.color}')
         if not action.slot_id:
             for building in game_state.iter_placed_buildings():
                 if building.owner == player.color:
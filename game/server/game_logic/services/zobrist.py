@@ -0,0 +1,132 @@
+import hashlib
+from typing import Dict, Hashable, Optional, Tuple
+from ....schema import BoardState, PlacedBuilding, PlayerColor
+
+
+class ZobristHasher:
+    '''
+    Incremental 64-bit Zobrist key of a BoardState.
+    Every feature of the state (slot contents, link owners, market counts, player scalars,
+    hand cards, turn fields) has a fixed random key; the state key is the XOR of the keys
+    of all present features, so a mutation only toggles the old and the new feature.
+    The key is also kept per aspect (turn, market, links, each city, each player).
+    '''
+    TURN = ('turn',)
+    MARKET = ('market',)
+    LINKS = ('links',)
+    PLAYER_FIELDS = ('bank', 'income', 'income_points', 'victory_points', 'money_spent', 'has_city_wild', 'has_industry_wild')
+    TURN_FIELDS = ('era', 'turn_order', 'turn_index', 'actions_left', 'action_context', 'subaction_count', 'round_count')
+
+    _keys: Dict[tuple, int] = {}
+
+    def __init__(self, state: Optional[BoardState] = None):
+        self.value = 0
+        self.aspects: Dict[Hashable, int] = {}
+        if state is not None:
+            self.recompute(state)
+
+    @classmethod
+    def key(cls, feature: tuple) -> int:
+        key = cls._keys.get(feature)
+        if key is None:
+            # Ключ зависит только от содержимого признака, поэтому стабилен между процессами
+            digest = hashlib.blake2b('|'.join(str(part) for part in feature).encode(), digest_size=8).digest()
+            key = int.from_bytes(digest, 'little')
+            cls._keys[feature] = key
+        return key
+
+    @staticmethod
+    def city_aspect(city_name: str) -> tuple:
+        return ('city', city_name)
+
+    @staticmethod
+    def player_aspect(color: PlayerColor) -> tuple:
+        return ('player', color)
+
+    @staticmethod
+    def building_feature(slot_id: int, building: Optional[PlacedBuilding]) -> Optional[tuple]:
+        if building is None:
+            return None
+        return ('slot', slot_id, building.id, building.owner, building.resource_count, building.flipped)
+
+    def toggle(self, aspect: Hashable, feature: Optional[tuple]) -> None:
+        if feature is None:
+            return
+        key = self.key(feature)
+        self.value ^= key
+        self.aspects[aspect] = self.aspects.get(aspect, 0) ^ key
+
+    def replace(self, aspect: Hashable, old_feature: Optional[tuple], new_feature: Optional[tuple]) -> None:
+        if old_feature == new_feature:
+            return
+        self.toggle(aspect, old_feature)
+        self.toggle(aspect, new_feature)
+
+    # --- Typed updates used by BoardStateService mutators ---
+    def update_turn(self, name: str, old, new) -> None:
+        if isinstance(old, list):
+            old, new = tuple(old), tuple(new)
+        self.replace(self.TURN, ('turn', name, old), ('turn', name, new))
+
+    def update_market(self, name: str, old: int, new: int) -> None:
+        self.replace(self.MARKET, ('market', name, old), ('market', name, new))
+
+    def update_link(self, link_id: int, old_owner: Optional[str], new_owner: Optional[str]) -> None:
+        self.replace(
+            self.LINKS,
+            None if old_owner is None else ('link', link_id, old_owner),
+            None if new_owner is None else ('link', link_id, new_owner)
+        )
+
+    def update_slot(self, city_name: str, old_feature: Optional[tuple], new_feature: Optional[tuple]) -> None:
+        self.replace(self.city_aspect(city_name), old_feature, new_feature)
+
+    def update_merchant(self, city_name: str, merchant_slot_id: int, merchant_type: str, old: bool, new: bool) -> None:
+        self.replace(self.city_aspect(city_name), ('merchant', merchant_slot_id, merchant_type, old), ('merchant', merchant_slot_id, merchant_type, new))
+
+    def update_player(self, color: PlayerColor, name: str, old, new) -> None:
+        self.replace(self.player_aspect(color), ('player', color, name, old), ('player', color, name, new))
+
+    def toggle_card(self, color: PlayerColor, card_id: int) -> None:
+        self.toggle(self.player_aspect(color), ('card', color, card_id))
+
+    # --- Full computation and snapshots ---
+    def recompute(self, state: BoardState) -> int:
+        self.value = 0
+        self.aspects = {}
+        for name in self.TURN_FIELDS:
+            value = getattr(state, name)
+            self.toggle(self.TURN, ('turn', name, tuple(value) if isinstance(value, list) else value))
+        self.toggle(self.TURN, ('turn', 'deck_size', len(state.deck)))
+
+        self.toggle(self.MARKET, ('market', 'coal_count', state.market.coal_count))
+        self.toggle(self.MARKET, ('market', 'iron_count', state.market.iron_count))
+
+        for link in state.links.values():
+            if link.owner is not None:
+                self.toggle(self.LINKS, ('link', link.id, link.owner))
+
+        for city in state.cities.values():
+            aspect = self.city_aspect(city.name)
+            for slot in city.slots.values():
+                self.toggle(aspect, self.building_feature(slot.id, slot.building_placed))
+            if city.merchant_slots:
+                for mslot in city.merchant_slots.values():
+                    self.toggle(aspect, ('merchant', mslot.id, mslot.merchant_type, mslot.beer_available))
+
+        for color, player in state.players.items():
+            aspect = self.player_aspect(color)
+            for name in self.PLAYER_FIELDS:
+                self.toggle(aspect, ('player', color, name, getattr(player, name)))
+            for industry, index in player.available_buildings.items():
+                self.toggle(aspect, ('player', color, industry, index))
+            for card_id in player.hand:
+                self.toggle(aspect, ('card', color, card_id))
+        return self.value
+
+    def snapshot(self) -> Tuple[int, Dict[Hashable, int]]:
+        return self.value, self.aspects.copy()
+
+    def restore(self, snapshot: Tuple[int, Dict[Hashable, int]]) -> None:
+        self.value, aspects = snapshot
+        self.aspects = aspects.copy()
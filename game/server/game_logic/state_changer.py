@@ -1,9 +1,9 @@
-from ...schema import Action, Player, ActionType, ActionContext, CardType, ResourceAction, ResourceAmounts, BuildAction, SellAction, NetworkAction, DevelopAction, IndustryType, Building, ResourceType
+from ...schema import Action, Player, ActionType, ActionContext, CardType, ResourceAction, ResourceAmounts, BuildAction, SellAction, NetworkAction, DevelopAction, IndustryType, PlacedBuilding, ResourceType
 from collections import defaultdict
 from .services.event_bus import EventBus
 from .turn_manager import TurnManager
 from .services.board_state_service import BoardStateService
-from copy import deepcopy
+from .services.state_journal import UndoToken
 import logging
 
 class StateChanger:
@@ -20,7 +20,7 @@ class StateChanger:
         # Убираем карту если есть
         if action.card_id is not None and isinstance(action.card_id, int):
             try:
-                card = player.hand.pop(action.card_id)
+                card = state_service.take_card_from_hand(player.color, action.card_id)
             except KeyError as k:
                 logging.critical(f"ATTEMPTED TO ACCESS CARD {k}, ACTIVE PLAYER HAND HAS: {sorted(state_service.get_active_player().hand.keys())}")
                 raise
@@ -28,30 +28,23 @@ class StateChanger:
                 state_service.append_discard(card)
             else:
                 if card.card_type == CardType.CITY:
-                    player.has_city_wild = False
+                    state_service.set_has_city_wild(player.color, False)
                 elif card.card_type == CardType.INDUSTRY:
-                    player.has_industry_wild = False
+                    state_service.set_has_industry_wild(player.color, False)
 
         # Обрабатываем выбор ресурсов
         if isinstance(action, ResourceAction):
             market_amounts = defaultdict(int)
             for resource in action.resources_used:
                 if resource.building_slot_id is not None:
-                    building = state_service.get_building_slot(resource.building_slot_id).building_placed
-                    building.resource_count -= 1
+                    building = state_service.consume_building_resource(resource.building_slot_id)
                     if building.resource_count == 0:
-                        if building.industry_type == IndustryType.COAL:
-                            state_service.invalidate_coal_cache()
-                        elif building.industry_type == IndustryType.IRON:
-                            state_service.invalidate_iron_cache()
-                        building.flipped = True
-                        owner = state_service.get_player(building.owner)
-                        owner.income_points += building.income
-                        state_service.recalculate_income(owner)
+                        state_service.flip_building(resource.building_slot_id)
+                        state_service.add_income_points(building.owner, building.income)
+                        state_service.recalculate_income(state_service.get_player(building.owner))
 
                 elif resource.merchant_slot_id is not None:
-                    merchant = state_service.get_merchant_slot(resource.merchant_slot_id)
-                    merchant.beer_available = False
+                    state_service.use_merchant_beer(resource.merchant_slot_id)
 
                 else:
                     market_amounts[resource.resource_type] += 1
@@ -61,29 +54,28 @@ class StateChanger:
                 market_cost += state_service.purchase_resource(rtype, amount)
             base_cost = self._get_resource_amounts(state_service, action, player).money
             spent = base_cost + market_cost
-            player.bank -= spent
-            player.money_spent += spent
+            state_service.add_bank(player.color, -spent)
+            state_service.add_money_spent(player.color, spent)
 
         # Изменения специфичные для действий
         if action.action == ActionType.PASS:
             pass # lmao
 
         elif action.action == ActionType.LOAN:
-            player.income -= 3
-            player.bank += 30
+            state_service.add_income(player.color, -3)
+            state_service.add_bank(player.color, 30)
             state_service.recalculate_income(player, keep_points=False)
 
         elif action.action == ActionType.SCOUT:
             for card_id in action.card_id:
-                state_service.append_discard(player.hand[card_id])
-                player.hand.pop(card_id)
+                state_service.append_discard(state_service.take_card_from_hand(player.color, card_id))
             city_joker = next(j for j in state_service.get_wild_cards() if j.card_type == CardType.CITY)
             ind_joker = next(j for j in state_service.get_wild_cards() if j.card_type == CardType.INDUSTRY)
 
-            player.hand[city_joker.id] = city_joker
-            player.hand[ind_joker.id] = ind_joker
-            player.has_city_wild = True
-            player.has_industry_wild = True
+            state_service.give_player_a_card(player.color, city_joker)
+            state_service.give_player_a_card(player.color, ind_joker)
+            state_service.set_has_city_wild(player.color, True)
+            state_service.set_has_industry_wild(player.color, True)
         
         elif action.action == ActionType.DEVELOP:
             state_service.advance_building_index(player, action.industry)
@@ -92,47 +84,32 @@ class StateChanger:
         elif action.action == ActionType.NETWORK:
             state_service.set_link_owner(action.link_id, player.color)
             state_service.set_action_context(ActionContext.NETWORK)
-            state_service.invalidate_connectivity_cache()
-            state_service.invalidate_networks_cache()
 
         elif action.action == ActionType.SELL:
-            building = state_service.get_building_slot(action.slot_id).building_placed
-            building.flipped = True
-            owner = state_service.get_player(building.owner)
-            owner.income_points += building.income
+            building = state_service.flip_building(action.slot_id)
+            state_service.add_income_points(building.owner, building.income)
             for resource in action.resources_used:
                 if resource.merchant_slot_id is not None:
                     slot = state_service.get_merchant_slot(resource.merchant_slot_id)
                     self._award_merchant(state_service, slot.city, player)
-                    slot.beer_available = False
+                    state_service.use_merchant_beer(slot.id)
             state_service.recalculate_income(player)
             state_service.set_action_context(ActionContext.SELL)
 
         elif action.action == ActionType.BUILD:
-            building = deepcopy(state_service.get_current_building(player, action.industry))
-            building.owner = player.color
-            building.slot_id = action.slot_id
-            state_service.get_building_slot(action.slot_id).building_placed = building
+            building = PlacedBuilding.from_template(state_service.get_current_building(player, action.industry), player.color, action.slot_id)
+            state_service.place_building(action.slot_id, building)
             self._sell_to_market(state_service, building)
-            if building.industry_type == IndustryType.COAL:
-                state_service.invalidate_coal_cache()
-            elif building.industry_type == IndustryType.IRON:
-                state_service.invalidate_iron_cache()
-            state_service.invalidate_networks_cache()
 
         elif action.action == ActionType.SHORTFALL:
             if action.slot_id:
                 slot = state_service.get_building_slot(action.slot_id)
-                if slot.building_placed.industry_type == IndustryType.COAL:
-                    state_service.invalidate_coal_cache()
-                elif slot.building_placed.industry_type == IndustryType.IRON:
-                    state_service.invalidate_iron_cache()
                 rebate = slot.building_placed.get_cost().money // 2
-                player.bank += rebate
-                slot.building_placed = None
+                state_service.add_bank(player.color, rebate)
+                state_service.remove_building(action.slot_id)
             else:
-                player.victory_points += player.bank
-                player.bank = 0
+                state_service.add_victory_points(player.color, state_service.get_player(player.color).bank)
+                state_service.set_bank(player.color, 0)
             if state_service.in_shortfall():
                 state_service.set_action_context(ActionContext.SHORTFALL)
             else:
@@ -159,14 +136,22 @@ class StateChanger:
 
         
         return state_service
-        
+
+    def apply_action_with_undo(self, action:Action, state_service:BoardStateService, player:Player) -> UndoToken:
+        '''Applies the action in journaling mode, the returned token restores the state exactly'''
+        token = state_service.get_undo_token()
+        self.apply_action(action, state_service, player)
+        return token
+
+    def undo_action(self, token:UndoToken, state_service:BoardStateService) -> None:
+        state_service.rollback(token)
 
     def _commit_action(self, state_service:BoardStateService):
         state_service.set_action_context(ActionContext.MAIN)
         state_service.set_actions_left(state_service.get_actions_left() - 1)
         state_service.reset_subaction_count()
 
-    def _sell_to_market(self, state_service:BoardStateService, building:Building) -> None:
+    def _sell_to_market(self, state_service:BoardStateService, building:PlacedBuilding) -> None:
         if building.industry_type not in (IndustryType.COAL, IndustryType.IRON):
             return
         if building.industry_type == IndustryType.COAL and not state_service.market_access_exists(state_service.get_building_slot(building.slot_id).city):
@@ -176,19 +161,19 @@ class StateChanger:
         if sold_amount <= 0 :
             return
         profit = state_service.sell_resource(ResourceType(building.industry_type), sold_amount)
-        state_service.get_player(building.owner).bank += profit
-        building.resource_count -= sold_amount
+        state_service.add_bank(building.owner, profit)
+        state_service.consume_building_resource(building.slot_id, sold_amount)
 
     def _award_merchant(self, state_service:BoardStateService, city_name:str, player:Player) -> None:
         match city_name:
             case "Warrington":
-                player.bank += 5
+                state_service.add_bank(player.color, 5)
             case "Nottingham":
-                player.victory_points += 3
+                state_service.add_victory_points(player.color, 3)
             case "Shrewsbury":
-                player.victory_points += 4
+                state_service.add_victory_points(player.color, 4)
             case "Oxford":
-                player.income_points += 2
+                state_service.add_income_points(player.color, 2)
             case "Gloucester": # fug
                 state_service.set_action_context(ActionContext.GLOUCESTER_DEVELOP)
 
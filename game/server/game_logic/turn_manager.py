@@ -49,17 +49,15 @@ class TurnManager:
         first_round = state_service.get_current_round() == 1
 
         for player in state_service.get_players().values():
-            player.bank += player.income
+            state_service.add_bank(player.color, player.income)
             
             deck = state_service.get_deck()
             if deck: 
-                card = deck.pop()
-                player.hand[card.id] = card
+                state_service.give_player_a_card(player.color, state_service.draw_card())
                 if not first_round:
-                    card = deck.pop()
-                    player.hand[card.id] = card
+                    state_service.give_player_a_card(player.color, state_service.draw_card())
             
-            player.money_spent = 0
+            state_service.reset_money_spent(player.color)
 
         if any(player.bank < 0 for player in state_service.get_players().values()):
             state_service.set_action_context(ActionContext.SHORTFALL)
@@ -69,45 +67,42 @@ class TurnManager:
     
     def _prepare_next_era(self, state_service:BoardStateService) -> BoardStateService:
         initializer = GameInitializer()
-        state_service.get_board_state().deck = initializer._build_initial_deck(len(state_service.get_players()))
+        state_service.set_deck(initializer._build_initial_deck(len(state_service.get_players())))
         del initializer
         random.shuffle(state_service.get_deck())
 
         for link in state_service.iter_links():
             if link.owner is not None:
                 for city_name in link.cities:
-                    state_service.get_player(link.owner).victory_points += state_service.get_city_link_vps(state_service.get_city(city_name))
-                link.owner = None
+                    state_service.add_victory_points(link.owner, state_service.get_city_link_vps(state_service.get_city(city_name)))
+                state_service.set_link_owner(link.id, None)
 
         for building in state_service.iter_placed_buildings():
             if building.flipped:
-                state_service.get_player(building.owner).victory_points += building.victory_points
+                state_service.add_victory_points(building.owner, building.victory_points)
             if building.level == 1:
-                state_service.get_building_slot(building.slot_id).building_placed = None
+                state_service.remove_building(building.slot_id)
 
         state_service.clear_discard()
 
-        state_service.get_board_state().era = LinkType.RAIL
-
-        state_service.invalidate_coal_cache()
-        state_service.invalidate_connectivity_cache()
-        state_service.invalidate_iron_cache()
-        state_service.invalidate_networks_cache()
+        state_service.set_era(LinkType.RAIL)
 
         for player in state_service.get_players().values():
-            player.hand = {card.id: card for card in [state_service.get_deck().pop() for _ in range(6)]}
+            state_service.set_player_hand(player.color, {card.id: card for card in [state_service.draw_card() for _ in range(6)]})
 
         return state_service
 
     def _conclude_game(self, state_service:BoardStateService) -> BoardStateService:
+        if state_service.journal is not None:
+            state_service.journal.record_attr(self, 'concluded')
         self.concluded = True
         for link in state_service.iter_links():
             if link.owner is not None:
                 for city_name in link.cities:
-                    state_service.get_player(link.owner).victory_points += state_service.get_city_link_vps(state_service.get_city(city_name))
+                    state_service.add_victory_points(link.owner, state_service.get_city_link_vps(state_service.get_city(city_name)))
 
         for building in state_service.iter_placed_buildings():
             if building.flipped:
-                state_service.get_player(building.owner).victory_points += building.victory_points
+                state_service.add_victory_points(building.owner, building.victory_points)
         
         return state_service 
\ No newline at end of file
@@ -4,6 +4,7 @@ from .managers import GameManager
 from fastapi.middleware.cors import CORSMiddleware
 from .endpoints.game_management import router as game_router
 from .endpoints.websocket import router as websocket_router
+from .game_logic.services.resource_tables import ResourceTables
 import logging
 import sys
 
@@ -18,6 +19,9 @@ logging.getLogger().setLevel(logging.DEBUG)
 connection_manager = ConnectionManager()
 game_manager = GameManager()
 
+# Таблицы ресурсов разбираются один раз на процесс, до первой игры
+ResourceTables.warm_up()
+
 app = FastAPI(title="Brass Server", version="1.0.0")
 
 app.include_router(game_router)
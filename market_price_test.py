@@ -0,0 +1,62 @@
+import random
+import time
+from game.server.game_logic.game import Game
+from game.server.game_logic.action_space_generator import ActionSpaceGenerator
+from game.server.game_logic.state_changer import StateChanger
+from game.server.game_logic.services.market_tables import MarketTables
+from game.schema import PlayerColor, ResourceType
+
+action_generator = ActionSpaceGenerator()
+tables = MarketTables.get()
+
+def record(state_service, queries):
+    # Запросы цен, которые встречаются в партии: покупка и продажа любого количества при текущем рынке
+    for resource, count in ((ResourceType.COAL, state_service.get_market_coal_count()), (ResourceType.IRON, state_service.get_market_iron_count())):
+        for amount in range(tables.limits[resource][1] + 3):
+            queries.append((resource, count, amount))
+
+def play(state_service, queries):
+    state_changer = StateChanger(state_service)
+    while not state_service.is_terminal():
+        record(state_service, queries)
+        action = action_generator.sample_action(state_service, state_service.get_active_player().color)
+        if action is None:
+            break
+        state_changer.apply_action(action, state_service, state_service.get_active_player())
+
+queries = []
+for seed in range(4):
+    random.seed(seed)
+    player_count = 2 + seed % 3
+    game = Game()
+    game.start(player_count, list(PlayerColor)[:player_count])
+    state_service = game.state_service
+    play(state_service, queries)
+    # Случайная партия упирается в конец раунда, поэтому эпоху меняем напрямую
+    StateChanger(state_service).turn_manager._prepare_next_era(state_service)
+    play(state_service, queries)
+
+results = [
+    tables.buy_cost(*query) == tables.walk_buy(*query) and tables.sell_price(*query) == tables.walk_sell(*query)
+    for query in queries
+]
+results += [
+    tables.price(resource, count) == tables.walk_buy(resource, count, 1)
+    for resource, (_, max_count) in tables.limits.items()
+    for count in range(1, max_count + 3)
+]
+print(f"{len(results)} checks, all equal {all(results)}")
+
+start = time.perf_counter()
+for _ in range(20):
+    for query in queries:
+        tables.walk_buy(*query)
+        tables.walk_sell(*query)
+walk_time = time.perf_counter() - start
+start = time.perf_counter()
+for _ in range(20):
+    for query in queries:
+        tables.buy_cost(*query)
+        tables.sell_price(*query)
+table_time = time.perf_counter() - start
+print(f"{len(queries) * 20} queries: walk {walk_time:.3f}s, tables {table_time:.3f}s ({walk_time / table_time:.1f}x)")
@@ -0,0 +1,61 @@
+import copy
+import random
+from game.server.game_logic.game import Game
+from game.server.game_logic.action_space_generator import ActionSpaceGenerator
+from game.server.game_logic.state_changer import StateChanger
+from game.server.game_logic.services.board_state_service import BoardStateService
+from game.schema import ActionType, NetworkAction, PlayerColor
+
+action_generator = ActionSpaceGenerator()
+
+def sell_cities(state_service, color):
+    return {
+        state_service.get_building_slot(building.slot_id).city: building.industry_type
+        for building in state_service.get_buildings_by_owner(color)
+        if building.is_sellable()
+    }
+
+def sell_actions(state_service, color):
+    return [action.model_dump_json() for action in action_generator.get_action_space(state_service, color) if action.action == ActionType.SELL]
+
+def check(state_service, color, before, results, counts):
+    # Свежий сервис без кеша: купцы считаются заново по текущим связям
+    fresh = BoardStateService(copy.deepcopy(state_service.get_board_state()))
+    for city, industry in sell_cities(state_service, color).items():
+        reach = state_service.get_merchant_reach(city)
+        results.append(reach == fresh.get_merchant_reach(city))
+        if city in before and not before[city].accepts(industry) and reach.accepts(industry):
+            # Связь подключила купца, которому здание можно продать
+            counts['new merchant'] += 1
+    if state_service.get_active_player().color == color:
+        results.append(sell_actions(state_service, color) == sell_actions(fresh, color))
+
+results = []
+counts = {'new merchant': 0, 'links': 0}
+for seed in range(40):
+    random.seed(seed)
+    player_count = 2 + seed % 3
+    game = Game()
+    game.start(player_count, list(PlayerColor)[:player_count])
+    state_service = game.state_service
+    state_changer = StateChanger(state_service)
+    for era in range(2):
+        while not state_service.is_terminal():
+            color = state_service.get_active_player().color
+            action = action_generator.sample_action(state_service, color)
+            if action is None:
+                break
+            # Купцы до хода берутся из кеша, ход со связью должен его сбросить
+            before = {city: state_service.get_merchant_reach(city) for city in sell_cities(state_service, color)}
+            sell_actions(state_service, color)
+            state_changer.apply_action(action, state_service, state_service.get_active_player())
+            if isinstance(action, NetworkAction):
+                counts['links'] += 1
+                check(state_service, color, before, results, counts)
+        if era == 0:
+            # Случайная партия упирается в конец раунда, поэтому эпоху меняем напрямую
+            state_changer.turn_manager._prepare_next_era(state_service)
+
+print(f"{len(results)} checks, {counts}, all equal {all(results)}")
+assert counts['new merchant'], "no link connected a new merchant to a sellable building"
+assert all(results), "merchant reach is stale after a link"
@@ -0,0 +1,74 @@
+import random
+import time
+from copy import deepcopy
+from game.server.game_logic.game import Game
+from game.server.game_logic.action_space_generator import ActionSpaceGenerator
+from game.server.game_logic.state_changer import StateChanger
+from game.server.game_logic.services.packed_state import PackedBoardState
+from game.schema import PlayerColor
+
+action_generator = ActionSpaceGenerator()
+
+def check(state):
+    packed = PackedBoardState.from_board_state(state)
+    restored = packed.to_board_state()
+    repacked = PackedBoardState.from_board_state(restored)
+    # Прямые геттеры читают буфер без распаковки
+    accessors = (
+        packed.get_era() == state.era
+        and packed.get_action_context() == state.action_context
+        and all(packed.get_link_owner(link_id) == link.owner for link_id, link in state.links.items())
+        and all(
+            packed.get_slot_building_id(slot_id) == (slot.building_placed.id if slot.building_placed else None)
+            for city in state.cities.values() for slot_id, slot in city.slots.items()
+        )
+    )
+    return restored == state and repacked == packed and len(packed) == PackedBoardState.layout()[-1] and accessors
+
+def check_clone(state):
+    packed = PackedBoardState.from_board_state(state)
+    original = deepcopy(packed.buffer)
+    clone = packed.clone()
+    for i in range(len(clone.buffer)):
+        clone.buffer[i] += 1
+    return packed.buffer == original and clone != packed
+
+results = []
+states = []
+for seed in range(9):
+    random.seed(seed)
+    player_count = 2 + seed % 3
+    game = Game()
+    game.start(player_count, list(PlayerColor)[:player_count])
+    state_service = game.state_service
+    state_changer = StateChanger(state_service)
+    for era in range(2):
+        while not state_service.is_terminal():
+            state = state_service.get_board_state()
+            results.append(check(state))
+            states.append(deepcopy(state))
+            action = action_generator.sample_action(state_service, state_service.get_active_player().color)
+            if action is None:
+                break
+            state_changer.apply_action(action, state_service, state_service.get_active_player())
+        if era == 0:
+            # Случайная партия упирается в конец раунда, поэтому эпоху меняем напрямую
+            state_changer.turn_manager._prepare_next_era(state_service)
+    results.append(check_clone(state_service.get_board_state()))
+    print(seed, all(results))
+
+print(f"{len(results)} checks, all equal {all(results)}")
+assert all(results), "packed state does not round-trip"
+
+packed_states = [PackedBoardState.from_board_state(state) for state in states]
+start = time.perf_counter()
+for _ in range(2):
+    for state in states:
+        deepcopy(state)
+deepcopy_time = time.perf_counter() - start
+start = time.perf_counter()
+for _ in range(2):
+    for packed in packed_states:
+        packed.clone()
+clone_time = time.perf_counter() - start
+print(f"{len(states) * 2} copies: deepcopy {deepcopy_time:.3f}s, packed clone {clone_time:.3f}s")
@@ -11,5 +11,6 @@ extensions = [
 
 setup(
     name='Brass Performer',
+    install_requires=['numpy'],
     ext_modules=cythonize(extensions)
 )
\ No newline at end of file
@@ -0,0 +1,58 @@
+import time
+from game.server.game_logic.game import Game
+from game.server.game_logic.services.state_snapshot import StateSnapshot
+from game.schema import PlayerColor, PlayerState, BoardStateExposed
+
+
+timings = {}
+
+def benchmark(label, func, num_iterations):
+    start_time = time.perf_counter()
+    for _ in range(num_iterations):
+        result = func()
+    elapsed = time.perf_counter() - start_time
+    timings[label] = elapsed / num_iterations
+    print(f"{label}: {elapsed / num_iterations * 1e6:.1f} мкс")
+    return result
+
+def main():
+    game = Game()
+    colors = list(PlayerColor)
+    game.start(4, colors)
+    board_state = game.state_service.state
+    player_state = game.get_player_state(game.state_service.get_active_player().color)
+    exposed_state = player_state.state
+
+    print("=== Проверка обратимости снимков ===")
+    restored_board = StateSnapshot.load(StateSnapshot.dump(board_state))
+    print("BoardState:", restored_board == board_state)
+    assert restored_board == board_state
+    restored_exposed = StateSnapshot.load(StateSnapshot.dump(exposed_state))
+    print("BoardStateExposed:", restored_exposed.model_dump_json() == exposed_state.model_dump_json())
+    assert restored_exposed.model_dump_json() == exposed_state.model_dump_json()
+    restored_player = StateSnapshot.load(StateSnapshot.dump(player_state))
+    print("PlayerState:", restored_player.model_dump_json() == player_state.model_dump_json())
+    assert restored_player.model_dump_json() == player_state.model_dump_json()
+
+    print("\n=== Размер ===")
+    print(f"snapshot: {len(StateSnapshot.dump(player_state))} байт")
+    print(f"model_dump_json: {len(player_state.model_dump_json())} байт")
+
+    print("\n=== Бенчмарк производительности (PlayerState) ===")
+    num_iterations = 1000
+    snapshot = benchmark("StateSnapshot.dump", lambda: StateSnapshot.dump(player_state), num_iterations)
+    benchmark("StateSnapshot.load", lambda: StateSnapshot.load(snapshot), num_iterations)
+    json_state = benchmark("model_dump_json", player_state.model_dump_json, num_iterations)
+    benchmark("model_validate_json", lambda: PlayerState.model_validate_json(json_state), num_iterations)
+    speedup = timings["model_validate_json"] / timings["StateSnapshot.load"]
+    print(f"load быстрее model_validate_json в {speedup:.1f} раза")
+    # Снимок собирает объекты прямо из клеток, без валидации pydantic; с запасом на шум машины
+    assert speedup > 2, "StateSnapshot.load is not faster than model_validate_json"
+
+    print("\n=== Бенчмарк производительности (BoardState) ===")
+    board_snapshot = benchmark("StateSnapshot.dump", lambda: StateSnapshot.dump(board_state), num_iterations)
+    benchmark("StateSnapshot.load", lambda: StateSnapshot.load(board_snapshot), num_iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import random
+import time
+from game.server.game_logic.game import Game
+from game.server.game_logic.action_space_generator import ActionSpaceGenerator
+from game.schema import PlayerColor
+
+action_generator = ActionSpaceGenerator()
+
+def play(seed, trusted, check_rate=0.0, moves=300):
+    random.seed(seed)
+    game = Game()
+    game.start(4, list(PlayerColor), trusted_check_rate=check_rate)
+    processed = []
+    elapsed = 0.0
+    for _ in range(moves):
+        if game.concluded():
+            break
+        color = game.state_service.get_active_player().color
+        fingerprint = game.state_service.get_view_hash(color)
+        action = action_generator.sample_action(game.state_service, color)
+        if action is None:
+            break
+        start = time.perf_counter()
+        if trusted:
+            result = game.process_trusted_action(action, color, fingerprint)
+        else:
+            result = game.process_action(action, color)
+        elapsed += time.perf_counter() - start
+        processed.append(result.processed)
+    return game.state_service.get_state_hash(), processed, elapsed, len(processed)
+
+for seed in range(12):
+    validated_hash, validated, validated_time, moves = play(seed, trusted=False)
+    trusted_hash, trusted, trusted_time, _ = play(seed, trusted=True)
+    checked_hash, checked, _, _ = play(seed, trusted=True, check_rate=1.0)
+    # Каждое действие генератора должно проходить валидацию, иначе доверенный путь небезопасен
+    assert all(validated) and all(trusted) and all(checked), f"seed {seed}: generated action rejected"
+    assert validated_hash == trusted_hash == checked_hash, f"seed {seed}: trusted play diverged"
+    print(seed, f"{moves} moves, validated {validated_time:.3f}s, trusted {trusted_time:.3f}s")
+
+# Отпечаток другого состояния не даёт пропустить валидацию
+random.seed(0)
+game = Game()
+game.start(4, list(PlayerColor))
+color = game.state_service.get_active_player().color
+stale = game.state_service.get_view_hash(color) ^ 1
+bogus = action_generator.sample_action(game.state_service, color).model_copy(update={'card_id': -1})
+assert not game.process_trusted_action(bogus, color, stale).processed, "stale fingerprint skipped validation"
+print("stale fingerprint rejected")